@@ -6,6 +6,8 @@ from . import LearnedLiftedFluent
 
 
 class LearnedAction:
+    __slots__ = ("name", "obj_params", "cost", "precond", "add", "delete")
+
     def __init__(self, name: str, obj_params: List[str], **kwargs):
         self.name = name
         self.obj_params = obj_params
@@ -102,6 +104,8 @@ class LearnedAction:
 
 
 class LearnedLiftedAction:
+    __slots__ = ("name", "param_sorts", "precond", "add", "delete")
+
     def __init__(self, name: str, param_sorts: List[str], **kwargs):
         self.name = name
         self.param_sorts = param_sorts
@@ -4,6 +4,8 @@ from macq.trace.fluent import PlanningObject
 
 
 class LearnedFluent:
+    __slots__ = ("name", "objects")
+
     def __init__(self, name: str, objects: List[PlanningObject]):
         self.name = name
         self.objects = objects
@@ -37,6 +39,8 @@ class LearnedFluent:
 
 
 class LearnedLiftedFluent:
+    __slots__ = ("name", "param_sorts", "param_act_inds")
+
     def __init__(self, name: str, param_sorts: List[str], param_act_inds: List[int]):
         self.name = name
         self.param_sorts = param_sorts
@@ -1,16 +1,108 @@
-# from ..trace import (
+import csv
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
 from macq.trace import (
-    Action,
-    Fluent,
-    State,
-    Step,
-    Trace,
+    ColumnarTrace,
     TraceList,
+    Vocabulary,
 )
 
+# (plan ID, states, action IDs) of consecutive rows of the same plan
+Segment = Tuple[str, np.ndarray, np.ndarray]
 
-def load(fname: str, act_col: str, plan_id_col: str = None):
-    """Loads a trace file as a csv into a `TraceList`.
+
+def _iter_segments(
+    reader: Iterator[List[str]],
+    act_col: str,
+    plan_id_col: str,
+    chunk_size: int,
+    vocabulary: Vocabulary,
+) -> Tuple[np.ndarray, Iterator[Segment]]:
+    """Parses the header of a csv trace file, and returns the vocabulary IDs of
+    its fluent columns along with an iterator over the remaining rows, parsed
+    `chunk_size` rows at a time into segments of consecutive rows of the same
+    plan."""
+    header = next(reader, [])
+    if plan_id_col is None:
+        plan_idx = None
+    else:
+        assert plan_id_col in header, f"'{plan_id_col}' not in header"
+        plan_idx = header.index(plan_id_col)
+    assert act_col in header, f"'{act_col}' not in header"
+    act_idx = header.index(act_col)
+
+    # one interned fluent per column
+    fluent_cols = [i for i in range(len(header)) if i not in (act_idx, plan_idx)]
+    fluent_ids = np.array(
+        [vocabulary.fluent_id(vocabulary.fluent(header[i], [])) for i in fluent_cols],
+        dtype=np.int64,
+    )
+    width = len(header)
+
+    def segments():
+        while True:
+            # cells past the header are ignored (e.g. trailing commas)
+            rows = [row[:width] for row in islice(reader, chunk_size)]
+            if not rows:
+                return
+            cells = np.array(rows, dtype=str)
+            if cells.ndim != 2 or cells.shape[1] != width:
+                raise ValueError("Every row should have a cell for each column.")
+            values = cells[:, fluent_cols]
+            # Assert all data outside of the action and plan ID columns is 0 or 1
+            assert np.isin(values, ("0", "1")).all(), "Fluent columns should be 0 or 1"
+            states = values == "1"
+
+            # each distinct action of the chunk is interned once
+            names, inverse = np.unique(cells[:, act_idx], return_inverse=True)
+            action_ids = np.array(
+                [
+                    vocabulary.action_id(vocabulary.action(name, [])) if name else -1
+                    for name in names.tolist()
+                ],
+                dtype=np.int64,
+            )[inverse.reshape(-1)]
+
+            if plan_idx is None:
+                yield "0", states, action_ids
+                continue
+            plan_ids = cells[:, plan_idx]
+            changes = np.flatnonzero(plan_ids[1:] != plan_ids[:-1]) + 1
+            bounds = [0, *changes.tolist(), len(rows)]
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                yield str(plan_ids[start]), states[start:end], action_ids[start:end]
+
+    return fluent_ids, segments()
+
+
+def _trace(
+    vocabulary: Vocabulary, fluent_ids: np.ndarray, segments: List[Segment]
+) -> ColumnarTrace:
+    states = np.concatenate([s[1] for s in segments])
+    action_ids = np.concatenate([s[2] for s in segments])
+    return ColumnarTrace.from_arrays(
+        vocabulary, fluent_ids, states, action_ids, np.arange(len(action_ids))
+    )
+
+
+def iter_load(
+    fname: str,
+    act_col: str,
+    plan_id_col: str = None,
+    chunk_size: int = 4096,
+    vocabulary: Vocabulary = None,
+) -> Iterator[ColumnarTrace]:
+    """Streams the traces of a csv trace file.
+
+    The file is parsed `chunk_size` rows at a time, and each trace is yielded as
+    soon as the rows of its plan end, so memory use is bounded by the longest
+    trace rather than by the size of the file. The rows of a plan must therefore
+    be consecutive; a plan ID that reappears later in the file starts a new
+    trace (use `load` to merge them).
+
+    The file must have a header row. Each fluent column holds 0 or 1; an empty
+    action cell means the step has no action.
 
     Args:
         fname (str):
@@ -19,56 +111,65 @@ def load(fname: str, act_col: str, plan_id_col: str = None):
             The name of the column in the trace file that contains the action names.
         plan_id_col (str, optional):
             The name of the column in the trace file that contains the plan ID.
-            Defaults to None.
+            Defaults to None (all the rows make up a single plan).
+        chunk_size (int, optional):
+            The number of rows parsed at a time. Defaults to 4096.
+        vocabulary (Vocabulary, optional):
+            The vocabulary to intern the fluents and actions into. Defaults to a
+            new vocabulary.
 
     Returns:
-        `TraceList`:
-            The loaded trace list.
+        An iterator over the `ColumnarTrace` of each plan, in order.
     """
-    with open(fname, "r") as f:
-        lines = [l.strip().split(",") for l in f.readlines()]
+    if vocabulary is None:
+        vocabulary = Vocabulary()
+    with open(fname, "r", newline="") as f:
+        fluent_ids, segments = _iter_segments(
+            csv.reader(f), act_col, plan_id_col, chunk_size, vocabulary
+        )
+        plan_id, pending = None, []
+        for segment in segments:
+            if pending and segment[0] != plan_id:
+                yield _trace(vocabulary, fluent_ids, pending)
+                pending = []
+            plan_id = segment[0]
+            pending.append(segment)
+    if pending:
+        yield _trace(vocabulary, fluent_ids, pending)
 
-    # Make sure we have at least one plan specified
-    if plan_id_col is None:
-        plan_id_col = "plan_id"
-        lines[0].append(plan_id_col)
-        for i in range(1, len(lines)):
-            lines[i].append(0)
 
-    assert act_col in lines[0], f"'{act_col}' not in header"
-    assert plan_id_col in lines[0], f"'{plan_id_col}' not in header"
+def load(fname: str, act_col: str, plan_id_col: str = None, chunk_size: int = 4096):
+    """Loads a trace file as a csv into a `TraceList`.
 
-    # Turn the csv into a list of dictionaries with the header row as keys
-    data = [dict(zip(lines[0], line)) for line in lines[1:]]
+    The file is parsed `chunk_size` rows at a time, without building the full
+    list of rows. Rows of the same plan do not have to be consecutive. See
+    `iter_load` to stream the traces instead.
 
-    # Assert all data outside of the action column is 0 or 1
-    for line in data:
-        for key in line:
-            if key not in [plan_id_col, act_col]:
-                assert line[key] in ["0", "1"], "Fluent columns should be 0 or 1"
+    Args:
+        fname (str):
+            The name of the trace file to load.
+        act_col (str):
+            The name of the column in the trace file that contains the action names.
+        plan_id_col (str, optional):
+            The name of the column in the trace file that contains the plan ID.
+            Defaults to None.
+        chunk_size (int, optional):
+            The number of rows parsed at a time. Defaults to 4096.
 
+    Returns:
+        `TraceList`:
+            The loaded trace list, of `ColumnarTrace`s sharing one vocabulary.
+    """
+    vocabulary = Vocabulary()
     # Separate the data based on the plan ID
-    plans = {}
-
-    for line in data:
-        if line[plan_id_col] not in plans:
-            plans[line[plan_id_col]] = []
-        plans[line[plan_id_col]].append(line)
-
-    # Turn the plan data into a list of traces
-    traces = TraceList()
-    for plan_id in plans:
-        trace = Trace()
-        for i, bitvec in enumerate(plans[plan_id]):
-            state = State(
-                {
-                    Fluent(f, []): bitvec[f] == "1"
-                    for f in bitvec
-                    if f not in [act_col, plan_id_col]
-                }
-            )
-            act = Action(bitvec[act_col], [])
-            step = Step(state, act, i)
-            trace.append(step)
-        traces.append(trace)
-    return traces
+    plans: Dict[str, List[Segment]] = {}
+    with open(fname, "r", newline="") as f:
+        fluent_ids, segments = _iter_segments(
+            csv.reader(f), act_col, plan_id_col, chunk_size, vocabulary
+        )
+        for segment in segments:
+            plans.setdefault(segment[0], []).append(segment)
+    return TraceList(
+        [_trace(vocabulary, fluent_ids, plan) for plan in plans.values()],
+        vocabulary=vocabulary,
+    )
@@ -1,7 +1,9 @@
 
 import random
+from typing import Type
 
 from . import VanillaSampling
+from ...trace import State, Trace
 
 class FDRandomWalkSampling(VanillaSampling):
     """Random Walk Sampler -- inherits from the VanillaSampling base class.
@@ -33,10 +35,15 @@ class FDRandomWalkSampling(VanillaSampling):
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
+        state_type: Type[State] = State,
         max_time: float = 30,
         init_h: int = None,
         num_traces: int = 1,
         seed: int = None,
+        lazy: bool = False,
+        unique: bool = False,
+        trace_type: Type[Trace] = Trace,
+        num_workers: int = None,
     ):
         """
         Initializes a the fd random walk sampler.
@@ -50,6 +57,8 @@ class FDRandomWalkSampling(VanillaSampling):
                 The ID of the problem to access.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            state_type (Type[State]):
+                Optional; The type of `State` generated traces are made of. Defaults to `State`.
             max_time (float):
                 The maximum time allowed for a trace to be generated.
             init_h (int):
@@ -58,6 +67,17 @@ class FDRandomWalkSampling(VanillaSampling):
                 The number of traces to generate. Defaults to 1.
             seed (int):
                 The seed for the random number generator.
+            lazy (bool):
+                Optional; Generate the traces lazily, as they are accessed, in a
+                `LazyTraceList`. Defaults to False.
+            unique (bool):
+                Optional; Discard the traces identical to a previously generated
+                one and generate new ones instead. Defaults to False.
+            trace_type (Type[Trace]):
+                Optional; The type of `Trace` generated. Defaults to `Trace`.
+            num_workers (int):
+                Optional; Generate the traces in this number of worker processes
+                (see `VanillaSampling`). Defaults to None.
         """
 
         super().__init__(
@@ -65,9 +85,14 @@ class FDRandomWalkSampling(VanillaSampling):
             prob=prob,
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
+            state_type=state_type,
+            trace_type=trace_type,
             num_traces=num_traces,
             seed=seed,
             max_time=max_time,
+            lazy=lazy,
+            unique=unique,
+            num_workers=num_workers,
         )
 
         if init_h is None:
@@ -86,9 +111,11 @@ class FDRandomWalkSampling(VanillaSampling):
             self.init_h = 4 * sol_steps
 
         self.plan_len = self._plan_len
+        # the traces sampled with the heuristic length replace the first ones
+        self._next_stream = 0
         self.traces = self.generate_traces()
 
-    def _plan_len(self):
+    def _plan_len(self, rng: random.Random = random):
         """Samples the target plan length from the heuristic value"""
 
         p = 0.5
@@ -96,10 +123,15 @@ class FDRandomWalkSampling(VanillaSampling):
         # Length is based on the binomial distribution
         depth = 0
         for i in range(self.init_h):
-            if random.random() < p:
+            if rng.random() < p:
                 depth += 1
         return depth
 
+    def _trace_len(self, rng: random.Random) -> int:
+        if callable(self.plan_len):
+            return self.plan_len(rng)
+        return self.plan_len
+
     def _avg_op_cost(self):
         """Computes the average operator cost"""
 
@@ -1,5 +1,8 @@
+from collections import OrderedDict
+from itertools import zip_longest
 from time import sleep
-from typing import Set, List, Union
+from typing import Dict, Set, List, Tuple, Type, Union
+import numpy as np
 from tarski.io import PDDLReader
 from tarski.search import GroundForwardSearchModel
 from tarski.search.operations import progress
@@ -18,8 +21,23 @@ from tarski.io import fstrips as iofs
 
 import requests
 from .planning_domains_api import get_problem, get_plan
+from .operator_index import OperatorIndex, UnsupportedOperator
 from ..plan import Plan
-from ...trace import Action, State, PlanningObject, Fluent, Trace, Step
+from ...trace import (
+    State,
+    Action,
+    BitState,
+    SparseState,
+    FrozenState,
+    StateTable,
+    Fluent,
+    Trace,
+    ColumnarTrace,
+    Step,
+    Vocabulary,
+)
+from ...trace.bit_state import iter_bits
+from ...utils import Deadline
 
 
 class PlanningDomainsAPIError(Exception):
@@ -59,20 +77,40 @@ class Generator:
             The language definition.
         instance (GroundForwardSearchModel):
             The grounded instance of the problem.
+        vocabulary (Vocabulary):
+            The vocabulary interning every (macq) object, fluent, and action of the problem.
+        state_table (StateTable):
+            The table sharing a single `FrozenState` between all occurrences of a
+            state, when generating `FrozenState`s.
         grounded_fluents (list):
             A list of all grounded (macq) fluents extracted from the given problem definition.
         op_dict (dict):
             The problem's ground operators, formatted to a dictionary for easy access during plan generation.
+        operator_index (OperatorIndex):
+            The problem's ground operators, compiled to bitmasks over fluent IDs to
+            quickly find the applicable operators of a state. None if the problem
+            has operators that are not STRIPS operators (e.g. with conditional
+            effects), in which case tarski is used instead.
         observe_pres_effs (bool):
             Option to observe action preconditions and effects upon generation.
+        state_type (Type[State]):
+            The type of `State` generated traces are made of. Either `State`, `BitState`,
+            `FrozenState`, or `SparseState`.
+        trace_type (Type[Trace]):
+            The type of `Trace` generated. Either `Trace` or `ColumnarTrace`.
     """
 
+    # The number of converted states kept to be reused when a state is revisited
+    STATE_CACHE_SIZE = 1024
+
     def __init__(
         self,
         dom: str = None,
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
+        state_type: Type[State] = State,
+        trace_type: Type[Trace] = Trace,
     ):
         """Creates a basic PDDL state trace generator. Takes either the raw filenames
         of the domain and problem, or a problem ID.
@@ -86,12 +124,24 @@ class Generator:
                 The ID of the problem to access.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            state_type (Type[State]):
+                Optional; The type of `State` generated traces are made of. `BitState`
+                stores one bit per grounded fluent. `FrozenState` is an immutable
+                `BitState`, shared between all occurrences of a state. `SparseState`
+                only stores the true fluents, for problems with many grounded fluents.
+                Defaults to `State`.
+            trace_type (Type[Trace]):
+                Optional; The type of `Trace` generated. A `ColumnarTrace` stores
+                its states in a matrix (ignoring `state_type`), and is generated
+                without creating any state. Defaults to `Trace`.
         """
         # get attributes
         self.pddl_dom = dom
         self.pddl_prob = prob
         self.problem_id = problem_id
         self.observe_pres_effs = observe_pres_effs
+        self.state_type = state_type
+        self.trace_type = trace_type
         # read the domain and problem
         reader = PDDLReader(raise_on_error=True)
         if not problem_id:
@@ -103,11 +153,29 @@ class Generator:
             reader.parse_domain_string(dom)
             self.problem = reader.parse_instance_string(prob)
         self.lang = self.problem.language
+        # memoized conversions from tarski
+        self._fluent_id_cache: Dict[Atom, int] = {}
+        self._action_cache: Dict[str, Action] = {}
+        self._state_cache: "OrderedDict[Tuple[Type[State], int], State]" = (
+            OrderedDict()
+        )
         # ground the problem
         operators = ground_problem_schemas_into_plain_operators(self.problem)
         self.instance = GroundForwardSearchModel(self.problem, operators)
+        self.vocabulary = Vocabulary()
+        self.state_table = StateTable(self.vocabulary)
         self.grounded_fluents = self.__get_all_grounded_fluents()
+        self._grounded_ids = frozenset(
+            self.vocabulary.fluent_id(f) for f in self.grounded_fluents
+        )
+        self._grounded_mask = sum(1 << i for i in self._grounded_ids)
         self.op_dict = self.__get_op_dict()
+        try:
+            self.operator_index = OperatorIndex(
+                self.instance.operators, self.__tarski_atom_to_fluent_id
+            )
+        except UnsupportedOperator:
+            self.operator_index = None
 
     def extract_action_typing(self):
         """Retrieves a dictionary mapping all of this problem's actions and the types
@@ -222,9 +290,33 @@ class Generator:
         for term in terms:
             if isinstance(fluent_name, BuiltinPredicateSymbol):
                 fluent_name = fluent_name.value
-            objects.append(PlanningObject(term.sort.name, term.name))
-        fluent = Fluent(fluent_name, objects)
-        return fluent
+            objects.append(self.vocabulary.object(term.sort.name, term.name))
+        return self.vocabulary.fluent(fluent_name, objects)
+
+    def __tarski_atom_to_fluent_id(self, atom: Atom) -> int:
+        fluent_id = self._fluent_id_cache.get(atom)
+        if fluent_id is None:
+            fluent = self.__tarski_atom_to_macq_fluent(atom)
+            fluent_id = self._fluent_id_cache[atom] = self.vocabulary.fluent_id(fluent)
+        return fluent_id
+
+    def tarski_state_to_bits(self, tarski_state: Model) -> int:
+        """Converts a state as defined by tarski to the bitmask of the IDs of its
+        true fluents, as used by the `operator_index`.
+
+        Args:
+            tarski_state (Model):
+                The supplied state, defined using the tarski Model class.
+
+        Returns:
+            The bitmask of the fluent IDs of the true atoms of the state.
+        """
+        bits = 0
+        for atom in tarski_state.as_atoms():
+            # ignore functions for now
+            if isinstance(atom, Atom):
+                bits |= 1 << self.__tarski_atom_to_fluent_id(atom)
+        return bits
 
     def tarski_state_to_macq(self, tarski_state: Model):
         """Converts a state as defined by tarski to a state as defined by macq.
@@ -236,17 +328,89 @@ class Generator:
         Returns:
             A state, defined using the macq State class.
         """
-        state_fluents = {}
-        true_fluents = set()
-        for f in tarski_state.as_atoms():
-            fluent = self.__tarski_atom_to_macq_fluent(f)
-            # ignore functions for now
-            if fluent:
-                true_fluents.add(str(fluent))
-        for grounded_fluent in self.grounded_fluents:
-            state_fluents[grounded_fluent] = str(grounded_fluent) in true_fluents
+        return self.bits_to_macq(self.tarski_state_to_bits(tarski_state))
+
+    def bits_to_macq(self, bits: int):
+        """Converts the bitmask of the IDs of the true fluents of a state (see
+        `tarski_state_to_bits`) to a state as defined by macq.
 
-        return State(state_fluents)
+        The last `STATE_CACHE_SIZE` converted states are cached, and a revisited
+        state is cloned from the cache rather than converted again.
+
+        Args:
+            bits (int):
+                The bitmask of the fluent IDs of the true fluents of the state.
+
+        Returns:
+            A state of type `state_type`, over the grounded fluents.
+        """
+        bits &= self._grounded_mask
+        if issubclass(self.state_type, FrozenState):
+            # already shared between all occurrences of the state
+            return self.state_table.state(self._grounded_mask, bits)
+        key = (self.state_type, bits)
+        state = self._state_cache.get(key)
+        if state is not None:
+            self._state_cache.move_to_end(key)
+            return state.clone()
+
+        if issubclass(self.state_type, SparseState):
+            state = SparseState(
+                self.vocabulary, mask=self._grounded_mask, true=iter_bits(bits)
+            )
+        elif issubclass(self.state_type, BitState):
+            state = BitState(self.vocabulary, mask=self._grounded_mask, bits=bits)
+        else:
+            fluent_id = self.vocabulary.fluent_id
+            state = State(
+                {
+                    fluent: bool(bits >> fluent_id(fluent) & 1)
+                    for fluent in self.grounded_fluents
+                }
+            )
+        self._state_cache[key] = state
+        if len(self._state_cache) > self.STATE_CACHE_SIZE:
+            self._state_cache.popitem(last=False)
+        return state.clone()
+
+    def trace_from_bits(self, states: List[int], operators: List[int]) -> Trace:
+        """Creates a trace from a sequence of states and the operators applied to
+        them, as computed with the `operator_index`.
+
+        If `trace_type` is a `ColumnarTrace`, the states are unpacked straight
+        into its state matrix, without creating any state.
+
+        Args:
+            states (List[int]):
+                The bitmask of the true fluents of each state of the trace.
+            operators (List[int]):
+                The positions, in the `operator_index`, of the operators applied
+                to each state but the last one.
+
+        Returns:
+            A trace of type `trace_type`.
+        """
+        index = self.operator_index
+        actions = [self.tarski_act_to_macq(index.operators[i]) for i in operators]
+        if issubclass(self.trace_type, ColumnarTrace):
+            fluent_ids = sorted(self._grounded_ids)
+            mask = self._grounded_mask
+            size = (mask.bit_length() + 7) // 8
+            packed = np.frombuffer(
+                b"".join((bits & mask).to_bytes(size, "little") for bits in states),
+                dtype=np.uint8,
+            ).reshape(len(states), size)
+            matrix = np.unpackbits(packed, axis=1, bitorder="little")[:, fluent_ids]
+            action_ids = [self.vocabulary.action_id(action) for action in actions]
+            return self.trace_type.from_arrays(
+                self.vocabulary, fluent_ids, matrix, action_ids + [-1]
+            )
+        return self.trace_type(
+            [
+                Step(self.bits_to_macq(bits), action, i + 1)
+                for i, (bits, action) in enumerate(zip_longest(states, actions))
+            ]
+        )
 
     def tarski_act_to_macq(self, tarski_act: PlainOperator):
         """Converts an action as defined by tarski to an action as defined by macq.
@@ -258,6 +422,14 @@ class Generator:
         Returns:
             An action, defined using the macq Action class.
         """
+        action = self._action_cache.get(tarski_act.name)
+        if action is None:
+            action = self._action_cache[tarski_act.name] = self.__convert_act(
+                tarski_act
+            )
+        return action
+
+    def __convert_act(self, tarski_act: PlainOperator) -> Action:
         name_split = tarski_act.name.replace(")", "").split("(")
         name = name_split[0]
         obj_names = name_split[1].split(", ")
@@ -282,7 +454,7 @@ class Generator:
         obj_params = [tarski_objs_mapping[o] for o in obj_names]
 
         return (
-            Action(
+            self.vocabulary.action(
                 name=name,
                 obj_params=obj_params,
                 precond=precond,
@@ -290,7 +462,7 @@ class Generator:
                 delete=delete,
             )
             if self.observe_pres_effs
-            else Action(name=name, obj_params=obj_params)
+            else self.vocabulary.action(name=name, obj_params=obj_params)
         )
 
     def change_init(
@@ -375,7 +547,12 @@ class Generator:
         self.pddl_dom = new_domain
         self.pddl_prob = new_prob
 
-    def generate_plan(self, from_ipc_file: bool = False, filename: str = None):
+    def generate_plan(
+        self,
+        from_ipc_file: bool = False,
+        filename: str = None,
+        deadline: Deadline = None,
+    ):
         """Generates a plan. If reading from an IPC file, the `Plan` is read directly. Otherwise, if the initial state or
         goal was changed, these changes are taken into account through the updated PDDL files. If no changes were made, the
         default nitial state/goal in the initial problem file is used.
@@ -385,9 +562,16 @@ class Generator:
                 Option to read a `Plan` from an IPC file instead of the `Generator`'s problem file. Defaults to False.
             filename (str):
                 The name of the file to read the plan from.
+            deadline (Deadline):
+                Optional; The deadline to get a plan from the planner before.
+                Requests to the planner are cancelled when it passes.
 
         Returns:
             A `Plan` object that holds all the actions taken.
+
+        Raises:
+            requests.Timeout:
+                The deadline passed before the planner returned a plan.
         """
         if not from_ipc_file:
             # if the files are only being generated from the problem ID and are unaltered, retrieve the existing plan (note that
@@ -403,12 +587,20 @@ class Generator:
 
                 def get_api_response(delays: List[int]):
                     if delays:
-                        sleep(delays[0])
+                        timeout = None
+                        if deadline is not None:
+                            sleep(min(delays[0], deadline.remaining()))
+                            if deadline.expired():
+                                raise requests.Timeout("The planner deadline passed.")
+                            timeout = deadline.remaining()
+                        else:
+                            sleep(delays[0])
                         try:
                             resp = requests.post(
                                 "http://solver.planning.domains/solve",
                                 verify=False,
                                 json=data,
+                                timeout=timeout,
                             ).json()
                             return [act["name"] for act in resp["result"]["plan"]]
                         except TypeError:
@@ -437,8 +629,16 @@ class Generator:
         Returns:
             The trace generated from the plan.
         """
-        trace = Trace()
         actions = plan.actions
+        index = self.operator_index
+        if index is not None:
+            operators = [index.position(act) for act in actions]
+            states = [self.tarski_state_to_bits(self.problem.init)]
+            for i in operators:
+                states.append(index.successor(states[-1], i))
+            return self.trace_from_bits(states, operators)
+
+        trace = Trace()
         plan_len = len(actions)
         # get initial state
         state = self.problem.init
@@ -453,4 +653,10 @@ class Generator:
                 state = progress(state, act)
             else:
                 trace.append(Step(macq_state, None, i + 1))
+        return self._as_trace_type(trace)
+
+    def _as_trace_type(self, trace: Trace) -> Trace:
+        """Converts a trace generated with tarski to a trace of type `trace_type`."""
+        if issubclass(self.trace_type, ColumnarTrace):
+            return self.trace_type.from_trace(trace, self.vocabulary)
         return trace
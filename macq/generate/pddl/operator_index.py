@@ -0,0 +1,291 @@
+import random
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from tarski.fstrips import AddEffect, DelEffect
+from tarski.fstrips.action import PlainOperator
+from tarski.syntax import CompoundFormula, Connective, Tautology
+from tarski.syntax.builtins import BuiltinPredicateSymbol
+from tarski.syntax.formulas import Atom, Formula
+from ...trace.bit_state import iter_bits
+from ...utils import Deadline
+
+
+class UnsupportedOperator(Exception):
+    """Raised when a grounded operator is not a STRIPS operator (with negative
+    preconditions), e.g. if it has disjunctive preconditions or conditional
+    effects."""
+
+    def __init__(self, operator: PlainOperator, message=None):
+        if message is None:
+            message = f"{operator} cannot be compiled to bitmasks."
+        super().__init__(message)
+
+
+def _literals(formula: Formula) -> Iterator[Tuple[Atom, bool]]:
+    """Flattens a conjunction of literals into (atom, value) pairs."""
+    if isinstance(formula, Tautology):
+        return
+    if isinstance(formula, Atom):
+        yield formula, True
+        return
+    if isinstance(formula, CompoundFormula):
+        if formula.connective == Connective.And:
+            for subformula in formula.subformulas:
+                yield from _literals(subformula)
+            return
+        if formula.connective == Connective.Not and isinstance(
+            formula.subformulas[0], Atom
+        ):
+            yield formula.subformulas[0], False
+            return
+    raise ValueError(formula)
+
+
+def _builtin_value(atom: Atom) -> bool:
+    """Evaluates a grounded (in)equality atom."""
+    symbol = atom.predicate.symbol
+    left, right = (term.name for term in atom.subterms)
+    if symbol == BuiltinPredicateSymbol.EQ:
+        return left == right
+    if symbol == BuiltinPredicateSymbol.NE:
+        return left != right
+    raise ValueError(atom)
+
+
+class OperatorIndex:
+    """The grounded STRIPS operators of a problem, compiled to bitmasks.
+
+    States are integer bitmasks over fluent IDs (of the vocabulary of a
+    `Generator`). Each operator is compiled to the bitmasks of its positive and
+    negative preconditions and of its add and delete effects, and each fluent
+    watches the operators whose preconditions mention it. The applicable
+    operators of a state are found by counting the unsatisfied preconditions of
+    every operator, which are updated incrementally, through the watch index,
+    from the fluents changed by an applied operator (see `ApplicableOperators`).
+
+    Grounded (in)equality preconditions are evaluated once, when compiling. An
+    index is pickled without its tarski operators, so that it can be sent to
+    worker processes.
+
+    Attributes:
+        operators (List[PlainOperator]):
+            The compiled tarski operators, in their original order.
+        pre (List[int]):
+            The positive preconditions of each operator.
+        pre_neg (List[int]):
+            The negative preconditions of each operator.
+        add (List[int]):
+            The add effects of each operator.
+        delete (List[int]):
+            The delete effects of each operator.
+    """
+
+    def __init__(
+        self, operators: Sequence[PlainOperator], fluent_id: Callable[[Atom], int]
+    ):
+        """Compiles grounded operators.
+
+        Args:
+            operators (Sequence[PlainOperator]):
+                The grounded tarski operators.
+            fluent_id (Callable[[Atom], int]):
+                The function mapping a grounded atom to the ID of its fluent.
+
+        Raises:
+            UnsupportedOperator:
+                An operator has preconditions other than a conjunction of
+                literals, or effects other than unconditional add and delete
+                effects.
+        """
+        self.operators = list(operators)
+        self._positions = {operator.name: i for i, operator in enumerate(operators)}
+        self.pre, self.pre_neg, self.add, self.delete = [], [], [], []
+        self._add_ids: List[List[int]] = []
+        self._delete_ids: List[List[int]] = []
+        watch: Dict[int, List[int]] = {}
+        watch_neg: Dict[int, List[int]] = {}
+        # the number of unsatisfied preconditions of each operator in the empty
+        # state, plus one if a static precondition is false
+        counts = np.zeros(len(self.operators), dtype=np.int64)
+        self._static = set()
+
+        for i, operator in enumerate(self.operators):
+            pre = pre_neg = 0
+            try:
+                literals = list(_literals(operator.precondition))
+                for atom, value in literals:
+                    if isinstance(atom.predicate.symbol, BuiltinPredicateSymbol):
+                        if _builtin_value(atom) != value:
+                            self._static.add(i)
+                        continue
+                    f = fluent_id(atom)
+                    if value:
+                        pre |= 1 << f
+                    else:
+                        pre_neg |= 1 << f
+            except ValueError:
+                raise UnsupportedOperator(operator) from None
+
+            add_ids, delete_ids = [], []
+            for effect in operator.effects:
+                if not isinstance(effect.condition, Tautology) or not isinstance(
+                    effect, (AddEffect, DelEffect)
+                ):
+                    raise UnsupportedOperator(operator)
+                f = fluent_id(effect.atom)
+                (add_ids if isinstance(effect, AddEffect) else delete_ids).append(f)
+
+            for f in iter_bits(pre):
+                watch.setdefault(f, []).append(i)
+                counts[i] += 1
+            for f in iter_bits(pre_neg):
+                watch_neg.setdefault(f, []).append(i)
+            if i in self._static:
+                counts[i] += 1
+            self.pre.append(pre)
+            self.pre_neg.append(pre_neg)
+            self.add.append(sum(1 << f for f in set(add_ids)))
+            self.delete.append(sum(1 << f for f in set(delete_ids)))
+            self._add_ids.append(sorted(set(add_ids)))
+            self._delete_ids.append(sorted(set(delete_ids) - set(add_ids)))
+
+        self._counts = counts
+        self._watch = {f: np.array(ops) for f, ops in watch.items()}
+        self._watch_neg = {f: np.array(ops) for f, ops in watch_neg.items()}
+
+    def __len__(self):
+        return len(self.pre)
+
+    def __getstate__(self):
+        # tarski operators cannot be pickled
+        return {**self.__dict__, "operators": None}
+
+    def position(self, operator: PlainOperator) -> int:
+        """Retrieves the position of a grounded operator in the index."""
+        return self._positions[operator.name]
+
+    def is_applicable(self, state: int, i: int) -> bool:
+        """Checks whether the i-th operator is applicable in a state."""
+        return (
+            i not in self._static
+            and state & self.pre[i] == self.pre[i]
+            and not state & self.pre_neg[i]
+        )
+
+    def successor(self, state: int, i: int) -> int:
+        """Applies the i-th operator to a state (without checking that it is
+        applicable). Delete effects are applied before add effects."""
+        return (state & ~self.delete[i]) | self.add[i]
+
+    def unsatisfied(self, state: int) -> np.ndarray:
+        """Counts the unsatisfied preconditions of each operator in a state."""
+        counts = self._counts.copy()
+        for f in iter_bits(state):
+            self._toggle(counts, f, True)
+        return counts
+
+    def _toggle(self, counts: np.ndarray, f: int, value: bool):
+        """Updates the unsatisfied precondition counts for a fluent becoming
+        true (or false)."""
+        step = -1 if value else 1
+        ops = self._watch.get(f)
+        if ops is not None:
+            counts[ops] += step
+        ops = self._watch_neg.get(f)
+        if ops is not None:
+            counts[ops] -= step
+
+    def applicable(self, state: int) -> "ApplicableOperators":
+        """Retrieves the applicable operators of a state.
+
+        Args:
+            state (int):
+                The bitmask of the true fluents of the state.
+
+        Returns:
+            The `ApplicableOperators` of the state, to apply operators to.
+        """
+        return ApplicableOperators(self, state)
+
+    def random_walk(
+        self,
+        state: int,
+        length: int,
+        rng: random.Random = random,
+        deadline: Deadline = None,
+    ) -> Optional[Tuple[List[int], List[int]]]:
+        """Walks from a state by uniformly sampling applicable operators. When
+        the walk reaches a dead end, it is discarded and a new walk starts from
+        the initial state.
+
+        Args:
+            state (int):
+                The bitmask of the true fluents of the initial state.
+            length (int):
+                The number of states of the walk.
+            rng (random.Random):
+                Optional; The random number generator sampling the operators.
+                Defaults to the `random` module.
+            deadline (Deadline):
+                Optional; The deadline after which to give up, checked before
+                each walk.
+
+        Returns:
+            The states of the walk and the positions of the operators applied to
+            each state but the last one, or None if the deadline passed.
+        """
+        while deadline is None or not deadline.expired():
+            applicable = self.applicable(state)
+            states, operators = [], []
+            for _ in range(length - 1):
+                ids = applicable.ids()
+                if not ids:
+                    break
+                i = rng.choice(ids)
+                states.append(applicable.state)
+                operators.append(i)
+                applicable.apply(i)
+            else:
+                states.append(applicable.state)
+                return states, operators
+        return None
+
+
+class ApplicableOperators:
+    """The applicable operators of a state, kept up to date as operators are
+    applied to the state.
+
+    Attributes:
+        index (OperatorIndex):
+            The compiled operators.
+        state (int):
+            The bitmask of the true fluents of the current state.
+    """
+
+    def __init__(self, index: OperatorIndex, state: int):
+        self.index = index
+        self.state = state
+        self._counts = index.unsatisfied(state)
+
+    def ids(self) -> List[int]:
+        """Retrieves the positions of the applicable operators, in order."""
+        return np.flatnonzero(self._counts == 0).tolist()
+
+    def operators(self) -> List[PlainOperator]:
+        """Retrieves the applicable (tarski) operators, in order."""
+        operators = self.index.operators
+        return [operators[i] for i in self.ids()]
+
+    def apply(self, i: int):
+        """Applies the i-th operator to the current state, and updates the
+        applicable operators from the fluents it changed."""
+        index = self.index
+        state = self.state
+        for f in index._delete_ids[i]:
+            if state >> f & 1:
+                index._toggle(self._counts, f, False)
+        for f in index._add_ids[i]:
+            if not state >> f & 1:
+                index._toggle(self._counts, f, True)
+        self.state = index.successor(state, i)
+
@@ -1,10 +1,11 @@
 import random
-from typing import Dict
+from typing import Dict, Type
+import requests
 from tarski.syntax.formulas import Atom
 from collections import OrderedDict
 from . import VanillaSampling
-from ...trace import TraceList, State
-from ...utils import PercentError, basic_timer, progress
+from ...trace import TraceList, State, FrozenState
+from ...utils import PercentError, Deadline, TraceSearchTimeOut, progress
 
 
 class RandomGoalSampling(VanillaSampling):
@@ -39,6 +40,7 @@ class RandomGoalSampling(VanillaSampling):
         problem_id: int = None,
         max_time: float = 30,
         observe_pres_effs: bool = False,
+        state_type: Type[State] = State,
     ):
         """
         Initializes a random goal state trace sampler using the plan length, number of traces,
@@ -65,6 +67,8 @@ class RandomGoalSampling(VanillaSampling):
                 The maximum time allowed for a trace to be generated.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            state_type (Type[State]):
+                Optional; The type of `State` generated traces are made of. Defaults to `State`.
         """
         if subset_size_perc < 0 or subset_size_perc > 1:
             raise PercentError()
@@ -78,6 +82,7 @@ class RandomGoalSampling(VanillaSampling):
             problem_id=problem_id,
             num_traces=num_traces,
             observe_pres_effs=observe_pres_effs,
+            state_type=state_type,
             max_time=max_time,
         )
 
@@ -101,13 +106,12 @@ class RandomGoalSampling(VanillaSampling):
         return filtered_goals
 
     def generate_goals_setup(self, num_seconds: float, goal_states: Dict):
-        @basic_timer(num_seconds=num_seconds)
         def generate_goals(self=self, goal_states=goal_states):
             """Helper function for `goal_sampling`. Generates as many goals as possible within the specified max_time seconds (timing is
-            enforced by the basic_timer wrapper).
+            enforced by a `Deadline`, checked before each candidate goal and
+            bounding each trace search and planner request).
 
-            The outside function is a wrapper that provides parameters for both the timer
-            wrapper and the function.
+            The outside function is a wrapper that provides parameters for the function.
 
             Given the specified number of traces `num_traces`, if `num_traces` plans of length k (`steps_deep`) are found before
             the time is up, exit early.
@@ -116,20 +120,24 @@ class RandomGoalSampling(VanillaSampling):
                 goal_states (Dict):
                     The dictionary to fill with the values of each goal state, initial state, and plan.
             """
+            deadline = Deadline(num_seconds)
             # create a sampler to test the complexity of the new goal by running a planner on it
             k_length_plans = 0
-            while True:
+            while not deadline.expired():
                 # generate a trace of the specified length and retrieve the state of the last step
-                state = self.generate_single_trace_setup(
-                    num_seconds, self.steps_deep
-                )()[-1].state
+                try:
+                    state = self.generate_single_trace_setup(
+                        deadline.remaining(), self.steps_deep
+                    )()[-1].state
+                except TraceSearchTimeOut:
+                    break
 
                 # get all positive fluents (only positive fluents can be used for a goal)
                 goal_f = [f for f in state if state[f]]
                 # get next initial state (only used for enforced hill climbing sampling)
                 next_init_f = goal_f.copy()
                 # get the subset size
-                subset_size = int(len(state.fluents) * self.subset_size_perc)
+                subset_size = int(len(state) * self.subset_size_perc)
                 # if necessary, take a subset of the fluents
                 if len(goal_f) > subset_size:
                     random.shuffle(goal_f)
@@ -147,16 +155,21 @@ class RandomGoalSampling(VanillaSampling):
                 try:
                     # attempt to generate a plan, and find a new goal if a plan can't be found
                     # should only crash if there are server issues
-                    test_plan = self.generate_plan()
+                    test_plan = self.generate_plan(deadline=deadline)
                 except KeyError:
                     continue
+                except requests.Timeout:
+                    break
 
                 # create a State and add it to the dictionary
                 state_dict = {}
                 for f in goal_f:
                     state_dict[f] = True
+                goal_state = State(state_dict)
+                if issubclass(self.state_type, FrozenState):
+                    goal_state = self.state_table.freeze(goal_state)
                 # map each goal to the initial state and plan used to achieve it
-                goal_states[State(state_dict)] = {
+                goal_states[goal_state] = {
                     "plan": test_plan,
                     "initial state": self.problem.init,
                 }
@@ -180,7 +193,7 @@ class RandomGoalSampling(VanillaSampling):
         Returns:
             A TraceList with the generated traces.
         """
-        traces = TraceList()
+        traces = TraceList(vocabulary=self.vocabulary)
         # retrieve goals and their respective plans
         self.goals_inits_plans = self.goal_sampling()
         # iterate through all plans corresponding to the goals, generating traces
@@ -1,4 +1,6 @@
+from typing import Type
 from .generator import Generator
+from ...trace import State
 
 
 class TraceFromGoal(Generator):
@@ -8,6 +10,7 @@ class TraceFromGoal(Generator):
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
+        state_type: Type[State] = State,
     ):
         """
         Initializes a goal state trace sampler using the domain and problem. This method of sampling
@@ -22,12 +25,15 @@ class TraceFromGoal(Generator):
                 The ID of the problem to access.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            state_type (Type[State]):
+                Optional; The type of `State` generated traces are made of. Defaults to `State`.
         """
         super().__init__(
             dom=dom,
             prob=prob,
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
+            state_type=state_type,
         )
         self.trace = self.generate_trace()
 
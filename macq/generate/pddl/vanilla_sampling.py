@@ -1,8 +1,15 @@
 from tarski.search.operations import progress
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterator, Type
 import random
+from warnings import warn
 from . import Generator
+from .operator_index import OperatorIndex
 from ...utils import (
-    set_timer_throw_exc,
+    Deadline,
     TraceSearchTimeOut,
     InvalidTime,
     set_num_traces,
@@ -10,11 +17,28 @@ from ...utils import (
     progress as print_progress,
 )
 from ...trace import (
+    State,
     Step,
     Trace,
     TraceList,
+    LazyTraceList,
 )
 
+# The compiled operators and initial state walked from by a worker process
+_worker_walk = None
+
+
+def _init_worker(index: OperatorIndex, init: int):
+    global _worker_walk
+    _worker_walk = (index, init)
+
+
+def _sample_walk(args):
+    """Samples a random walk in a worker process."""
+    rng, plan_len, max_time = args
+    index, init = _worker_walk
+    return index.random_walk(init, plan_len, rng, Deadline(max_time))
+
 
 class VanillaSampling(Generator):
     """Vanilla State Trace Sampler - inherits the base Generator class and its attributes.
@@ -31,18 +55,40 @@ class VanillaSampling(Generator):
             The number of traces to be generated.
         traces (TraceList):
             The list of traces generated.
+        lazy (bool):
+            Whether traces are generated lazily, as they are accessed.
+        unique (bool):
+            Whether duplicate traces are discarded and generated again.
+        seed (int):
+            The seed of the random number generator. When set, each trace is
+            sampled from its own random stream, derived from the seed and the
+            position of the trace.
+        num_workers (int):
+            The number of worker processes traces are generated with, or None to
+            generate them in this process from the global random stream.
     """
 
+    # The number of traces drawn per requested trace before giving up on
+    # finding unique ones
+    UNIQUE_ATTEMPTS = 100
+    # The number of traces sampled ahead per worker process
+    SAMPLE_AHEAD = 4
+
     def __init__(
         self,
         dom: str = None,
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
+        state_type: Type[State] = State,
         plan_len: int = 1,
         num_traces: int = 0,
         seed: int = None,
         max_time: float = 30,
+        lazy: bool = False,
+        unique: bool = False,
+        trace_type: Type[Trace] = Trace,
+        num_workers: int = None,
     ):
         """
         Initializes a vanilla state trace sampler using the plan length, number of traces,
@@ -59,22 +105,69 @@ class VanillaSampling(Generator):
                 The maximum time allowed for a trace to be generated.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            state_type (Type[State]):
+                Optional; The type of `State` generated traces are made of (see
+                `Generator`). Defaults to `State`.
             plan_len (int):
                 The length of each generated trace. Defaults to 1.
             num_traces (int):
                 The number of traces to generate. Defaults to 1.
+            lazy (bool):
+                Optional; Generate the traces lazily, as they are accessed, in a
+                `LazyTraceList` (which does not cache them). Each trace is
+                sampled from the random stream of its position (see `seed`), so
+                it is the same every time it is accessed. Defaults to False.
+            unique (bool):
+                Optional; Discard the traces identical to a previously generated
+                one (see `Trace.fingerprint`) and generate new ones instead. If
+                no new trace is found within `UNIQUE_ATTEMPTS` draws per trace,
+                fewer traces are returned, with a warning. Cannot be used with
+                `lazy`. Defaults to False.
+            trace_type (Type[Trace]):
+                Optional; The type of `Trace` generated (see `Generator`).
+                Defaults to `Trace`.
+            num_workers (int):
+                Optional; Generate the traces in this number of worker processes.
+                Each trace is then sampled from its own random stream, derived
+                from `seed` and the position of the trace, as when a seed is
+                given, so that the same traces are generated for a given seed
+                whatever the number of workers. Cannot be used with `lazy`.
+                Defaults to None, generating traces in this process (from the
+                global random stream if no seed is given).
+
+        Raises:
+            ValueError:
+                Both `lazy` and `unique` are set, both `lazy` and `num_workers`
+                are set, or `num_workers` is not positive.
         """
         super().__init__(
             dom=dom,
             prob=prob,
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
+            state_type=state_type,
+            trace_type=trace_type,
         )
         if max_time <= 0:
             raise InvalidTime()
+        if lazy and unique:
+            raise ValueError("Lazily generated traces cannot be made unique.")
+        if num_workers is not None:
+            if num_workers < 1:
+                raise ValueError("The number of workers must be positive.")
+            if lazy:
+                raise ValueError("Lazily generated traces cannot use workers.")
         if seed:
             random.seed(seed)
+        self.seed = seed
+        self.num_workers = num_workers
+        # only unseeded serial sampling draws from the global random stream
+        self._trace_streams = seed is not None or num_workers is not None
+        # the position of the next trace sampled from its own random stream
+        self._next_stream = 0
         self.max_time = max_time
+        self.lazy = lazy
+        self.unique = unique
         self.plan_len = set_plan_length(plan_len)
         self.num_traces = set_num_traces(num_traces)
         if self.num_traces > 0:
@@ -89,44 +182,159 @@ class VanillaSampling(Generator):
         of the given length.
 
         Returns:
-            A TraceList object with the list of traces generated.
+            A TraceList object with the list of traces generated (without
+            duplicates if `unique` is set), or a LazyTraceList generating them
+            on access if `lazy` is set.
         """
-        traces = TraceList()
-        traces.generator = self.generate_single_trace_setup(
+        generator = self.generate_single_trace_setup(
             num_seconds=self.max_time, plan_len=self.plan_len
         )
-        for _ in print_progress(range(self.num_traces)):
-            traces.append(traces.generator())
+        if self.lazy:
+            self.traces = LazyTraceList(
+                partial(self._trace_at, generator),
+                self.num_traces,
+                vocabulary=self.vocabulary,
+            )
+            return self.traces
+        traces = TraceList(vocabulary=self.vocabulary)
+        # more traces are drawn from the same source, but in this process
+        traces.generator = (
+            partial(self._draw_next, generator)
+            if self._trace_streams
+            else generator
+        )
+        with self._trace_source(generator) as draw:
+            if not self.unique:
+                for _ in print_progress(range(self.num_traces)):
+                    traces.append(draw())
+            else:
+                seen = set()
+                attempts = self.UNIQUE_ATTEMPTS * self.num_traces
+                for _ in print_progress(range(self.num_traces)):
+                    while attempts > 0:
+                        attempts -= 1
+                        trace = draw()
+                        key = (len(trace), trace.fingerprint())
+                        if key not in seen:
+                            seen.add(key)
+                            traces.append(trace)
+                            break
+                    else:
+                        warn(
+                            f"Only found {len(traces)} unique traces out of the "
+                            f"{self.num_traces} requested."
+                        )
+                        break
         self.traces = traces
         return traces
 
+    @contextmanager
+    def _trace_source(self, generator: Callable[..., Trace]):
+        """Provides the function drawing the next trace to generate.
+
+        Without `seed` or `num_workers`, traces are drawn from `generator`.
+        Otherwise, the n-th trace is sampled from its own random stream (see
+        `_trace_random`), by the worker processes if there are workers and the
+        operators are compiled.
+        """
+        if not self._trace_streams:
+            yield generator
+        elif self.num_workers is None or self.operator_index is None:
+            yield partial(self._draw_next, generator)
+        else:
+            init = self.tarski_state_to_bits(self.problem.init)
+            executor = ProcessPoolExecutor(
+                self.num_workers,
+                initializer=_init_worker,
+                initargs=(self.operator_index, init),
+            )
+            sampler = self._sample_traces(executor)
+            try:
+                yield sampler.__next__
+            finally:
+                # cancels the traces sampled ahead
+                sampler.close()
+                executor.shutdown()
+
+    def _trace_random(self, position: int) -> random.Random:
+        """Creates the random stream of the trace at a position, derived from
+        `seed`."""
+        if self.seed is None:
+            self.seed = random.getrandbits(64)
+        return random.Random(f"{self.seed}:{position}")
+
+    def _trace_at(self, generator: Callable[..., Trace], position: int) -> Trace:
+        """Generates the trace at a position from its own random stream."""
+        rng = self._trace_random(position)
+        return generator(plan_len=self._trace_len(rng), rng=rng)
+
+    def _draw_next(self, generator: Callable[..., Trace]) -> Trace:
+        """Generates the trace at the next position."""
+        self._next_stream += 1
+        return self._trace_at(generator, self._next_stream - 1)
+
+    def _trace_len(self, rng: random.Random) -> int:
+        """Samples the length of a trace."""
+        return self.plan_len
+
+    def _sample_traces(self, executor: ProcessPoolExecutor) -> Iterator[Trace]:
+        """Samples traces in worker processes, in order.
+
+        The traces at the `SAMPLE_AHEAD` positions per worker following the
+        next one are sampled ahead, but `_next_stream` only moves past the
+        traces drawn, and the others are cancelled when the sampler is closed.
+        """
+        pending = deque()
+        position = self._next_stream
+        try:
+            while True:
+                while len(pending) < self.SAMPLE_AHEAD * self.num_workers:
+                    rng = self._trace_random(position)
+                    position += 1
+                    args = (rng, self._trace_len(rng), self.max_time)
+                    pending.append(executor.submit(_sample_walk, args))
+                walk = pending.popleft().result()
+                if walk is None:
+                    raise TraceSearchTimeOut(self.max_time)
+                self._next_stream += 1
+                yield self.trace_from_bits(*walk)
+        finally:
+            for future in pending:
+                future.cancel()
+
     def generate_single_trace_setup(self, num_seconds: float, plan_len = None):
-        @set_timer_throw_exc(
-            num_seconds=num_seconds, exception=TraceSearchTimeOut, max_time=num_seconds
-        )
-        def generate_single_trace(self=self, plan_len=plan_len):
+        def generate_single_trace(self=self, plan_len=plan_len, rng=random):
             """Generates a single trace using the uniform random sampling technique.
-            Loops until a valid trace is found. The timer wrapper does not allow the function
-            to run past the time specified.
+            Loops until a valid trace is found. Each attempt checks a `Deadline` of
+            the specified time, so the function does not run past it.
 
-            The outside function is a wrapper that provides parameters for both the timer
-            wrapper and the function.
+            The outside function is a wrapper that provides parameters for the
+            function.
 
             Returns:
                 A Trace object (the valid trace generated).
-            """
 
+            Raises:
+                TraceSearchTimeOut:
+                    No valid trace was found before the deadline.
+            """
+            deadline = Deadline(num_seconds)
             if not plan_len:
                 plan_len = self.plan_len
             if callable(plan_len):
                 plan_len = plan_len()
+            if self.operator_index is not None:
+                return self._random_walk(plan_len, rng, deadline)
 
             trace = Trace()
 
-            state = self.problem.init
             valid_trace = False
             while not valid_trace:
+                if deadline.expired():
+                    raise TraceSearchTimeOut(num_seconds)
                 trace.clear()
+                # every attempt starts from the initial state
+                state = self.problem.init
                 # add more steps while the trace has not yet reached the desired length
                 for j in range(plan_len):
                     # if we have not yet reached the last step
@@ -137,7 +345,7 @@ class VanillaSampling(Generator):
                         if not app_act:
                             break
                         # pick a random applicable action and apply it
-                        act = random.choice(app_act)
+                        act = rng.choice(app_act)
                         # create the trace and progress the state
                         macq_action = self.tarski_act_to_macq(act)
                         macq_state = self.tarski_state_to_macq(state)
@@ -149,6 +357,37 @@ class VanillaSampling(Generator):
                         step = Step(state=macq_state, action=None, index=j + 1)
                         trace.append(step)
                         valid_trace = True
-            return trace
+            return self._as_trace_type(trace)
 
         return generate_single_trace
+
+    def _random_walk(
+        self,
+        plan_len: int,
+        rng: random.Random = random,
+        deadline: Deadline = None,
+    ) -> Trace:
+        """Generates a single trace by uniformly sampling applicable actions, using
+        the `operator_index` to progress bitmask states (see `trace_from_bits`).
+
+        Args:
+            plan_len (int):
+                The length of the trace.
+            rng (random.Random):
+                Optional; The random number generator sampling the actions.
+                Defaults to the `random` module.
+            deadline (Deadline):
+                Optional; The deadline to find a valid trace before.
+
+        Returns:
+            The trace generated.
+
+        Raises:
+            TraceSearchTimeOut:
+                No valid trace was found before the deadline.
+        """
+        init = self.tarski_state_to_bits(self.problem.init)
+        walk = self.operator_index.random_walk(init, plan_len, rng, deadline)
+        if walk is None:
+            raise TraceSearchTimeOut(deadline.seconds)
+        return self.trace_from_bits(*walk)
@@ -8,6 +8,8 @@ class ActionObservation(Observation):
     For use in LOCM suite algorithms.
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         step: Step,
@@ -22,6 +22,8 @@ class AtomicPartialObservation(PartialObservation):
     stores everything in strings.
     """
 
+    __slots__ = ()
+
     def __init__(
         self, step: Step, percent_missing: float = 0, hide: Set[Fluent] = None
     ):
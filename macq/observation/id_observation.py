@@ -3,6 +3,8 @@ from ..trace import Step
 
 
 class IDObservation(Observation):
+    __slots__ = ("id",)
+
     def __init__(self, step: Step, **kwargs):
         super().__init__(index=step.index, **kwargs)
         self.id = hash(step.state)
@@ -11,6 +11,8 @@ class IdentityObservation(Observation):
     class.
     """
 
+    __slots__ = ()
+
     state: State
 
     class IdentityState(dict):
@@ -13,6 +13,8 @@ class NoisyObservation(Observation):
     This token can be used to create states that are noisy but fully observable.
     """
 
+    __slots__ = ()
+
     def __init__(self, step: Step, percent_noisy: float = 0, replace: bool = False):
         """
         Creates an NoisyObservation object, storing the state and action.
@@ -62,14 +64,14 @@ class NoisyObservation(Observation):
         for f in invisible_f:
             del visible_f[f]
         noisy_f = self.extract_fluent_subset(visible_f, percent_noisy)
+        # only write the noisy fluents, so the cloned state is copied only if
+        # there is noise to add
         if not replace:
             for f in state:
-                state[f] = not state[f] if f in noisy_f else state[f]
+                if f in noisy_f:
+                    state[f] = not state[f]
         else:
             for f in state:
-                state[f] = (
-                    state[random.choice(list(visible_f.keys()))]
-                    if f in noisy_f
-                    else state[f]
-                )
+                if f in noisy_f:
+                    state[f] = state[random.choice(list(visible_f.keys()))]
         return Step(state, step.action, step.index)
@@ -12,6 +12,8 @@ class NoisyPartialDisorderedParallelObservation(NoisyPartialObservation):
     which parallel action set the token is a part of. Inherits the NoisyPartialObservation token class.
     """
 
+    __slots__ = ("par_act_set_ID",)
+
     def __init__(
         self,
         step: Step,
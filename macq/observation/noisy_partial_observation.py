@@ -12,6 +12,8 @@ class NoisyPartialObservation(PartialObservation, NoisyObservation):
     both the PartialObservation token class and the NoisyObservation token class.
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         step: Step,
@@ -23,6 +23,8 @@ class Observation:
             The index of the associated step in the trace it is a part of.
     """
 
+    __slots__ = ("index", "state", "action")
+
     index: int
     state: Union[State, None]
     action: Union[Action, None]
@@ -90,4 +92,25 @@ class Observation:
         return all([self._matches(key, value) for key, value in query.items()])
 
     def serialize(self):
-        return dumps(self, default=lambda o: o.__dict__, indent=2)
+        return dumps(self, default=_serializable, indent=2)
+
+
+def _attributes(obj) -> dict:
+    """Retrieves the public attributes of an object, whether they are stored in
+    its `__dict__` or in `__slots__`."""
+    attributes = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name not in attributes and hasattr(obj, name):
+                attributes[name] = getattr(obj, name)
+    return {k: v for k, v in attributes.items() if not k.startswith("_")}
+
+
+def _serializable(obj):
+    """Converts an object to a json-serializable representation."""
+    if isinstance(obj, State):
+        # json keys must be strings
+        return {"fluents": {str(f): v for f, v in obj.items()}}
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return _attributes(obj)
@@ -1,5 +1,8 @@
 from __future__ import annotations
+import random
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from collections.abc import MutableSequence
 from warnings import warn
 from typing import Callable, Dict, List, Type, Set, TYPE_CHECKING
@@ -7,9 +10,12 @@ from inspect import cleandoc
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
+import numpy as np
 
 from . import Observation
 from ..trace import Action, Fluent
+from ..trace.vocabulary import install_shared
+from ..utils import SliceView, heatmap
 
 # Prevents circular importing
 if TYPE_CHECKING:
@@ -36,6 +42,25 @@ class TokenTypeMismatch(Exception):
         super().__init__(message)
 
 
+def trace_seed(seed: int, position: int) -> int:
+    """Derives the seed of the random stream used to tokenize the trace at the
+    given position, so each trace gets an independent stream whatever the
+    shard it is tokenized in."""
+    return int(np.random.SeedSequence([seed, position]).generate_state(1)[0])
+
+
+def _tokenize_shard(
+    traces: list, Token: Type[Observation], start: int, seed: int, kwargs: dict
+) -> List[List[Observation]]:
+    """Tokenizes a shard of consecutive traces, starting at position `start`."""
+    tokens = []
+    for position, trace in enumerate(traces, start):
+        if seed is not None:
+            random.seed(trace_seed(seed, position))
+        tokens.append(trace.tokenize(Token, **kwargs))
+    return tokens
+
+
 class ObservedTraceList(MutableSequence):
     """A sequence of observations.
 
@@ -128,10 +153,127 @@ class ObservedTraceList(MutableSequence):
                     fluents.update(list(obs.state.keys()))
         return fluents
 
-    def tokenize(self, trace_list: TraceList, **kwargs):
-        for trace in trace_list:
-            tokens = trace.tokenize(self.type, **kwargs)
-            self.append(tokens)
+    def tokenize(
+        self,
+        trace_list: TraceList,
+        workers: int = None,
+        seed: int = None,
+        **kwargs,
+    ):
+        """Tokenizes the traces of a trace list, appending their observation
+        traces to this list.
+
+        Args:
+            trace_list (TraceList):
+                The traces to tokenize.
+            workers (int):
+                Optional; The number of processes to shard the traces across.
+                The vocabulary of the trace list, if any, is shared with the
+                processes (see `Vocabulary.shared`). Defaults to None (tokenize
+                in this process).
+            seed (int):
+                Optional; The seed of the random tokens. Each trace is tokenized
+                with the global `random` module seeded from `seed` and its
+                position, so the result does not depend on `workers`. The state
+                of the global `random` module is restored afterwards. Defaults
+                to None (the global random stream is used as is).
+            **kwargs (keyword arguments):
+                Keyword arguments to pass into the Token function as parameters.
+        """
+        traces = list(trace_list)
+        if workers is None or workers <= 1 or len(traces) <= 1:
+            state = random.getstate()
+            try:
+                shards = [_tokenize_shard(traces, self.type, 0, seed, kwargs)]
+            finally:
+                if seed is not None:
+                    random.setstate(state)
+        else:
+            # a few shards per worker, to balance traces of different lengths
+            size = -(-len(traces) // (workers * 4))
+            starts = range(0, len(traces), size)
+            # the vocabulary is sent once per worker rather than with each shard
+            vocabulary = getattr(trace_list, "vocabulary", None)
+            shared = nullcontext() if vocabulary is None else vocabulary.shared()
+            with shared as handle, ProcessPoolExecutor(
+                workers, initializer=install_shared, initargs=(handle,)
+            ) as pool:
+                shards = pool.map(
+                    _tokenize_shard,
+                    [traces[i : i + size] for i in starts],
+                    [self.type] * len(starts),
+                    starts,
+                    [seed] * len(starts),
+                    [kwargs] * len(starts),
+                )
+                shards = list(shards)
+        for shard in shards:
+            for tokens in shard:
+                self.append(tokens)
+
+    def to_arrow(self):
+        """Converts the observation traces to an Apache Arrow table, with one row
+        per token and one boolean column per fluent; hidden fluents are null.
+        Requires pyarrow.
+
+        See `macq.trace.arrow.observations_to_arrow` for the layout of the table.
+
+        Returns:
+            A `pyarrow.Table`.
+        """
+        # Prevents circular importing
+        from ..trace.arrow import observations_to_arrow
+
+        return observations_to_arrow(self)
+
+    def to_parquet(self, path: str, **kwargs):
+        """Writes the observation traces to a Parquet file. Requires pyarrow.
+
+        Args:
+            path (str):
+                The path of the Parquet file.
+            **kwargs (keyword arguments):
+                Keyword arguments to pass to `pyarrow.parquet.write_table`.
+        """
+        from ..trace.arrow import to_parquet
+
+        to_parquet(self.to_arrow(), path, **kwargs)
+
+    @staticmethod
+    def from_arrow(table, Token: Type[Observation] = None):
+        """Loads observation traces from an Arrow table written by `to_arrow`.
+
+        Args:
+            table (pyarrow.Table):
+                The table to load.
+            Token (Type[Observation]):
+                Optional; The type of the tokens to rebuild. Defaults to the
+                token type stored in the table.
+
+        Returns:
+            An `ObservedTraceList`.
+        """
+        from ..trace.arrow import observations_from_arrow
+
+        return observations_from_arrow(table, Token)
+
+    @staticmethod
+    def from_parquet(path: str, Token: Type[Observation] = None):
+        """Loads observation traces from a Parquet file written by `to_parquet`.
+
+        Args:
+            path (str):
+                The path of the Parquet file.
+            Token (Type[Observation]):
+                Optional; The type of the tokens to rebuild. Defaults to the
+                token type stored in the file.
+
+        Returns:
+            An `ObservedTraceList`.
+        """
+        from ..trace.arrow import observations_from_arrow, read_parquet
+
+        return observations_from_arrow(read_parquet(path), Token)
 
     def fetch_observations(self, query: dict) -> List[Set[Observation]]:
         matches: List[Set[Observation]] = []
@@ -144,7 +286,24 @@ class ObservedTraceList(MutableSequence):
 
     def fetch_observation_windows(
         self, query: dict, left: int, right: int
-    ) -> List[List[Observation]]:
+    ) -> List[SliceView]:
+        """Retrieves the windows of observations around each observation
+        matching a query.
+
+        Windows are `SliceView`s over the observation traces, so no observation
+        list is copied.
+
+        Args:
+            query (dict):
+                The query to match observations against.
+            left (int):
+                The number of observations to include before each match.
+            right (int):
+                The number of observations to include after each match.
+
+        Returns:
+            A list of the windows of observations around each match.
+        """
         windows = []
         matches = self.fetch_observations(query)
         for i, obs_set in enumerate(matches):
@@ -152,14 +311,14 @@ class ObservedTraceList(MutableSequence):
                 # NOTE: obs.index starts at 1
                 start = obs.index - left - 1
                 end = obs.index + right
-                windows.append(self[i][start:end])
+                windows.append(SliceView(self[i], slice(start, end)))
         return windows
 
-    def get_transitions(self, action: str) -> List[List[Observation]]:
+    def get_transitions(self, action: str) -> List[SliceView]:
         query = {"action": action}
         return self.fetch_observation_windows(query, 0, 1)
 
-    def get_all_transitions(self) -> Dict[Action, List[List[Observation]]]:
+    def get_all_transitions(self) -> Dict[Action, List[SliceView]]:
         actions = self.get_actions()
         try:
             return {
@@ -168,7 +327,14 @@ class ObservedTraceList(MutableSequence):
         except AttributeError:
             return {action: self.get_transitions(str(action)) for action in actions}
 
-    def print(self, view="details", filter_func=lambda _: True, wrap=None):
+    def print(
+        self,
+        view="details",
+        filter_func=lambda _: True,
+        wrap=None,
+        start: int = 0,
+        stop: int = None,
+    ):
         """Pretty prints the trace list in the specified view.
 
         Arguments:
@@ -183,6 +349,12 @@ class ObservedTraceList(MutableSequence):
             wrap (bool):
                 Determines if the output is wrapped or cut off. Details defaults
                 to cut off (wrap=False), color defaults to wrap (wrap=True).
+            start (int):
+                Optional; The position of the first token of each trace to
+                print. Defaults to 0.
+            stop (int):
+                Optional; The position after the last token of each trace to
+                print. Defaults to the end of each trace.
         """
         console = Console()
 
@@ -195,13 +367,22 @@ class ObservedTraceList(MutableSequence):
         if view == "details":
             if wrap is None:
                 wrap = False
-            obs_tracelist = [self._details(obs_trace, wrap=wrap) for obs_trace in self]
+            obs_tracelist = [
+                self._details(SliceView(obs_trace, slice(start, stop)), wrap=wrap)
+                for obs_trace in self
+            ]
 
         elif view == "color":
             if wrap is None:
                 wrap = True
             obs_tracelist = [
-                self._colorgrid(obs_trace, filter_func=filter_func, wrap=wrap)
+                self._colorgrid(
+                    obs_trace,
+                    filter_func=filter_func,
+                    wrap=wrap,
+                    start=start,
+                    stop=stop,
+                )
                 for obs_trace in self
             ]
 
@@ -209,6 +390,46 @@ class ObservedTraceList(MutableSequence):
             console.print(obs_trace)
             print()
 
+    def export_heatmap(
+        self,
+        path: str,
+        trace: int = 0,
+        filter_func=lambda _: True,
+        start: int = 0,
+        stop: int = None,
+        scale: int = None,
+    ):
+        """Exports a heat map of the fluent values in a window of tokens of one
+        of the observation traces, without going through rich. Hidden fluents
+        are shown as unknown.
+
+        Args:
+            path (str):
+                The path of the heat map. Its extension selects the format:
+                ".txt" (plain text), ".html", or ".png".
+            trace (int):
+                Optional; The position of the observation trace to export.
+                Defaults to 0.
+            filter_func (Callable):
+                Optional; A function used to filter the fluents to export.
+            start (int):
+                Optional; The position of the first token to export. Defaults
+                to 0.
+            stop (int):
+                Optional; The position after the last token to export. Defaults
+                to the end of the trace.
+            scale (int):
+                Optional; The size, in pixels, of each value of a PNG heat map.
+                Defaults to the largest size (up to 8) that keeps the image
+                within 4096 pixels.
+        """
+        obs_trace = self[trace]
+        fluents = sorted(
+            f for f in ObservedTraceList.get_obs_fluents(obs_trace) if filter_func(f)
+        )
+        values = ObservedTraceList.get_obs_state_matrix(obs_trace, fluents, start, stop)
+        heatmap.export(path, [str(f) for f in fluents], values, scale)
+
     def _details(self, obs_trace: List[Observation], wrap: bool):
         indent = " " * 2
         # Summarize class attributes
@@ -246,47 +467,66 @@ class ObservedTraceList(MutableSequence):
         return details
 
     @staticmethod
-    def _colorgrid(obs_trace: List[Observation], filter_func: Callable, wrap: bool):
-        colorgrid = Table(
-            title="Trace", box=None, show_edge=False, pad_edge=False, expand=False
-        )
-        colorgrid.add_column("Fluent", justify="right")
-        colorgrid.add_column(
-            header=Text("Step", justify="center"), overflow="fold", no_wrap=(not wrap)
-        )
-        colorgrid.add_row(
-            "",
-            "".join(
-                [
-                    "|" if i < len(obs_trace) and (i + 1) % 5 == 0 else " "
-                    for i in range(len(obs_trace))
-                ]
-            ),
-        )
-
-        static = ObservedTraceList.get_obs_static_fluents(obs_trace)
-        fluents = list(
-            filter(
-                filter_func,
-                sorted(
-                    ObservedTraceList.get_obs_fluents(obs_trace),
-                    key=lambda f: float("inf") if f in static else len(str(f)),
-                ),
+    def _colorgrid(
+        obs_trace: List[Observation],
+        filter_func: Callable,
+        wrap: bool,
+        start: int = 0,
+        stop: int = None,
+    ):
+        fluents = [
+            f
+            for f in sorted(
+                ObservedTraceList.get_obs_fluents(obs_trace), key=lambda f: len(str(f))
             )
+            if filter_func(f)
+        ]
+        values = ObservedTraceList.get_obs_state_matrix(obs_trace, fluents, start, stop)
+        # varying fluents first, static fluents last
+        order = heatmap.order_rows(values)
+        return heatmap.colorgrid(
+            [str(fluents[i]) for i in order],
+            values[order],
+            wrap=wrap,
+            offset=range(len(obs_trace))[start:stop].start,
         )
 
-        for fluent in fluents:
-            step_str = ""
-            for obs in obs_trace:
-                if obs.state and obs.state[fluent]:
-                    step_str += "[green]"
-                else:
-                    step_str += "[red]"
-                step_str += "■"
-
-            colorgrid.add_row(str(fluent), step_str)
-
-        return colorgrid
+    @staticmethod
+    def get_obs_state_matrix(
+        obs_trace: List[Observation],
+        fluents: List[Fluent],
+        start: int = 0,
+        stop: int = None,
+    ) -> np.ndarray:
+        """Builds the state matrix of a window of tokens of an observation trace.
+
+        Args:
+            obs_trace (List[Observation]):
+                The observation trace.
+            fluents (List[Fluent]):
+                The fluents making up the rows of the matrix.
+            start (int):
+                Optional; The position of the first token of the window.
+                Defaults to 0.
+            stop (int):
+                Optional; The position after the last token of the window.
+                Defaults to the end of the trace.
+
+        Returns:
+            A (fluents x tokens) `int8` matrix of the value of each fluent in
+            each token: 1 (true), 0 (false), or -1 if the fluent is hidden or
+            not observed.
+        """
+        rows = {fluent: i for i, fluent in enumerate(fluents)}
+        columns = []
+        for obs in SliceView(obs_trace, slice(start, stop)):
+            column = [heatmap.UNKNOWN] * len(fluents)
+            for fluent, value in (obs.state.items() if obs.state else ()):
+                i = rows.get(fluent)
+                if i is not None:
+                    column[i] = heatmap.UNKNOWN if value is None else int(value)
+            columns.append(column)
+        return np.array(columns, dtype=np.int8).reshape(-1, len(fluents)).T
 
     @staticmethod
     def get_obs_fluents(obs_trace: List[Observation]):
@@ -1,10 +1,18 @@
 from .action import Action, PlanningObject
 from .fluent import Fluent
+from .vocabulary import Vocabulary
 from .state import State
 from .partial_state import PartialState
+from .bit_state import BitState
+from .sparse_state import SparseState
+from .frozen_state import FrozenState, StateTable
 from .step import Step
 from .trace import Trace, SAS
+from .columnar_trace import ColumnarTrace, RowState
+from .delta_trace import DeltaTrace
 from .trace_list import TraceList
+from .lazy_trace_list import LazyTraceList
+from .trace_store import TraceStore
 from .disordered_parallel_actions_observation_lists import (
     DisorderedParallelActionsObservationLists,
     ActionPair,
@@ -15,12 +23,22 @@ __all__ = [
     "Action",
     "PlanningObject",
     "Fluent",
+    "Vocabulary",
     "State",
     "PartialState",
+    "BitState",
+    "SparseState",
+    "FrozenState",
+    "StateTable",
     "Step",
     "Trace",
     "SAS",
+    "ColumnarTrace",
+    "RowState",
+    "DeltaTrace",
     "TraceList",
+    "LazyTraceList",
+    "TraceStore",
     "DisorderedParallelActionsObservationLists",
     "ActionPair",
 ]
@@ -24,6 +24,8 @@ class Action:
             The set of Fluents that make up the delete effects.
     """
 
+    __slots__ = ("name", "obj_params", "cost", "precond", "add", "delete", "_hash")
+
     def __init__(
         self,
         name: str,
@@ -56,22 +58,42 @@ class Action:
         self.precond = precond
         self.add = add
         self.delete = delete
+        # precomputed by `Vocabulary` when the action is interned
+        self._hash = None
 
     def __repr__(self):
         string = f"{self.name} {' '.join(map(str, self.obj_params))}"
         return string
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             isinstance(other, Action)
             and self.name == other.name
             and self.obj_params == other.obj_params
         )
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         # Order of obj_params is important!
         return hash(self.details())
 
+    def __reduce__(self):
+        # Prevents circular importing
+        from .vocabulary import _shared_entry, shared_reference
+
+        reference = shared_reference(self, "actions")
+        if reference is not None:
+            return _shared_entry, reference
+        return _unpickle_action, (
+            self.name,
+            self.obj_params,
+            self.cost,
+            self.precond,
+            self.add,
+            self.delete,
+        )
+
     def details(self):
         string = f"{self.name} {' '.join([o.details() for o in self.obj_params])}"
         return string
@@ -82,7 +104,9 @@ class Action:
                 self.name, list(map(lambda o: o.details(), self.obj_params)), self.cost
             )
 
-        return Action(self.name, self.obj_params.copy(), self.cost)
+        clone = Action(self.name, self.obj_params.copy(), self.cost)
+        clone._hash = self._hash
+        return clone
 
     def _serialize(self):
         return self.name
@@ -91,7 +115,20 @@ class Action:
 class AtomicAction(Action):
     """An Action where the objects are represented by strings."""
 
+    __slots__ = ()
+
     def __init__(self, name: str, obj_params: List[str], cost: int = 0):
         self.name = name
         self.obj_params = obj_params
         self.cost = cost
+        self._hash = None
+
+    def __reduce__(self):
+        return AtomicAction, (self.name, self.obj_params, self.cost)
+
+
+def _unpickle_action(name, obj_params, cost, precond, add, delete) -> Action:
+    action = Action(name, obj_params, cost, precond, add, delete)
+    # hashes of strings differ between processes, so they are not pickled
+    action._hash = hash(action.details())
+    return action
@@ -0,0 +1,435 @@
+from __future__ import annotations
+import json
+from typing import Dict, Iterable, List, Optional, Tuple, Type, Union
+import numpy as np
+from . import (
+    Action,
+    PlanningObject,
+    Fluent,
+    Vocabulary,
+    State,
+    PartialState,
+    Trace,
+    ColumnarTrace,
+    TraceList,
+)
+from .action import AtomicAction
+from .state import AtomicState
+from .. import observation as obs
+from ..utils import InvalidTraceTable
+
+# the key of the macq metadata in the schema of the tables
+METADATA_KEY = b"macq"
+
+STATE_TYPES = {cls.__name__: cls for cls in (State, PartialState, AtomicState)}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Arrow and Parquet support requires pyarrow. "
+            "Install it with `pip install macq[arrow]`."
+        ) from None
+    return pyarrow
+
+
+def _parquet():
+    _pyarrow()
+    import pyarrow.parquet
+
+    return pyarrow.parquet
+
+
+def _dump_fluent(fluent: Union[Fluent, str]) -> list:
+    if isinstance(fluent, Fluent):
+        return [fluent.name, [[o.obj_type, o.name] for o in fluent.objects]]
+    # atomic fluents are plain strings
+    return [str(fluent), None]
+
+
+def _load_fluent(vocabulary: Vocabulary, data: list) -> Union[Fluent, str]:
+    name, objects = data
+    if objects is None:
+        return name
+    return vocabulary.fluent(name, [vocabulary.object(*o) for o in objects])
+
+
+def _param(obj: Union[PlanningObject, str]) -> str:
+    return obj.details() if isinstance(obj, PlanningObject) else str(obj)
+
+
+def _build_table(
+    metadata: dict,
+    fluents: List[Union[Fluent, str]],
+    columns: Dict[str, object],
+    states: np.ndarray,
+    known: np.ndarray,
+):
+    """Builds a table from its step columns and its (rows x fluents) matrices of
+    fluent values and of whether each value is known."""
+    pa = _pyarrow()
+    arrays = dict(columns)
+    for j, fluent in enumerate(fluents):
+        mask = None if known[:, j].all() else ~known[:, j]
+        arrays[str(fluent)] = pa.array(states[:, j], type=pa.bool_(), mask=mask)
+    metadata["fluents"] = [_dump_fluent(f) for f in fluents]
+    return pa.table(arrays, metadata={METADATA_KEY: json.dumps(metadata)})
+
+
+def _action_arrays(actions: List[Optional[Action]]):
+    """Builds the action name, parameter, and cost arrays of a list of actions."""
+    pa = _pyarrow()
+    return {
+        "action": pa.array([a.name if a else None for a in actions], pa.string()),
+        "action_params": pa.array(
+            [[_param(o) for o in a.obj_params] if a else None for a in actions],
+            pa.list_(pa.string()),
+        ),
+        "action_cost": pa.array([a.cost if a else None for a in actions], pa.int64()),
+    }
+
+
+def _metadata(table, kind: str) -> dict:
+    schema_metadata = table.schema.metadata or {}
+    if METADATA_KEY not in schema_metadata:
+        raise InvalidTraceTable()
+    metadata = json.loads(schema_metadata[METADATA_KEY])
+    if metadata.get("kind") != kind:
+        raise InvalidTraceTable(
+            f"The table holds {metadata.get('kind')}, not {kind}."
+        )
+    return metadata
+
+
+def _fluent_matrices(table, fluents) -> Tuple[np.ndarray, np.ndarray]:
+    """Reads the fluent columns of a table into a (rows x fluents) matrix of
+    values and a matrix of whether each value is known (not null)."""
+    pc = _pyarrow().compute
+    states = np.zeros((table.num_rows, len(fluents)), dtype=bool)
+    known = np.ones((table.num_rows, len(fluents)), dtype=bool)
+    for j, fluent in enumerate(fluents):
+        column = table.column(str(fluent))
+        if column.null_count:
+            known[:, j] = pc.is_valid(column).to_numpy(zero_copy_only=False)
+            column = column.fill_null(False)
+        states[:, j] = column.to_numpy(zero_copy_only=False)
+    return states, known
+
+
+def _read_actions(
+    table, vocabulary: Vocabulary, atomic: bool
+) -> List[Optional[Action]]:
+    """Reads the action of each row of a table, creating each distinct action
+    once."""
+    actions = {}
+
+    def action(name, params, cost):
+        if name is None:
+            return None
+        key = (name, tuple(params))
+        if key not in actions:
+            if atomic:
+                actions[key] = AtomicAction(name, list(params), cost)
+            else:
+                objects = [vocabulary.object(*p.split(" ", 1)) for p in params]
+                actions[key] = vocabulary.action(name, objects, cost)
+        return actions[key]
+
+    return [
+        action(*row)
+        for row in zip(
+            table.column("action").to_pylist(),
+            table.column("action_params").to_pylist(),
+            table.column("action_cost").to_pylist(),
+        )
+    ]
+
+
+def trace_list_to_arrow(traces: Iterable[Trace], vocabulary: Vocabulary = None):
+    """Converts traces to an Arrow table, with one row per step.
+
+    The table has the columns:
+        - trace_id: the position of the step's trace,
+        - index: the index of the step,
+        - action, action_params, action_cost: the name, parameters (as
+          "type name" strings), and cost of the step's action (null if none),
+        - one boolean column per fluent, named after the fluent. A fluent is
+          null in the steps of a trace whose states do not range over it.
+
+    The fluents and the number of traces are stored in the schema metadata.
+
+    Args:
+        traces (Iterable[Trace]):
+            The traces to convert. All the states of a trace must range over the
+            same fluents.
+        vocabulary (Vocabulary):
+            Optional; The vocabulary to index the fluents and actions of the
+            traces with. Defaults to the vocabulary of `traces` if it is a
+            `TraceList` with one, or a new vocabulary.
+
+    Returns:
+        A `pyarrow.Table`.
+
+    Raises:
+        InconsistentStateFluents:
+            The states of a trace do not range over the same fluents.
+    """
+    pa = _pyarrow()
+    if vocabulary is None:
+        vocabulary = getattr(traces, "vocabulary", None)
+    if vocabulary is None:
+        vocabulary = Vocabulary()
+    columnar = [ColumnarTrace.from_trace(trace, vocabulary) for trace in traces]
+    lengths = np.array([len(trace) for trace in columnar], dtype=np.int64)
+    fluent_ids = np.unique(
+        np.concatenate(
+            [trace.steps.fluent_ids for trace in columnar] + [np.zeros(0, np.int64)]
+        )
+    )
+    num_rows = int(lengths.sum())
+    states = np.zeros((num_rows, len(fluent_ids)), dtype=bool)
+    known = np.zeros((num_rows, len(fluent_ids)), dtype=bool)
+    action_ids = np.empty(num_rows, dtype=np.int64)
+    indices = np.empty(num_rows, dtype=np.int64)
+    start = 0
+    for trace, length in zip(columnar, lengths):
+        rows = slice(start, start + length)
+        cols = np.searchsorted(fluent_ids, trace.steps.fluent_ids)
+        states[rows, cols] = trace.steps.states
+        known[rows, cols] = True
+        action_ids[rows] = trace.steps.action_ids
+        indices[rows] = trace.steps.indices
+        start += length
+
+    # look the actions up by vocabulary ID; -1 (no action) becomes null
+    lookup = _action_arrays(vocabulary.actions)
+    ids = pa.array(action_ids, mask=action_ids < 0)
+    columns = {
+        "trace_id": np.repeat(np.arange(len(columnar), dtype=np.int64), lengths),
+        "index": indices,
+    }
+    columns.update({name: array.take(ids) for name, array in lookup.items()})
+    return _build_table(
+        {"kind": "traces", "num_traces": len(columnar)},
+        [vocabulary.fluents[i] for i in fluent_ids],
+        columns,
+        states,
+        known,
+    )
+
+
+def trace_list_from_arrow(table) -> TraceList:
+    """Loads traces from an Arrow table written by `trace_list_to_arrow`.
+
+    The traces are rebuilt in bulk as `ColumnarTrace`s sharing a new vocabulary.
+    The preconditions and effects of the actions are not stored in the table.
+
+    Args:
+        table (pyarrow.Table):
+            The table to load.
+
+    Returns:
+        A `TraceList` of `ColumnarTrace`s.
+
+    Raises:
+        InvalidTraceTable:
+            The table does not hold macq traces, or the states of a trace do not
+            range over the same fluents.
+    """
+    metadata = _metadata(table, "traces")
+    vocabulary = Vocabulary()
+    fluents = [_load_fluent(vocabulary, f) for f in metadata["fluents"]]
+    fluent_ids = np.array([vocabulary.fluent_id(f) for f in fluents], dtype=np.int64)
+    states, known = _fluent_matrices(table, fluents)
+    action_ids = np.array(
+        [
+            -1 if a is None else vocabulary.action_id(a)
+            for a in _read_actions(table, vocabulary, atomic=False)
+        ],
+        dtype=np.int64,
+    )
+    trace_ids = table.column("trace_id").to_numpy()
+    indices = table.column("index").to_numpy()
+    num_traces = metadata["num_traces"]
+    bounds = np.searchsorted(trace_ids, np.arange(num_traces + 1))
+
+    traces = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        trace_known = known[start:end]
+        cols = trace_known.all(axis=0)
+        if trace_known[:, ~cols].any():
+            raise InvalidTraceTable(
+                f"The states of trace {len(traces)} do not range over the same fluents."
+            )
+        trace_states = states[start:end]
+        if not cols.all():
+            trace_states = trace_states[:, cols]
+        traces.append(
+            ColumnarTrace.from_arrays(
+                vocabulary,
+                fluent_ids[cols],
+                trace_states,
+                action_ids[start:end],
+                np.array(indices[start:end]),
+            )
+        )
+    return TraceList(traces, vocabulary=vocabulary)
+
+
+def observations_to_arrow(observations: obs.ObservedTraceList):
+    """Converts observation traces to an Arrow table, with one row per token.
+
+    The table has the same columns as the tables of `trace_list_to_arrow`, plus a
+    boolean `has_state` column, false for the tokens without a state. Fluents
+    that are hidden (None) or missing from a token's state are null. The
+    observation token type and the type of the states are stored in the schema
+    metadata.
+
+    Args:
+        observations (ObservedTraceList):
+            The observation traces to convert.
+
+    Returns:
+        A `pyarrow.Table`.
+    """
+    pa = _pyarrow()
+    tokens = [token for obs_trace in observations for token in obs_trace]
+    fluents = list(
+        dict.fromkeys(f for token in tokens if token.state for f in token.state.keys())
+    )
+    columns = {f: j for j, f in enumerate(fluents)}
+    states = np.zeros((len(tokens), len(fluents)), dtype=bool)
+    known = np.zeros((len(tokens), len(fluents)), dtype=bool)
+    state_type, partial = None, False
+    for i, token in enumerate(tokens):
+        if token.state is None:
+            continue
+        state_type = state_type or type(token.state).__name__
+        for fluent, value in token.state.items():
+            if value is None:
+                partial = True
+            else:
+                states[i, columns[fluent]] = value
+                known[i, columns[fluent]] = True
+
+    actions = [token.action for token in tokens]
+    step_columns = {
+        "trace_id": np.repeat(
+            np.arange(len(observations), dtype=np.int64),
+            [len(obs_trace) for obs_trace in observations],
+        ),
+        "index": pa.array([token.index for token in tokens], pa.int64()),
+        **_action_arrays(actions),
+        "has_state": pa.array([token.state is not None for token in tokens]),
+    }
+    token_type = getattr(observations, "type", None)
+    return _build_table(
+        {
+            "kind": "observations",
+            "num_traces": len(observations),
+            "token": token_type.__name__ if token_type else None,
+            "state_type": state_type if state_type in STATE_TYPES else "State",
+            "partial": partial or state_type == "PartialState",
+            "atomic_actions": any(isinstance(a, AtomicAction) for a in actions),
+        },
+        fluents,
+        step_columns,
+        states,
+        known,
+    )
+
+
+def observations_from_arrow(
+    table, Token: Type[obs.Observation] = None
+) -> obs.ObservedTraceList:
+    """Loads observation traces from an Arrow table written by
+    `observations_to_arrow`.
+
+    Tokens are rebuilt with their index, state, and action only; attributes
+    specific to a token type (e.g. the ID of an `IDObservation`) are not
+    stored in the table. The states of partial observations hold None for
+    their hidden fluents.
+
+    Args:
+        table (pyarrow.Table):
+            The table to load.
+        Token (Type[Observation]):
+            Optional; The type of the tokens to rebuild. Defaults to the token
+            type stored in the table.
+
+    Returns:
+        An `ObservedTraceList`.
+
+    Raises:
+        InvalidTraceTable:
+            The table does not hold macq observations.
+    """
+    metadata = _metadata(table, "observations")
+    if Token is None:
+        Token = getattr(obs, metadata["token"] or "", None)
+        if Token is None:
+            raise InvalidTraceTable(
+                f"Unknown token type {metadata['token']}; pass the Token to load."
+            )
+    vocabulary = Vocabulary()
+    fluents = [_load_fluent(vocabulary, f) for f in metadata["fluents"]]
+    states, known = _fluent_matrices(table, fluents)
+    actions = _read_actions(table, vocabulary, metadata["atomic_actions"])
+    has_state = table.column("has_state").to_numpy(zero_copy_only=False)
+    indices = table.column("index").to_pylist()
+    trace_ids = table.column("trace_id").to_numpy()
+    bounds = np.searchsorted(trace_ids, np.arange(metadata["num_traces"] + 1))
+    state_type = STATE_TYPES[metadata["state_type"]]
+    fluent_array = np.empty(len(fluents), dtype=object)
+    fluent_array[:] = fluents
+
+    def state(i: int):
+        if not has_state[i]:
+            return None
+        row_known = known[i]
+        if metadata["partial"]:
+            # partial states keep their hidden fluents, with a value of None
+            values = states[i].tolist()
+            values = [v if k else None for v, k in zip(values, row_known.tolist())]
+            return state_type(dict(zip(fluents, values)))
+        if row_known.all():
+            return state_type(dict(zip(fluents, states[i].tolist())))
+        cols = np.flatnonzero(row_known)
+        return state_type(dict(zip(fluent_array[cols], states[i, cols].tolist())))
+
+    def token(i: int):
+        token = Token.__new__(Token)
+        token.index = indices[i]
+        token.state = state(i)
+        token.action = actions[i]
+        return token
+
+    observed = obs.ObservedTraceList()
+    observed.type = Token
+    observed.observations = [
+        [token(i) for i in range(start, end)]
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    return observed
+
+
+def to_parquet(table, path: str, **kwargs):
+    """Writes an Arrow table to a Parquet file, keeping its macq metadata.
+
+    Args:
+        table (pyarrow.Table):
+            The table to write.
+        path (str):
+            The path of the Parquet file.
+        **kwargs (keyword arguments):
+            Keyword arguments to pass to `pyarrow.parquet.write_table` (e.g.
+            `compression`).
+    """
+    _parquet().write_table(table, path, **kwargs)
+
+
+def read_parquet(path: str):
+    """Reads a Parquet file written by `to_parquet` into an Arrow table."""
+    return _parquet().read_table(path)
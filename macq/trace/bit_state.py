@@ -0,0 +1,189 @@
+from __future__ import annotations
+from typing import Dict, Iterator
+from . import Fluent, State, Vocabulary
+from .state import AtomicState
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Iterates over the positions of the set bits of an integer bitmask, in
+    increasing order."""
+    return (i for i, bit in enumerate(bin(mask)[:1:-1]) if bit == "1")
+
+
+def same_ids(vocabulary: Vocabulary, other: Vocabulary, mask: int) -> bool:
+    """Checks whether two vocabularies assign the IDs of a bitmask to the same
+    fluents."""
+    if vocabulary is other:
+        return True
+    fluents, other_fluents = vocabulary.fluents, other.fluents
+    return all(fluents[i] == other_fluents[i] for i in iter_bits(mask))
+
+
+class BitState(State):
+    """A State stored as a bitset over the fluent IDs of a shared `Vocabulary`.
+
+    Supports the same mapping API as `State`, but stores a single bit per fluent
+    value instead of a dict entry. Cloning, equality, and hashing are word
+    operations on the underlying bitmasks, and the hash is cached until the
+    state is modified. Values must be booleans; use a `PartialState` to
+    represent unknown fluents.
+
+    Bitset states are compared by their bitmasks, and are only equal to bitset
+    states whose vocabulary assigns the same IDs to their fluents (e.g. pickled
+    copies). They are compared item-wise to other (dict-backed) states, but do
+    not hash like them, so the two should not be mixed as set members or dict
+    keys.
+
+    Attributes:
+        vocabulary (Vocabulary):
+            The vocabulary whose fluent IDs index the bits of this state.
+        mask (int):
+            The bitmask of fluent IDs that are part of this state.
+        bits (int):
+            The bitmask of fluent IDs that are true in this state.
+    """
+
+    __slots__ = ("vocabulary", "mask", "bits", "_hash")
+
+    def __init__(
+        self,
+        vocabulary: Vocabulary,
+        fluents: Dict[Fluent, bool] = None,
+        mask: int = 0,
+        bits: int = 0,
+    ):
+        """Initializes a BitState from either a fluent-value mapping or a pair of
+        bitmasks.
+
+        Args:
+            vocabulary (Vocabulary):
+                The vocabulary whose fluent IDs index the bits of this state.
+            fluents (dict):
+                Optional; A mapping of `Fluent` objects to their value in this
+                state. Fluents missing from the vocabulary are interned.
+            mask (int):
+                Optional; The bitmask of fluent IDs that are part of this state.
+            bits (int):
+                Optional; The bitmask of fluent IDs that are true in this state.
+                Must be a subset of `mask`.
+        """
+        self.vocabulary = vocabulary
+        self.mask = mask
+        self.bits = bits
+        self._hash = None
+        if fluents:
+            self.update(fluents)
+
+    @property
+    def fluents(self) -> Dict[Fluent, bool]:
+        """The fluent-value mapping of this state, as a new `dict`."""
+        return dict(self.items())
+
+    def _id(self, key: Fluent) -> int:
+        try:
+            return self.vocabulary.fluent_id(key)
+        except KeyError:
+            return self.vocabulary.fluent_id(self.vocabulary.intern_fluent(key))
+
+    def bitmasks(self):
+        """Returns the (mask, bits) pair of this state."""
+        return self.mask, self.bits
+
+    def __eq__(self, other):
+        # other bitset states (e.g. a `RowState`) provide their bitmasks
+        bitmasks = getattr(other, "bitmasks", None)
+        if bitmasks is not None:
+            return bitmasks() == (self.mask, self.bits) and same_ids(
+                self.vocabulary, other.vocabulary, self.mask
+            )
+        return isinstance(other, State) and self.fluents == other.fluents
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.mask, self.bits))
+        return self._hash
+
+    def __reduce__(self):
+        return type(self), (self.vocabulary, None, self.mask, self.bits)
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def __setitem__(self, key: Fluent, value: bool):
+        if value is None:
+            raise ValueError(
+                f"Cannot hide {key} in a BitState. Use a PartialState instead."
+            )
+        bit = 1 << self._id(key)
+        self._hash = None
+        self.mask |= bit
+        if value:
+            self.bits |= bit
+        else:
+            self.bits &= ~bit
+
+    def __getitem__(self, key: Fluent):
+        try:
+            bit = 1 << self.vocabulary.fluent_id(key)
+        except KeyError:
+            raise KeyError(key) from None
+        if not self.mask & bit:
+            raise KeyError(key)
+        return bool(self.bits & bit)
+
+    def __delitem__(self, key: Fluent):
+        if not self.has_key(key):
+            raise KeyError(key)
+        bit = 1 << self.vocabulary.fluent_id(key)
+        self._hash = None
+        self.mask &= ~bit
+        self.bits &= ~bit
+
+    def __iter__(self):
+        fluents = self.vocabulary.fluents
+        return (fluents[i] for i in iter_bits(self.mask))
+
+    def __contains__(self, key):
+        return self[key]
+
+    def clear(self):
+        self._hash = None
+        self.mask = 0
+        self.bits = 0
+
+    def copy(self):
+        return self.fluents
+
+    def has_key(self, k):
+        try:
+            return bool(self.mask & (1 << self.vocabulary.fluent_id(k)))
+        except KeyError:
+            return False
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def keys(self):
+        return list(self)
+
+    def _values(self):
+        bits = bin(self.bits)[:1:-1]
+        return ((i, i < len(bits) and bits[i] == "1") for i in iter_bits(self.mask))
+
+    def values(self):
+        return [value for _, value in self._values()]
+
+    def items(self):
+        fluents = self.vocabulary.fluents
+        return [(fluents[i], value) for i, value in self._values()]
+
+    def true_fluents(self):
+        """Returns the list of fluents that are true in this state."""
+        fluents = self.vocabulary.fluents
+        return [fluents[i] for i in iter_bits(self.bits)]
+
+    def clone(self, atomic=False):
+        if atomic:
+            return AtomicState({str(fluent): value for fluent, value in self.items()})
+        return BitState(self.vocabulary, mask=self.mask, bits=self.bits)
@@ -0,0 +1,589 @@
+from __future__ import annotations
+from collections import Counter
+from collections.abc import MutableSequence
+from typing import Dict, Iterable, Optional, Sequence
+import numpy as np
+from . import Action, Fluent, State, BitState, Step, Trace, Vocabulary
+from .bit_state import same_ids
+from .state import AtomicState
+from ..utils import InconsistentStateFluents
+from ..utils.heatmap import UNKNOWN
+from .fingerprint import action_digest, combine, fluent_digest
+
+
+def pack_bits(ids: np.ndarray) -> int:
+    """Packs an array of fluent IDs into an integer bitmask."""
+    if len(ids) == 0:
+        return 0
+    full = np.zeros(int(ids.max()) + 1, dtype=bool)
+    full[ids] = True
+    return int.from_bytes(np.packbits(full, bitorder="little").tobytes(), "little")
+
+
+class RowState(State):
+    """A lightweight view over one row of the state matrix of a `ColumnarTrace`.
+
+    Supports the read API of `State`. Values written to fluents of the trace
+    are written through to the underlying matrix; fluents cannot be added or
+    removed. Cloning (or pickling) a RowState returns an independent `BitState`.
+
+    Attributes:
+        steps (ColumnarSteps):
+            The columnar storage this state is a view over.
+        row (int):
+            The row of the state matrix this state is a view over.
+    """
+
+    __slots__ = ("steps", "row")
+
+    def __init__(self, steps: ColumnarSteps, row: int):
+        self.steps = steps
+        self.row = row
+
+    @property
+    def fluents(self) -> Dict[Fluent, bool]:
+        """The fluent-value mapping of this state, as a new `dict`."""
+        return dict(self.items())
+
+    @property
+    def values_row(self) -> np.ndarray:
+        """The row of the state matrix this state is a view over."""
+        return self.steps.states[self.row]
+
+    @property
+    def vocabulary(self) -> Vocabulary:
+        """The vocabulary indexing the fluents of the trace."""
+        return self.steps.vocabulary
+
+    def bitmasks(self):
+        """Returns the (mask, bits) pair of the equivalent `BitState`."""
+        steps = self.steps
+        return steps.mask, pack_bits(steps.fluent_ids[self.values_row])
+
+    def __eq__(self, other):
+        if isinstance(other, RowState) and other.steps.same_columns(self.steps):
+            return np.array_equal(self.values_row, other.values_row)
+        bitmasks = getattr(other, "bitmasks", None)
+        if bitmasks is not None:
+            mask, bits = self.bitmasks()
+            return bitmasks() == (mask, bits) and same_ids(
+                self.vocabulary, other.vocabulary, mask
+            )
+        return isinstance(other, State) and self.fluents == other.fluents
+
+    def __hash__(self):
+        # the same hash as an equal `BitState`
+        return hash(self.bitmasks())
+
+    def __len__(self):
+        return len(self.steps.columns)
+
+    def __setitem__(self, key: Fluent, value: bool):
+        if value is None:
+            raise ValueError(
+                f"Cannot hide {key} in a RowState. Use a PartialState instead."
+            )
+        self.steps.states[self.row, self.steps.column(key)] = value
+
+    def __getitem__(self, key: Fluent):
+        return bool(self.values_row[self.steps.column(key)])
+
+    def __delitem__(self, key: Fluent):
+        raise TypeError("Fluents cannot be removed from a RowState.")
+
+    def __iter__(self):
+        return iter(self.steps.columns)
+
+    def __contains__(self, key):
+        return self[key]
+
+    def clear(self):
+        raise TypeError("Fluents cannot be removed from a RowState.")
+
+    def copy(self):
+        return self.fluents
+
+    def has_key(self, k):
+        return k in self.steps.column_index
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def keys(self):
+        return list(self.steps.columns)
+
+    def values(self):
+        return self.values_row.tolist()
+
+    def items(self):
+        return list(zip(self.steps.columns, self.values_row.tolist()))
+
+    def clone(self, atomic=False):
+        if atomic:
+            return AtomicState({str(fluent): value for fluent, value in self.items()})
+        mask, bits = self.bitmasks()
+        return BitState(self.steps.vocabulary, mask=mask, bits=bits)
+
+    def __reduce__(self):
+        return self.clone().__reduce__()
+
+
+class ColumnarSteps(MutableSequence):
+    """The steps of a `ColumnarTrace`, stored column-wise.
+
+    A `list`-like object of `Step`s. Rather than storing `Step` objects, the
+    states are stored as a (steps x fluents) boolean matrix, and the actions as
+    a vector of action IDs of a shared `Vocabulary`. Retrieved steps are
+    lightweight views over this storage.
+
+    Attributes:
+        vocabulary (Vocabulary):
+            The vocabulary indexing the fluents and actions of the steps.
+        fluent_ids (np.ndarray):
+            The vocabulary IDs of the fluents making up the columns of the state
+            matrix.
+        states (np.ndarray):
+            The (steps x fluents) boolean state matrix.
+        action_ids (np.ndarray):
+            The vocabulary IDs of the action of each step. -1 if the step has no
+            action.
+        indices (np.ndarray):
+            The index of each step.
+    """
+
+    def __init__(
+        self, vocabulary: Vocabulary, fluent_ids: Optional[Sequence[int]] = None
+    ):
+        """Initializes an empty ColumnarSteps.
+
+        Args:
+            vocabulary (Vocabulary):
+                The vocabulary indexing the fluents and actions of the steps.
+            fluent_ids (Sequence[int]):
+                Optional; The vocabulary IDs of the fluents of the states. Defaults
+                to the fluents of the first state added.
+        """
+        self.vocabulary = vocabulary
+        self._len = 0
+        self._set_columns(fluent_ids if fluent_ids is not None else [])
+        self._states = np.zeros((0, len(self.fluent_ids)), dtype=bool)
+        self._action_ids = np.zeros(0, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        vocabulary: Vocabulary,
+        fluent_ids: Sequence[int],
+        states: np.ndarray,
+        action_ids: np.ndarray,
+        indices: np.ndarray = None,
+    ):
+        """Creates a ColumnarSteps directly from its arrays (without copying)."""
+        steps = cls(vocabulary, fluent_ids)
+        steps._states = np.asarray(states, dtype=bool)
+        steps._action_ids = np.asarray(action_ids, dtype=np.int64)
+        steps._len = len(steps._action_ids)
+        steps._indices = (
+            np.arange(1, steps._len + 1, dtype=np.int64)
+            if indices is None
+            else np.asarray(indices, dtype=np.int64)
+        )
+        return steps
+
+    def _set_columns(self, fluent_ids: Sequence[int]):
+        self.fluent_ids = np.asarray(fluent_ids, dtype=np.int64)
+        self.columns = [self.vocabulary.fluents[i] for i in self.fluent_ids]
+        self.column_index = {f: j for j, f in enumerate(self.columns)}
+        self.mask = pack_bits(self.fluent_ids)
+
+    @property
+    def states(self) -> np.ndarray:
+        return self._states[: self._len]
+
+    @property
+    def action_ids(self) -> np.ndarray:
+        return self._action_ids[: self._len]
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices[: self._len]
+
+    def same_columns(self, other: ColumnarSteps):
+        return self.vocabulary is other.vocabulary and np.array_equal(
+            self.fluent_ids, other.fluent_ids
+        )
+
+    def column(self, fluent: Fluent) -> int:
+        """Retrieves the column of the state matrix holding the given fluent."""
+        return self.column_index[fluent]
+
+    def action(self, row: int) -> Optional[Action]:
+        action_id = self._action_ids[row]
+        return None if action_id < 0 else self.vocabulary.actions[action_id]
+
+    def _step(self, row: int) -> Step:
+        return Step(RowState(self, row), self.action(row), int(self._indices[row]))
+
+    def _encode(self, step: Step):
+        """Converts a step to its (state row, action ID, index) representation."""
+        state = step.state
+        if self._len == 0 and not len(self.fluent_ids):
+            self._set_columns(
+                [self.vocabulary.fluent_id(self.vocabulary.intern_fluent(f)) for f in state]
+            )
+            self._states = np.zeros((0, len(self.fluent_ids)), dtype=bool)
+
+        if isinstance(state, RowState) and state.steps.same_columns(self):
+            row = state.values_row.copy()
+        else:
+            if len(state) != len(self.columns):
+                raise InconsistentStateFluents(state)
+            row = np.zeros(len(self.columns), dtype=bool)
+            try:
+                for fluent, value in state.items():
+                    if value is None:
+                        # unknown values cannot be stored in the bool matrix
+                        raise InconsistentStateFluents(
+                            state, f"The value of {fluent} is unknown in {state}."
+                        )
+                    row[self.column_index[fluent]] = value
+            except KeyError:
+                raise InconsistentStateFluents(state) from None
+
+        action_id = (
+            -1
+            if step.action is None
+            else self.vocabulary.action_id(self.vocabulary.intern_action(step.action))
+        )
+        return row, action_id, step.index
+
+    def _reserve(self, size: int):
+        capacity = len(self._action_ids)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 8)
+        states = np.zeros((capacity, len(self.fluent_ids)), dtype=bool)
+        states[: self._len] = self.states
+        action_ids = np.zeros(capacity, dtype=np.int64)
+        action_ids[: self._len] = self.action_ids
+        indices = np.zeros(capacity, dtype=np.int64)
+        indices[: self._len] = self.indices
+        self._states, self._action_ids, self._indices = states, action_ids, indices
+
+    def _row(self, key: int) -> int:
+        if key < 0:
+            key += self._len
+        if not 0 <= key < self._len:
+            raise IndexError("step index out of range")
+        return key
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._step(i) for i in range(*key.indices(self._len))]
+        return self._step(self._row(key))
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            self._set_slice(key, [self._encode(step) for step in value])
+            return
+        row = self._row(key)
+        self._states[row], self._action_ids[row], self._indices[row] = self._encode(
+            value
+        )
+
+    def _set_slice(self, key: slice, encoded: list):
+        """Replaces a slice of the steps with encoded steps, like `list`."""
+        rows = range(*key.indices(self._len))
+        if key.step not in (None, 1):
+            if len(encoded) != len(rows):
+                raise ValueError(
+                    f"attempt to assign sequence of size {len(encoded)} to "
+                    f"extended slice of size {len(rows)}"
+                )
+            for row, (state, action_id, index) in zip(rows, encoded):
+                self._states[row] = state
+                self._action_ids[row] = action_id
+                self._indices[row] = index
+            return
+        start, stop = rows.start, max(rows.start, rows.stop)
+        states = np.zeros((len(encoded), len(self.fluent_ids)), dtype=bool)
+        for i, (state, _, _) in enumerate(encoded):
+            states[i] = state
+        action_ids = np.array([e[1] for e in encoded], dtype=np.int64)
+        indices = np.array([e[2] for e in encoded], dtype=np.int64)
+        self._states = np.concatenate(
+            [self.states[:start], states, self.states[stop:]]
+        )
+        self._action_ids = np.concatenate(
+            [self.action_ids[:start], action_ids, self.action_ids[stop:]]
+        )
+        self._indices = np.concatenate(
+            [self.indices[:start], indices, self.indices[stop:]]
+        )
+        self._len = len(self._action_ids)
+
+    def __delitem__(self, key):
+        rows = (
+            list(range(*key.indices(self._len)))
+            if isinstance(key, slice)
+            else self._row(key)
+        )
+        self._states = np.delete(self.states, rows, axis=0)
+        self._action_ids = np.delete(self.action_ids, rows)
+        self._indices = np.delete(self.indices, rows)
+        self._len = len(self._action_ids)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return (self._step(i) for i in range(self._len))
+
+    def _matches(self, row: int, step: Step):
+        return (
+            step.index == self._indices[row]
+            and step.action == self.action(row)
+            and RowState(self, row) == step.state
+        )
+
+    def __contains__(self, step: Step):
+        return any(self._matches(i, step) for i in range(self._len))
+
+    def __eq__(self, other):
+        if isinstance(other, ColumnarSteps):
+            return (
+                self.same_columns(other)
+                and np.array_equal(self.states, other.states)
+                and np.array_equal(self.action_ids, other.action_ids)
+                and np.array_equal(self.indices, other.indices)
+            )
+        return NotImplemented
+
+    def index(self, value: Step, start: int = 0, stop: int = None):
+        for i in range(*slice(start, stop).indices(self._len)):
+            if self._matches(i, value):
+                return i
+        raise ValueError(f"{value} is not in the trace")
+
+    def count(self, value: Step):
+        return sum(1 for i in range(self._len) if self._matches(i, value))
+
+    def insert(self, index: int, value: Step):
+        row, action_id, step_index = self._encode(value)
+        index = max(0, min(index + self._len if index < 0 else index, self._len))
+        self._states = np.insert(self.states, index, row, axis=0)
+        self._action_ids = np.insert(self.action_ids, index, action_id)
+        self._indices = np.insert(self.indices, index, step_index)
+        self._len += 1
+
+    def append(self, value: Step):
+        row, action_id, step_index = self._encode(value)
+        self._reserve(self._len + 1)
+        self._states[self._len] = row
+        self._action_ids[self._len] = action_id
+        self._indices[self._len] = step_index
+        self._len += 1
+
+    def clear(self):
+        self._len = 0
+
+    def copy(self):
+        return list(self)
+
+    def pop(self, index: int = -1):
+        row = self._row(index)
+        step = self._step(row)
+        # detach the popped step from the storage it was a view over
+        result = Step(step.state.clone(), step.action, step.index)
+        del self[row]
+        return result
+
+    def reverse(self):
+        self._states = self.states[::-1].copy()
+        self._action_ids = self.action_ids[::-1].copy()
+        self._indices = self.indices[::-1].copy()
+
+    def sort(self, reverse: bool = False, key=None):
+        order = sorted(range(self._len), key=lambda i: key(self._step(i)), reverse=reverse)
+        self._states = self.states[order]
+        self._action_ids = self.action_ids[order]
+        self._indices = self.indices[order]
+
+
+def _unpickle_columnar(
+    vocabulary: Vocabulary,
+    fluent_ids: np.ndarray,
+    packed: np.ndarray,
+    action_ids: np.ndarray,
+    indices: Optional[np.ndarray],
+) -> ColumnarTrace:
+    """Rebuilds a columnar trace from its pickled (bit-packed) arrays."""
+    states = np.unpackbits(packed, axis=1, count=len(fluent_ids)).astype(bool)
+    return ColumnarTrace.from_arrays(
+        vocabulary, fluent_ids, states, action_ids, indices
+    )
+
+
+class ColumnarTrace(Trace):
+    """A state trace stored column-wise.
+
+    A `Trace` whose steps are stored in a `ColumnarSteps`: a (steps x fluents)
+    boolean state matrix and a vector of action IDs, both indexing a shared
+    `Vocabulary`. Steps and states retrieved from the trace are lightweight
+    views, and whole-trace queries are computed as vectorized reductions over
+    the matrix. All the states of a columnar trace must range over the same
+    fluents.
+
+    Attributes:
+        steps (ColumnarSteps):
+            The column-wise storage of the steps.
+        vocabulary (Vocabulary):
+            The vocabulary indexing the fluents and actions of the trace.
+        fluents (set):
+            The set of fluents in the trace.
+        actions (set):
+            The set of actions in the trace.
+    """
+
+    steps: ColumnarSteps
+
+    def __init__(self, steps: Iterable[Step] = None, vocabulary: Vocabulary = None):
+        """Initializes a ColumnarTrace with an optional list of steps.
+
+        Args:
+            steps (list):
+                Optional; The steps of the trace, converted to columnar storage.
+            vocabulary (Vocabulary):
+                Optional; The vocabulary to index the fluents and actions of the
+                trace with. A new vocabulary is created if not provided.
+        """
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.steps = ColumnarSteps(self.vocabulary)
+        for step in steps if steps is not None else []:
+            self.steps.append(step)
+        self._reinit_index()
+
+    @classmethod
+    def from_trace(cls, trace: Trace, vocabulary: Vocabulary = None):
+        """Converts a trace to a columnar trace."""
+        if isinstance(trace, ColumnarTrace) and (
+            vocabulary is None or vocabulary is trace.vocabulary
+        ):
+            return trace
+        return cls(trace, vocabulary)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        vocabulary: Vocabulary,
+        fluent_ids: Sequence[int],
+        states: np.ndarray,
+        action_ids: np.ndarray,
+        indices: np.ndarray = None,
+    ):
+        """Creates a columnar trace directly from its arrays (without copying).
+
+        Args:
+            vocabulary (Vocabulary):
+                The vocabulary indexing the fluents and actions of the trace.
+            fluent_ids (Sequence[int]):
+                The vocabulary IDs of the fluents making up the state columns.
+            states (np.ndarray):
+                The (steps x fluents) boolean state matrix.
+            action_ids (np.ndarray):
+                The vocabulary ID of the action of each step, or -1 if none.
+            indices (np.ndarray):
+                Optional; The index of each step. Defaults to 1, 2, ..., n.
+        """
+        trace = cls(vocabulary=vocabulary)
+        trace.steps = ColumnarSteps.from_arrays(
+            vocabulary, fluent_ids, states, action_ids, indices
+        )
+        trace._reinit_index()
+        return trace
+
+    def _reinit_index(self):
+        """Reinitializes the fluent and action indices of this trace from the
+        columnar storage."""
+        self._cost_prefix = None
+        self._fingerprint_prefix = None
+        n = len(self.steps)
+        self._fluent_counts = Counter({f: n for f in self.steps.columns} if n else {})
+        self.fluents = set(self._fluent_counts)
+        action_ids = self._action_ids
+        order = np.argsort(action_ids, kind="stable")
+        ids, starts = np.unique(action_ids[order], return_index=True)
+        self._action_positions = {
+            self.vocabulary.actions[action_id]: rows.tolist()
+            for action_id, rows in zip(ids, np.split(order, starts[1:]))
+            if action_id >= 0
+        }
+        self.actions = set(self._action_positions)
+
+    @property
+    def _states(self) -> np.ndarray:
+        return self.steps.states
+
+    @property
+    def _action_ids(self) -> np.ndarray:
+        return self.steps.action_ids
+
+    def __eq__(self, other):
+        return isinstance(other, ColumnarTrace) and self.steps == other.steps
+
+    def __reduce__(self):
+        steps = self.steps
+        indices = steps.indices
+        if np.array_equal(indices, np.arange(1, len(indices) + 1)):
+            # the default indices are not pickled
+            indices = None
+        return _unpickle_columnar, (
+            self.vocabulary,
+            steps.fluent_ids.astype(np.int32),
+            np.packbits(steps.states, axis=1),
+            steps.action_ids.astype(np.int32),
+            indices,
+        )
+
+    def _fluent_values(self, fluent):
+        return self._states[:, self.steps.column(fluent)].tolist()
+
+    def get_state_matrix(
+        self, fluents: Iterable = None, start: int = 0, stop: int = None
+    ) -> np.ndarray:
+        fluents = list(self.fluents if fluents is None else fluents)
+        states = self._states[start:stop]
+        values = np.full((len(fluents), len(states)), UNKNOWN, dtype=np.int8)
+        index = self.steps.column_index
+        rows = [i for i, fluent in enumerate(fluents) if fluent in index]
+        values[rows] = states[:, [index[fluents[i]] for i in rows]].T
+        return values
+
+    def get_static_fluents(self):
+        states = self._states
+        static = np.all(states, axis=0) | ~np.any(states, axis=0)
+        columns = self.steps.columns
+        return {columns[j] for j in np.flatnonzero(static)}
+
+    def _step_costs(self):
+        action_costs = np.array(
+            [a.cost for a in self.vocabulary.actions] + [0], dtype=np.int64
+        )
+        # action ID -1 (no action) indexes the trailing 0
+        return action_costs[self._action_ids].tolist()
+
+    def _step_digests(self):
+        columns = self.steps.columns
+        true = np.array([fluent_digest(f, True) for f in columns], dtype=np.uint64)
+        false = np.array([fluent_digest(f, False) for f in columns], dtype=np.uint64)
+        # sums of uint64 wrap around, like the masked sums of `state_digest`
+        states = np.where(self._states, true, false).sum(axis=1, dtype=np.uint64)
+        actions = [action_digest(a) for a in self.vocabulary.actions] + [
+            action_digest(None)
+        ]
+        return [
+            combine(state, actions[action_id])
+            for state, action_id in zip(states.tolist(), self._action_ids.tolist())
+        ]
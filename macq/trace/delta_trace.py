@@ -0,0 +1,416 @@
+from __future__ import annotations
+from collections import Counter
+from collections.abc import MutableSequence
+from typing import Callable, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from . import Action, Fluent, State, BitState, Step, Trace
+from ..utils import InconsistentStateFluents, SliceView
+
+Delta = Tuple[FrozenSet[Fluent], FrozenSet[Fluent]]  # (add, delete)
+
+NO_CHANGE: Delta = (frozenset(), frozenset())
+
+
+def state_delta(pre: State, post: State) -> Delta:
+    """Computes the fluents that became true (add) and false (delete) between two
+    states ranging over the same fluents.
+
+    Raises:
+        InconsistentStateFluents:
+            The two states do not range over the same fluents.
+    """
+    if (
+        isinstance(pre, BitState)
+        and isinstance(post, BitState)
+        and pre.vocabulary is post.vocabulary
+    ):
+        if pre.mask != post.mask:
+            raise InconsistentStateFluents(post)
+        changed = pre.bits ^ post.bits
+        if not changed:
+            return NO_CHANGE
+        # the changed fluents, with their value in the post-state
+        changes = BitState(post.vocabulary, mask=changed, bits=changed & post.bits)
+        return (
+            frozenset(f for f, v in changes.items() if v),
+            frozenset(f for f, v in changes.items() if not v),
+        )
+
+    if len(pre) != len(post):
+        raise InconsistentStateFluents(post)
+    add, delete = set(), set()
+    try:
+        for fluent, value in post.items():
+            if value != pre[fluent]:
+                (add if value else delete).add(fluent)
+    except KeyError:
+        raise InconsistentStateFluents(post) from None
+    if not add and not delete:
+        return NO_CHANGE
+    return frozenset(add), frozenset(delete)
+
+
+def apply_delta(state: State, delta: Delta):
+    """Applies a delta to a state, in place."""
+    add, delete = delta
+    for fluent in add:
+        state[fluent] = True
+    for fluent in delete:
+        state[fluent] = False
+
+
+class DeltaSteps(MutableSequence):
+    """The steps of a `DeltaTrace`, stored as deltas.
+
+    A `list`-like object of `Step`s. Only the initial state is stored in full,
+    along with, for each subsequent step, the fluents that were added and
+    deleted from the previous state. States are materialized on demand from
+    full checkpoints stored every `checkpoint_interval` steps, so retrieving
+    any step applies at most `checkpoint_interval` deltas.
+
+    Retrieved states are new (materialized) `State` objects; modifying them
+    does not modify the trace.
+
+    Appending a step (or removing the last one) only encodes that step. Any
+    other edit re-encodes the steps from the checkpoint before the first
+    edited position on, which costs O(steps after it x fluents): editing near
+    the start of a long trace re-encodes almost all of it, so batch such edits
+    through a list-backed `Trace` and convert the result.
+
+    Attributes:
+        checkpoint_interval (int):
+            The number of steps between two full checkpoint states.
+        checkpoints (List[State]):
+            The full states of steps 0, k, 2k, ... (k = `checkpoint_interval`).
+        deltas (List[Tuple[FrozenSet[Fluent], FrozenSet[Fluent]]]):
+            The (add, delete) fluents of each step, relative to the previous
+            step. The delta of the first step is empty.
+        actions (List[Action | None]):
+            The action of each step.
+        indices (List[int]):
+            The index of each step.
+    """
+
+    def __init__(self, checkpoint_interval: int = 64):
+        """Initializes an empty DeltaSteps.
+
+        Args:
+            checkpoint_interval (int):
+                Optional; The number of steps between two full checkpoint
+                states. Defaults to 64.
+        """
+        if checkpoint_interval < 1:
+            raise ValueError("The checkpoint interval must be at least 1.")
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints: List[State] = []
+        self.deltas: List[Delta] = []
+        self.actions: List[Optional[Action]] = []
+        self.indices: List[int] = []
+        self._last: Optional[State] = None
+
+    @property
+    def initial_state(self) -> Optional[State]:
+        return self.checkpoints[0] if self.checkpoints else None
+
+    def state(self, i: int) -> State:
+        """Materializes the state of the i-th step."""
+        checkpoint = i // self.checkpoint_interval
+        state = self.checkpoints[checkpoint].clone()
+        for j in range(checkpoint * self.checkpoint_interval + 1, i + 1):
+            apply_delta(state, self.deltas[j])
+        return state
+
+    def _index(self, key: int) -> int:
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("step index out of range")
+        return key
+
+    def _encode(self, steps: Iterable[Step]):
+        """Re-encodes the storage from the given steps."""
+        steps = list(steps)
+        self.clear()
+        for step in steps:
+            self.append(step)
+
+    def _truncate(self, size: int):
+        """Truncates the storage to its first `size` steps."""
+        k = self.checkpoint_interval
+        del self.deltas[size:], self.actions[size:], self.indices[size:]
+        del self.checkpoints[(size + k - 1) // k :]
+        self._last = self.state(size - 1) if size > 0 else None
+
+    def _edit(self, position: int, edit: Callable[[List[Step], int], None]):
+        """Edits the steps from a position on, re-encoding them from the
+        checkpoint before it.
+
+        Args:
+            position (int):
+                The first position the edit may change.
+            edit (Callable[[List[Step], int], None]):
+                The function editing the list of steps from the checkpoint on,
+                given the position of the checkpoint.
+        """
+        start = min(position, len(self))
+        start -= start % self.checkpoint_interval
+        steps = list(self._iter_positions(range(start, len(self))))
+        edit(steps, start)
+        self._truncate(start)
+        for step in steps:
+            self.append(step)
+
+    @staticmethod
+    def _first(key: slice, size: int) -> int:
+        """Retrieves the first position a slice of a sequence of the given size
+        covers (or would insert at, if empty)."""
+        positions = range(*key.indices(size))
+        if not positions:
+            return max(positions.start, 0)
+        return min(positions.start, positions[-1])
+
+    @staticmethod
+    def _shift(key: slice, size: int, start: int) -> slice:
+        """Shifts a slice of a sequence of the given size to the positions from
+        `start` on."""
+        first, stop, step = key.indices(size)
+        if not range(first, stop, step):
+            first = max(first, 0) - start
+            return slice(first, first, step)
+        return slice(first - start, stop - start if stop >= start else None, step)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        i = self._index(key)
+        return Step(self.state(i), self.actions[i], self.indices[i])
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = list(value)
+            size = len(self)
+
+            def assign(steps, start):
+                steps[self._shift(key, size, start)] = value
+
+            self._edit(self._first(key, size), assign)
+            return
+        i = self._index(key)
+
+        def replace(steps, start):
+            steps[i - start] = value
+
+        self._edit(i, replace)
+
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            size = len(self)
+
+            def delete(steps, start):
+                del steps[self._shift(key, size, start)]
+
+            self._edit(self._first(key, size), delete)
+            return
+        i = self._index(key)
+        if i < len(self) - 1:
+
+            def delete_step(steps, start):
+                del steps[i - start]
+
+            self._edit(i, delete_step)
+            return
+        # deleting the last step only truncates the storage
+        self._truncate(i)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def __iter__(self):
+        state = None
+        for i, delta in enumerate(self.deltas):
+            if i % self.checkpoint_interval == 0:
+                state = self.checkpoints[i // self.checkpoint_interval].clone()
+            else:
+                state = state.clone()
+                apply_delta(state, delta)
+            yield Step(state, self.actions[i], self.indices[i])
+
+    def _iter_positions(self, positions: range) -> Iterator[Step]:
+        """Iterates over the steps at increasing positions, applying the deltas
+        incrementally from the nearest checkpoint."""
+        if positions and positions[-1] >= len(self):
+            raise IndexError("step index out of range")
+        k = self.checkpoint_interval
+        state, at = None, -1
+        for i in positions:
+            if i // k != at // k:
+                at = i // k * k
+                state = self.checkpoints[i // k].clone()
+            while at < i:
+                at += 1
+                apply_delta(state, self.deltas[at])
+            yield Step(state.clone(), self.actions[i], self.indices[i])
+
+    def _matches(self, i: int, step: Step):
+        return (
+            step.index == self.indices[i]
+            and step.action == self.actions[i]
+            and self.state(i) == step.state
+        )
+
+    def __contains__(self, step: Step):
+        return any(self._matches(i, step) for i in range(len(self)))
+
+    def __eq__(self, other):
+        if isinstance(other, DeltaSteps):
+            return (
+                self.indices == other.indices
+                and self.actions == other.actions
+                and self.initial_state == other.initial_state
+                and self.deltas == other.deltas
+            )
+        return NotImplemented
+
+    def index(self, value: Step, start: int = 0, stop: int = None):
+        for i in range(*slice(start, stop).indices(len(self))):
+            if self._matches(i, value):
+                return i
+        raise ValueError(f"{value} is not in the trace")
+
+    def count(self, value: Step):
+        return sum(1 for i in range(len(self)) if self._matches(i, value))
+
+    def insert(self, index: int, value: Step):
+        size = len(self)
+        index = max(0, min(index + size if index < 0 else index, size))
+
+        def insert(steps, start):
+            steps.insert(index - start, value)
+
+        self._edit(index, insert)
+
+    def append(self, value: Step):
+        state = value.state.clone()
+        i = len(self)
+        self.deltas.append(NO_CHANGE if i == 0 else state_delta(self._last, state))
+        if i % self.checkpoint_interval == 0:
+            self.checkpoints.append(state)
+        self.actions.append(value.action)
+        self.indices.append(value.index)
+        self._last = state
+
+    def clear(self):
+        self.checkpoints = []
+        self.deltas = []
+        self.actions = []
+        self.indices = []
+        self._last = None
+
+    def copy(self):
+        return list(self)
+
+    def reverse(self):
+        self._encode(list(self)[::-1])
+
+    def sort(self, reverse: bool = False, key=None):
+        self._encode(sorted(self, key=key, reverse=reverse))
+
+
+class DeltaTrace(Trace):
+    """A delta-encoded state trace.
+
+    A `Trace` whose steps are stored in a `DeltaSteps`: the initial state, plus
+    the fluents added and deleted by each step. Memory grows with the number of
+    changed fluents rather than with the number of fluents in every state.
+    States are materialized on demand, and queries that only need the actions
+    or the deltas avoid materializing states altogether. All the states of a
+    delta-encoded trace must range over the same fluents.
+
+    Attributes:
+        steps (DeltaSteps):
+            The delta-encoded storage of the steps.
+        fluents (set):
+            The set of fluents in the trace.
+        actions (set):
+            The set of actions in the trace.
+    """
+
+    steps: DeltaSteps
+
+    def __init__(self, steps: Iterable[Step] = None, checkpoint_interval: int = 64):
+        """Initializes a DeltaTrace with an optional list of steps.
+
+        Args:
+            steps (list):
+                Optional; The steps of the trace, converted to deltas.
+            checkpoint_interval (int):
+                Optional; The number of steps between two full checkpoint
+                states. Defaults to 64.
+        """
+        self.steps = DeltaSteps(checkpoint_interval)
+        self._reinit_index()
+        self.extend(steps if steps is not None else [])
+
+    @classmethod
+    def from_trace(cls, trace: Trace, checkpoint_interval: int = 64):
+        """Converts a trace to a delta-encoded trace."""
+        return cls(trace, checkpoint_interval)
+
+    def _reinit_index(self):
+        """Reinitializes the fluent and action indices of this trace from the
+        delta-encoded storage, without materializing any state."""
+        self._cost_prefix = None
+        self._fingerprint_prefix = None
+        initial = self.steps.initial_state
+        n = len(self.steps)
+        self._fluent_counts = Counter({f: n for f in initial.keys()} if n else {})
+        self.fluents = set(self._fluent_counts)
+        self._action_positions = {}
+        for i, action in enumerate(self.steps.actions):
+            if action:
+                self._action_positions.setdefault(action, []).append(i)
+        self.actions = set(self._action_positions)
+
+    def __getitem__(self, key: int):
+        if isinstance(key, slice):
+            return DeltaSliceView(self.steps, key)
+        return self.steps[key]
+
+    def __eq__(self, other):
+        return isinstance(other, DeltaTrace) and self.steps == other.steps
+
+    def _fluent_values(self, fluent):
+        if not len(self):
+            return []
+        value = self.steps.initial_state[fluent]
+        values = [value]
+        for add, delete in self.steps.deltas[1:]:
+            if fluent in add:
+                value = True
+            elif fluent in delete:
+                value = False
+            values.append(value)
+        return values
+
+    def get_static_fluents(self):
+        changed = set()
+        for add, delete in self.steps.deltas:
+            changed.update(add)
+            changed.update(delete)
+        return self.fluents - changed
+
+    def _step_costs(self):
+        return (action.cost if action else 0 for action in self.steps.actions)
+
+
+class DeltaSliceView(SliceView):
+    """A `SliceView` over the steps of a `DeltaTrace`, iterated by applying the
+    deltas incrementally rather than materializing each step from its
+    checkpoint."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        positions = self.positions
+        if positions.step > 0:
+            return self.parent._iter_positions(positions)
+        return reversed(list(self.parent._iter_positions(positions[::-1])))
@@ -162,7 +162,7 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         self.actions = list(actions)
         # set of all fluents
         self.propositions = {
-            f for trace in traces for step in trace for f in step.state.fluents
+            f for trace in traces for step in trace for f in step.state
         }
         # create |A| (action x action set, no duplicates)
         self.cross_actions = [
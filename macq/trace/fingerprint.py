@@ -0,0 +1,62 @@
+import struct
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Optional
+from . import Action, State, Step
+
+# The fingerprint of an empty trace
+EMPTY = 0
+
+# The number of (fluent, value) pairs and of actions whose digests are cached.
+# The caches are bounded since they are shared by every vocabulary.
+CACHE_SIZE = 1 << 16
+
+_MASK = (1 << 64) - 1
+_PAIR = struct.Struct("<QQ")
+
+
+def digest(text: str) -> int:
+    """Computes the stable 64-bit digest of a string."""
+    return int.from_bytes(blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fluent_digest(fluent, value: Optional[bool]) -> int:
+    """Computes the digest of a fluent having a value (None if hidden)."""
+    return digest(f"{fluent}={value}")
+
+
+def action_digest(action: Optional[Action]) -> int:
+    """Computes the digest of an action (or of no action)."""
+    if action is None:
+        return EMPTY
+    return _action_digest(action)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _action_digest(action: Action) -> int:
+    return digest(action.details())
+
+
+def state_digest(state: State) -> int:
+    """Computes the digest of a state, independently of the order of its
+    fluents."""
+    return sum(fluent_digest(f, v) for f, v in state.items()) & _MASK
+
+
+def combine(a: int, b: int) -> int:
+    """Combines two digests, in order."""
+    return int.from_bytes(
+        blake2b(_PAIR.pack(a, b), digest_size=8).digest(), "little"
+    )
+
+
+def step_digest(step: Step) -> int:
+    """Computes the digest of a step from its state and action (its index is
+    not part of the digest)."""
+    return combine(state_digest(step.state), action_digest(step.action))
+
+
+def extend(fingerprint: int, step: int) -> int:
+    """Extends the fingerprint of a trace with the digest of its next step."""
+    return combine(fingerprint, step)
@@ -13,6 +13,8 @@ class PlanningObject:
             Example: "A"
     """
 
+    __slots__ = ("obj_type", "name")
+
     def __init__(self, obj_type: str, name: str):
         """Initializes a PlanningObject with a type and a name.
 
@@ -31,6 +33,9 @@ class PlanningObject:
     def __eq__(self, other):
         return isinstance(other, PlanningObject) and self.name == other.name
 
+    def __reduce__(self):
+        return PlanningObject, (self.obj_type, self.name)
+
     def details(self):
         return " ".join([self.obj_type, self.name])
 
@@ -53,6 +58,8 @@ class Fluent:
             Example: Block A.
     """
 
+    __slots__ = ("name", "objects", "_hash")
+
     def __init__(self, name: str, objects: List[PlanningObject]):
         """Initializes a Fluent with a name and a list of objects.
 
@@ -64,8 +71,12 @@ class Fluent:
         """
         self.name = name
         self.objects = objects
+        # precomputed by `Vocabulary` when the fluent is interned
+        self._hash = None
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         # Order of objects is important!
         return hash(str(self))
 
@@ -77,12 +88,21 @@ class Fluent:
         )
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             isinstance(other, Fluent)
             and self.name == other.name
             and self.objects == other.objects
         )
 
+    def __reduce__(self):
+        # Prevents circular importing
+        from .vocabulary import _shared_entry, shared_reference
+
+        reference = shared_reference(self, "fluents")
+        if reference is not None:
+            return _shared_entry, reference
+        return _unpickle_fluent, (self.name, self.objects)
+
     def __lt__(self, other):
         if not isinstance(other, Fluent):
             raise TypeError(f"Cannot compare Fluent to {other.__name__}.")
@@ -90,3 +110,10 @@ class Fluent:
 
     def _serialize(self):
         return str(self)
+
+
+def _unpickle_fluent(name: str, objects: List[PlanningObject]) -> Fluent:
+    fluent = Fluent(name, objects)
+    # hashes of strings differ between processes, so they are not pickled
+    fluent._hash = hash(str(fluent))
+    return fluent
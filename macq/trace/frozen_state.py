@@ -0,0 +1,115 @@
+from __future__ import annotations
+from typing import Dict, Tuple
+from . import Fluent, State, BitState, Vocabulary
+
+
+class FrozenState(BitState):
+    """An immutable `BitState`.
+
+    The hash of a FrozenState is computed from its bitmasks, like the hash of a
+    `BitState`, once when it is created. FrozenStates cannot be modified;
+    cloning one returns a mutable `BitState`. Use a `StateTable` to share a
+    single FrozenState between all the occurrences of a state.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        vocabulary: Vocabulary,
+        fluents: Dict[Fluent, bool] = None,
+        mask: int = 0,
+        bits: int = 0,
+    ):
+        """Initializes a FrozenState from either a fluent-value mapping or a pair
+        of bitmasks.
+
+        Args:
+            vocabulary (Vocabulary):
+                The vocabulary whose fluent IDs index the bits of this state.
+            fluents (dict):
+                Optional; A mapping of `Fluent` objects to their value in this
+                state. Fluents missing from the vocabulary are interned.
+            mask (int):
+                Optional; The bitmask of fluent IDs that are part of this state.
+            bits (int):
+                Optional; The bitmask of fluent IDs that are true in this state.
+                Must be a subset of `mask`.
+        """
+        if fluents:
+            state = BitState(vocabulary, fluents, mask, bits)
+            mask, bits = state.mask, state.bits
+        super().__init__(vocabulary, mask=mask, bits=bits)
+        # caches the hash, which never changes
+        hash(self)
+
+    def __eq__(self, other):
+        return self is other or super().__eq__(other)
+
+    __hash__ = BitState.__hash__
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("A FrozenState cannot be modified. Clone it first.")
+
+    __setitem__ = __delitem__ = clear = update = _immutable
+
+
+class StateTable:
+    """A hash-consing table of `FrozenState`s over a shared `Vocabulary`.
+
+    Returns a single FrozenState for each distinct state, so identical states
+    (e.g. the states revisited by random walks, across all traces) share one
+    object. States are kept for the lifetime of the table.
+
+    Attributes:
+        vocabulary (Vocabulary):
+            The vocabulary whose fluent IDs index the bits of the states.
+    """
+
+    def __init__(self, vocabulary: Vocabulary):
+        """Initializes an empty StateTable.
+
+        Args:
+            vocabulary (Vocabulary):
+                The vocabulary whose fluent IDs index the bits of the states.
+        """
+        self.vocabulary = vocabulary
+        self._states: Dict[Tuple[int, int], FrozenState] = {}
+
+    def __len__(self):
+        return len(self._states)
+
+    def state(self, mask: int, bits: int) -> FrozenState:
+        """Retrieves the shared FrozenState with the given bitmasks, creating it if
+        necessary.
+
+        Args:
+            mask (int):
+                The bitmask of fluent IDs that are part of the state.
+            bits (int):
+                The bitmask of fluent IDs that are true in the state.
+
+        Returns:
+            The shared `FrozenState`.
+        """
+        key = (mask, bits)
+        state = self._states.get(key)
+        if state is None:
+            state = FrozenState(self.vocabulary, mask=mask, bits=bits)
+            self._states[key] = state
+        return state
+
+    def freeze(self, state: State) -> FrozenState:
+        """Retrieves the shared FrozenState equal to the given state.
+
+        Args:
+            state (State):
+                The state to freeze. Fluents missing from the vocabulary are
+                interned.
+
+        Returns:
+            The shared `FrozenState` equal to `state`.
+        """
+        if not (isinstance(state, BitState) and state.vocabulary is self.vocabulary):
+            state = BitState(self.vocabulary, dict(state.items()))
+        return self.state(state.mask, state.bits)
@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from itertools import count
+from typing import Callable, Optional
+from . import Trace, TraceList, Vocabulary
+
+
+class LazyTraceList(TraceList):
+    """A sequence of traces generated on demand.
+
+    A `TraceList` that holds a generator function instead of its traces. The
+    generator is called with the position of a trace, and must always return
+    the same trace for the same position (e.g. by seeding a random stream from
+    the position), so that the list describes a stable sequence. Each trace is
+    generated when its position is accessed (e.g. while iterating over the
+    list), and is kept in a bounded cache of the most recently accessed traces.
+    A trace evicted from the cache is generated again the next time it is
+    accessed. Iterating over a LazyTraceList with a small cache therefore uses
+    constant memory, regardless of the number of traces.
+
+    Lazy trace lists cannot be modified, apart from generating more traces.
+    Use `materialize` to get a regular `TraceList`.
+
+    Attributes:
+        generator (Callable[[int], Trace]):
+            The function generating the trace at a position.
+        num_traces (int):
+            The number of traces in the list.
+        cache_size (int | None):
+            The maximum number of generated traces kept in memory. `None` keeps
+            every trace.
+        vocabulary (Vocabulary | None):
+            The vocabulary shared by the objects, fluents, and actions of the
+            traces.
+    """
+
+    def __init__(
+        self,
+        generator: Callable[[int], Trace],
+        num_traces: int,
+        cache_size: Optional[int] = 0,
+        vocabulary: Vocabulary = None,
+    ):
+        """Initializes a LazyTraceList with a generator.
+
+        Args:
+            generator (Callable[[int], Trace]):
+                The function generating the trace at a position.
+            num_traces (int):
+                The number of traces in the list.
+            cache_size (int | None):
+                Optional; The maximum number of generated traces kept in memory.
+                `None` keeps every trace. Defaults to 0 (no caching).
+            vocabulary (Vocabulary):
+                Optional; The vocabulary shared by the traces.
+        """
+        if cache_size is not None and cache_size < 0:
+            raise ValueError("The cache size cannot be negative.")
+        self.generator = generator
+        self.num_traces = num_traces
+        self.cache_size = cache_size
+        self.vocabulary = vocabulary
+        self._cache: "OrderedDict[int, Trace]" = OrderedDict()
+
+    @property
+    def traces(self):
+        """The list of traces, generating the ones that are not cached."""
+        return list(self)
+
+    def __getstate__(self):
+        # without its generator, a lazy trace list has no traces, and the
+        # generator is usually a closure over the planning problem of a
+        # generator, which cannot be pickled
+        raise TypeError(
+            "A LazyTraceList cannot be pickled. Materialize it into a TraceList first."
+        )
+
+    def _index(self, key: int) -> int:
+        if key < 0:
+            key += self.num_traces
+        if not 0 <= key < self.num_traces:
+            raise IndexError("trace index out of range")
+        return key
+
+    def __getitem__(self, key: int):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self.num_traces))]
+        key = self._index(key)
+        trace = self._cache.get(key)
+        if trace is not None:
+            self._cache.move_to_end(key)
+            return trace
+        trace = self.generator(key)
+        if self.cache_size is None or self.cache_size > 0:
+            self._cache[key] = trace
+            if self.cache_size is not None and len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return trace
+
+    def __iter__(self):
+        return (self[i] for i in range(self.num_traces))
+
+    def __len__(self):
+        return self.num_traces
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(
+            "A LazyTraceList cannot be modified. Materialize it into a TraceList first."
+        )
+
+    __setitem__ = __delitem__ = insert = sort = _immutable
+
+    def copy(self):
+        return list(self)
+
+    def generate_more(self, num: int):
+        """Extends the list with more traces, generated when they are accessed.
+
+        Args:
+            num (int):
+                The number of additional traces.
+        """
+        self.num_traces += num
+
+    def materialize(self):
+        """Generates every trace (reusing the cached ones).
+
+        Returns:
+            A regular `TraceList` of the generated traces. Its `generate_more`
+            generates the traces at the following positions.
+        """
+        # more traces are generated from the positions following the list
+        more = map(self.generator, count(self.num_traces))
+        return TraceList(
+            list(self), generator=more.__next__, vocabulary=self.vocabulary
+        )
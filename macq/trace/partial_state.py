@@ -6,6 +6,8 @@ from typing import Dict, Union
 class PartialState(State):
     """A Partial State where the value of some fluents are unknown."""
 
+    __slots__ = ()
+
     def __init__(self, fluents: Dict[Fluent, Union[bool, None]] = {}):
         """
         Args:
@@ -13,4 +15,4 @@ class PartialState(State):
                 Optional; A mapping of `Fluent` objects to their value in this
                 state. Defaults to an empty `dict`.
         """
-        self.fluents = fluents
+        super().__init__(fluents)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Set
+from . import Fluent, BitState, Vocabulary
+from .bit_state import iter_bits
+from .state import AtomicState
+
+
+class SparseState(BitState):
+    """A closed-world `BitState` storing only the IDs of its true fluents.
+
+    The fluents of the state are given by a bitmask of fluent IDs, like a
+    `BitState`, which is typically shared by every state of a problem (e.g. the
+    grounded fluents of a `Generator`). Rather than a second bitmask, the state
+    stores the set of IDs of its true fluents: every other fluent is false,
+    including fluents that are not part of the state. Memory therefore grows
+    with the number of true fluents, regardless of the size of the grounded
+    domain.
+
+    Attributes:
+        vocabulary (Vocabulary):
+            The vocabulary whose fluent IDs index this state.
+        mask (int):
+            The bitmask of fluent IDs that are part of this state.
+        true (Set[int]):
+            The IDs of the fluents that are true in this state.
+    """
+
+    __slots__ = ("true",)
+
+    def __init__(
+        self,
+        vocabulary: Vocabulary,
+        fluents: Dict[Fluent, bool] = None,
+        mask: int = 0,
+        true: Iterable[int] = (),
+    ):
+        """Initializes a SparseState from either a fluent-value mapping or a
+        bitmask and the IDs of the true fluents.
+
+        Args:
+            vocabulary (Vocabulary):
+                The vocabulary whose fluent IDs index this state.
+            fluents (dict):
+                Optional; A mapping of `Fluent` objects to their value in this
+                state. Fluents missing from the vocabulary are interned.
+            mask (int):
+                Optional; The bitmask of fluent IDs that are part of this state.
+            true (Iterable[int]):
+                Optional; The IDs of the fluents that are true in this state.
+                Must be part of `mask`.
+        """
+        super().__init__(vocabulary, mask=mask)
+        self.true = set(true)
+        if fluents:
+            self.update(fluents)
+
+    @property
+    def bits(self) -> int:
+        """The bitmask of fluent IDs that are true in this state."""
+        return sum(1 << i for i in self.true)
+
+    @bits.setter
+    def bits(self, bits: int):
+        self._hash = None
+        self.true = set(iter_bits(bits))
+
+    def __eq__(self, other):
+        if isinstance(other, SparseState) and other.vocabulary is self.vocabulary:
+            return self.mask == other.mask and self.true == other.true
+        return super().__eq__(other)
+
+    __hash__ = BitState.__hash__
+
+    def __reduce__(self):
+        return type(self), (self.vocabulary, None, self.mask, sorted(self.true))
+
+    def __setitem__(self, key: Fluent, value: bool):
+        if value is None:
+            raise ValueError(
+                f"Cannot hide {key} in a SparseState. Use a PartialState instead."
+            )
+        i = self._id(key)
+        self._hash = None
+        self.mask |= 1 << i
+        if value:
+            self.true.add(i)
+        else:
+            self.true.discard(i)
+
+    def __getitem__(self, key: Fluent):
+        try:
+            return self.vocabulary.fluent_id(key) in self.true
+        except KeyError:
+            return False
+
+    def __delitem__(self, key: Fluent):
+        if not self.has_key(key):
+            raise KeyError(key)
+        i = self.vocabulary.fluent_id(key)
+        self._hash = None
+        self.mask &= ~(1 << i)
+        self.true.discard(i)
+
+    def clear(self):
+        self._hash = None
+        self.mask = 0
+        self.true = set()
+
+    def _values(self):
+        true = self.true
+        return ((i, i in true) for i in iter_bits(self.mask))
+
+    def true_fluents(self):
+        """Returns the list of fluents that are true in this state."""
+        fluents = self.vocabulary.fluents
+        return [fluents[i] for i in sorted(self.true)]
+
+    def clone(self, atomic=False):
+        if atomic:
+            return AtomicState({str(fluent): value for fluent, value in self.items()})
+        return SparseState(self.vocabulary, mask=self.mask, true=self.true)
@@ -10,11 +10,19 @@ class State:
     A dict-like object. Maps `Fluent` objects to boolean values, representing
     the state for a `Step` in a `Trace`.
 
+    Clones are copy-on-write: a clone shares the mapping of the state it was
+    cloned from until either of them is modified through the `State` API.
+    Modifying `fluents` directly bypasses this, and modifies both.
+
     Attributes:
         fluents (dict):
             A mapping of `Fluent` objects to their value in this state.
     """
 
+    # `_shared` is whether `fluents` may be shared with a clone (or with the
+    # state it was cloned from)
+    __slots__ = ("fluents", "_shared")
+
     def __init__(self, fluents: Dict[Fluent, bool] = None):
         """Initializes State with an optional fluent-value mapping.
 
@@ -24,6 +32,7 @@ class State:
                 state. Defaults to an empty `dict`.
         """
         self.fluents = fluents if fluents is not None else {}
+        self._shared = False
 
     def __eq__(self, other):
         return isinstance(other, State) and self.fluents == other.fluents
@@ -32,18 +41,34 @@ class State:
         return ", ".join([str(fluent) for (fluent, value) in self.items() if value])
 
     def __hash__(self):
-        return hash(str(self.details()))
+        return hash(frozenset(self.items()))
 
     def __len__(self):
         return len(self.fluents)
 
+    def __reduce__(self):
+        # the mapping is pickled once even if shared by clones, which stay
+        # copy-on-write
+        return type(self), (self.fluents,), self._shared
+
+    def __setstate__(self, shared: bool):
+        self._shared = shared
+
+    def _own(self):
+        """Copies the fluent mapping if it may be shared, before it is modified."""
+        if self._shared:
+            self.fluents = self.fluents.copy()
+            self._shared = False
+
     def __setitem__(self, key: Fluent, value: bool):
+        self._own()
         self.fluents[key] = value
 
     def __getitem__(self, key: Fluent):
         return self.fluents[key]
 
     def __delitem__(self, key: Fluent):
+        self._own()
         del self.fluents[key]
 
     def __iter__(self):
@@ -53,6 +78,9 @@ class State:
         return self.fluents[key]
 
     def clear(self):
+        if self._shared:
+            self.fluents = {}
+            self._shared = False
         return self.fluents.clear()
 
     def copy(self):
@@ -62,6 +90,7 @@ class State:
         return k in self.fluents
 
     def update(self, *args, **kwargs):
+        self._own()
         return self.fluents.update(*args, **kwargs)
 
     def keys(self):
@@ -84,7 +113,9 @@ class State:
     def clone(self, atomic=False):
         if atomic:
             return AtomicState({str(fluent): value for fluent, value in self.items()})
-        return State(self.fluents.copy())
+        clone = State(self.fluents)
+        self._shared = clone._shared = True
+        return clone
 
     def holds(self, fluent: str):
         fluents = dict(map(lambda f: (f.name, f), self.keys()))
@@ -95,5 +126,7 @@ class State:
 class AtomicState(State):
     """A State where the fluents are represented by strings."""
 
+    __slots__ = ()
+
     def __init__(self, fluents: Dict[str, bool] = None):
-        self.fluents = fluents if fluents is not None else {}
+        super().__init__(fluents)
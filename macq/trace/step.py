@@ -18,6 +18,8 @@ class Step:
             The "place" of the step in the trace.
     """
 
+    __slots__ = ("state", "action", "index")
+
     def __init__(self, state: State, action: Optional[Action], index: int):
         """Initializes a Step with a state and optionally an action.
 
@@ -33,3 +35,6 @@ class Step:
         self.state = state
         self.action = action
         self.index = index
+
+    def __reduce__(self):
+        return Step, (self.state, self.action, self.index)
@@ -1,14 +1,18 @@
-from collections import defaultdict
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from itertools import accumulate, chain
 from dataclasses import dataclass
-from typing import List, Type, Iterable, Callable, Set
+from typing import Dict, List, Type, Iterable, Callable, Set
 from inspect import cleandoc
 from warnings import warn
 from rich.table import Table
 from rich.text import Text
 from rich.console import Console
 from . import Action, Step, State
+from .fingerprint import EMPTY, step_digest, extend
 from ..observation import Observation, NoisyPartialDisorderedParallelObservation
-from ..utils import TokenizationError
+import numpy as np
+from ..utils import TokenizationError, SliceView, heatmap
 
 
 @dataclass
@@ -37,6 +41,20 @@ class Trace:
             The set of fluents in the trace.
         actions (set):
             The set of actions in the trace.
+
+    The trace keeps an index of the positions of the steps using each action,
+    and of the number of steps each fluent appears in. Both are maintained by
+    the `list` methods, so per-action queries cost O(occurrences) rather than a
+    scan of the whole trace. The prefix sums of the step costs are built on the
+    first cost query, after which total and slice costs are O(1); the
+    fingerprints of its prefixes are built and maintained the same way.
+    Modifying `steps` (or the cost of an action in the trace) directly bypasses
+    all of them.
+
+    Slicing a trace returns a `SliceView` over its steps rather than a copy;
+    use `copy` on the view to get a `list`. A view covers the positions of the
+    slice when it was taken, so it goes stale once steps are inserted into or
+    removed from the trace.
     """
 
     class InvalidCostRange(Exception):
@@ -54,22 +72,50 @@ class Trace:
                 `list`.
         """
         self.steps = steps if steps is not None else []
-        self.__reinit_actions_and_fluents()
+        self._reinit_index()
 
     def __eq__(self, other):
         return isinstance(other, Trace) and self.steps == other.steps
 
+    def __reduce__(self):
+        # the indices are rebuilt from the steps rather than pickled
+        return type(self)._from_steps, (self.steps,)
+
+    @classmethod
+    def _from_steps(cls, steps):
+        trace = cls.__new__(cls)
+        trace.steps = steps
+        trace._reinit_index()
+        return trace
+
     def __len__(self):
         return len(self.steps)
 
     def __setitem__(self, key: int, value: Step):
+        if isinstance(key, slice):
+            self.steps[key] = value
+            self._reinit_index()
+            return
+        key = self.__position(key)
+        self.__unindex_step(self.steps[key], key)
         self.steps[key] = value
+        self.__index_step(value, key)
 
     def __getitem__(self, key: int):
+        if isinstance(key, slice):
+            return SliceView(self.steps, key)
         return self.steps[key]
 
     def __delitem__(self, key: int):
+        if isinstance(key, slice):
+            del self.steps[key]
+            self._reinit_index()
+            return
+        key = self.__position(key)
+        step = self.steps[key]
         del self.steps[key]
+        self.__unindex_step(step, key)
+        self.__shift_positions(key, -1)
 
     def __iter__(self):
         return iter(self.steps)
@@ -82,12 +128,11 @@ class Trace:
 
     def append(self, step: Step):
         self.steps.append(step)
-        self.__update_actions_and_fluents(step)
+        self.__index_step(step, len(self.steps) - 1)
 
     def clear(self):
         self.steps.clear()
-        self.fluents = set()
-        self.actions = set()
+        self._reinit_index()
 
     def copy(self):
         return self.steps.copy()
@@ -96,33 +141,38 @@ class Trace:
         return self.steps.count(value)
 
     def extend(self, iterable: Iterable[Step]):
-        self.steps.extend(iterable)
         for step in iterable:
-            self.__update_actions_and_fluents(step)
+            self.append(step)
 
     def index(self, value: Step):
         return self.steps.index(value)
 
     def insert(self, index: int, item: Step):
+        # clamp the index the same way list.insert does
+        if index < 0:
+            index = max(0, index + len(self.steps))
+        index = min(index, len(self.steps))
         self.steps.insert(index, item)
-        self.__update_actions_and_fluents(item)
+        self.__shift_positions(index, 1)
+        self.__index_step(item, index)
 
     def pop(self):
         result = self.steps.pop()
-        self.__reinit_actions_and_fluents()
+        self.__unindex_step(result, len(self.steps))
         return result
 
     def remove(self, value: Step):
-        self.steps.remove(value)
-        self.__reinit_actions_and_fluents()
+        del self[self.steps.index(value)]
 
     def reverse(self):
         self.steps.reverse()
+        self._reinit_index()
 
     def sort(self, reverse: bool = False, key: Callable = lambda e: e.action.cost):
         self.steps.sort(reverse=reverse, key=key)
+        self._reinit_index()
 
-    def details(self, wrap=False):
+    def details(self, wrap=False, start: int = 0, stop: int = None):
         indent = " " * 2
         # Summarize class attributes
         details = Table.grid(expand=True)
@@ -150,7 +200,7 @@ class Trace:
         )
         steps.add_column("Action", overflow="ellipsis", no_wrap=(not wrap))
 
-        for step in self:
+        for step in self[start:stop]:
             action = step.action.details() if step.action else ""
             steps.add_row(str(step.index), step.state.details(), action)
 
@@ -158,50 +208,97 @@ class Trace:
 
         return details
 
-    def colorgrid(self, filter_func=lambda _: True, wrap=True):
-        colorgrid = Table(
-            title="Trace", box=None, show_edge=False, pad_edge=False, expand=False
-        )
-        colorgrid.add_column("Fluent", justify="right")
-        colorgrid.add_column(
-            header=Text("Step", justify="center"), overflow="fold", no_wrap=(not wrap)
-        )
-        colorgrid.add_row(
-            "",
-            "".join(
-                [
-                    "|" if i < len(self) and (i + 1) % 5 == 0 else " "
-                    for i in range(len(self))
-                ]
-            ),
-        )
-
-        static = self.get_static_fluents()
-        fluents = list(
-            filter(
-                filter_func,
-                sorted(
-                    self.fluents,
-                    key=lambda f: float("inf") if f in static else len(str(f)),
-                ),
-            )
-        )
+    def get_state_matrix(
+        self, fluents: Iterable = None, start: int = 0, stop: int = None
+    ) -> np.ndarray:
+        """Builds the state matrix of a window of steps of this trace.
 
-        for fluent in fluents:
-            step_str = ""
-            for step in self:
-                if step.state[fluent]:
-                    step_str += "[green]"
-                else:
-                    step_str += "[red]"
-                step_str += "■"
+        Args:
+            fluents (Iterable[Fluent]):
+                Optional; The fluents making up the rows of the matrix. Defaults
+                to the fluents of the trace, in no particular order.
+            start (int):
+                Optional; The position of the first step of the window.
+                Defaults to 0.
+            stop (int):
+                Optional; The position after the last step of the window.
+                Defaults to the end of the trace.
 
-            colorgrid.add_row(str(fluent), step_str)
+        Returns:
+            A (fluents x steps) `int8` matrix of the value of each fluent in each
+            step: 1 (true), 0 (false), or -1 if the fluent is not part of the
+            state.
+        """
+        fluents = list(self.fluents if fluents is None else fluents)
+        rows = {fluent: i for i, fluent in enumerate(fluents)}
+        columns = []
+        for step in self[start:stop]:
+            column = [heatmap.UNKNOWN] * len(fluents)
+            for fluent, value in step.state.items():
+                i = rows.get(fluent)
+                if i is not None:
+                    column[i] = heatmap.UNKNOWN if value is None else int(value)
+            columns.append(column)
+        return np.array(columns, dtype=np.int8).reshape(-1, len(fluents)).T
+
+    def colorgrid(
+        self, filter_func=lambda _: True, wrap=True, start: int = 0, stop: int = None
+    ):
+        fluents = [
+            f for f in sorted(self.fluents, key=lambda f: len(str(f))) if filter_func(f)
+        ]
+        values = self.get_state_matrix(fluents, start, stop)
+        # varying fluents first, static fluents last
+        order = heatmap.order_rows(values)
+        return heatmap.colorgrid(
+            [str(fluents[i]) for i in order],
+            values[order],
+            wrap=wrap,
+            offset=range(len(self))[start:stop].start,
+        )
 
-        return colorgrid
+    def export_heatmap(
+        self,
+        path: str,
+        filter_func=lambda _: True,
+        start: int = 0,
+        stop: int = None,
+        scale: int = None,
+    ):
+        """Exports a heat map of the fluent values in a window of steps of this
+        trace, without going through rich.
 
-    def get_printable(self, view="details", filter_func=lambda _: True, wrap=None):
-        """Returns a printable representation of the trace in the specified view."""
+        Args:
+            path (str):
+                The path of the heat map. Its extension selects the format:
+                ".txt" (plain text), ".html", or ".png".
+            filter_func (Callable):
+                Optional; A function used to filter the fluents to export.
+            start (int):
+                Optional; The position of the first step to export. Defaults
+                to 0.
+            stop (int):
+                Optional; The position after the last step to export. Defaults
+                to the end of the trace.
+            scale (int):
+                Optional; The size, in pixels, of each value of a PNG heat map.
+                Defaults to the largest size (up to 8) that keeps the image
+                within 4096 pixels.
+        """
+        fluents = sorted(f for f in self.fluents if filter_func(f))
+        values = self.get_state_matrix(fluents, start, stop)
+        heatmap.export(path, [str(f) for f in fluents], values, scale)
+
+    def get_printable(
+        self,
+        view="details",
+        filter_func=lambda _: True,
+        wrap=None,
+        start: int = 0,
+        stop: int = None,
+    ):
+        """Returns a printable representation of the trace in the specified view,
+        limited to the steps from `start` to `stop`."""
         views = ["details", "color", "actions"]
         if view not in views:
             warn(f'Invalid view {view}. Defaulting to "details".')
@@ -209,15 +306,25 @@ class Trace:
 
         if view == "details":
             if wrap is None: wrap = False
-            return self.details(wrap=wrap)
+            return self.details(wrap=wrap, start=start, stop=stop)
         elif view == "color":
             if wrap is None: wrap = True
-            return self.colorgrid(filter_func=filter_func, wrap=wrap)
+            return self.colorgrid(
+                filter_func=filter_func, wrap=wrap, start=start, stop=stop
+            )
         elif view == "actions":
-            return [step.action for step in self]
-
-
-    def print(self, view="details", filter_func=lambda _: True, wrap=None):
+            return [step.action for step in self[start:stop]]
+
+
+    def print(
+        self,
+        view="details",
+        filter_func=lambda _: True,
+        wrap=None,
+        start: int = 0,
+        stop: int = None,
+        page_size: int = None,
+    ):
         """Pretty prints the trace in the specified view.
 
         Arguments:
@@ -231,10 +338,34 @@ class Trace:
                 A function used to filter the fluents to be printed.
             wrap (bool):
                 Specifies whether or not to wrap the text in the printed output.
+            start (int):
+                Optional; The position of the first step to print. Defaults to 0.
+            stop (int):
+                Optional; The position after the last step to print. Defaults
+                to the end of the trace.
+            page_size (int):
+                Optional; The number of steps to print at a time. Defaults to
+                None (all the steps at once).
         """
         console = Console()
-        console.print(self.get_printable(view=view, filter_func=filter_func, wrap=wrap))
-        print()
+        steps = range(len(self))[start:stop]
+        page_size = page_size or max(len(steps), 1)
+        # an empty window still prints (empty) once
+        for page in range(steps.start, steps.stop, page_size) or [steps.start]:
+            console.print(
+                self.get_printable(
+                    view=view,
+                    filter_func=filter_func,
+                    wrap=wrap,
+                    start=page,
+                    stop=min(page + page_size, steps.stop),
+                )
+            )
+            print()
+
+    def _fluent_values(self, fluent):
+        """Retrieves the value of a fluent in each step of this trace."""
+        return [step.state[fluent] for step in self]
 
     def get_static_fluents(self):
         fstates = defaultdict(list)
@@ -249,26 +380,106 @@ class Trace:
 
         return static
 
-    def __update_actions_and_fluents(self, step: Step):
-        """Updates the actions and fluents stored in this trace with any new ones from
-        the provided step.
+    def __position(self, key: int) -> int:
+        if key < 0:
+            key += len(self.steps)
+        if not 0 <= key < len(self.steps):
+            raise IndexError("step index out of range")
+        return key
+
+    def __index_step(self, step: Step, position: int):
+        """Adds a step to the fluent and action indices of this trace.
 
         Args:
             step (Step):
-                The step to extract the possible new fluents and actions from.
+                The step to index.
+            position (int):
+                The position of the step in the trace. Positions of the steps
+                after it must already be shifted.
         """
-        self.fluents.update(step.state.keys())
+        prefix = self._cost_prefix
+        if prefix is not None and position == len(prefix) - 1:
+            # appended step: extend the prefix sums instead of discarding them
+            prefix.append(prefix[-1] + (step.action.cost if step.action else 0))
+        else:
+            self._cost_prefix = None
+        fingerprints = self._fingerprint_prefix
+        if fingerprints is not None and position == len(fingerprints) - 1:
+            fingerprints.append(extend(fingerprints[-1], step_digest(step)))
+        else:
+            self._fingerprint_prefix = None
+        keys = step.state.keys()
+        self._fluent_counts.update(keys)
+        self.fluents.update(keys)
         if step.action:
-            self.actions.add(step.action)
+            positions = self._action_positions.get(step.action)
+            if positions is None:
+                self._action_positions[step.action] = [position]
+                self.actions.add(step.action)
+            elif positions[-1] < position:
+                positions.append(position)
+            else:
+                insort(positions, position)
+
+    def __unindex_step(self, step: Step, position: int):
+        """Removes a step from the fluent and action indices of this trace.
 
-    def __reinit_actions_and_fluents(self):
-        """Reinitializes the actions and fluents stored in this trace, taking all current
-        steps into account.
+        Args:
+            step (Step):
+                The step to remove from the indices.
+            position (int):
+                The position the step had in the trace.
         """
+        prefix = self._cost_prefix
+        if prefix is not None and position == len(prefix) - 2:
+            # popped the last step: drop its prefix sum
+            prefix.pop()
+        else:
+            self._cost_prefix = None
+        fingerprints = self._fingerprint_prefix
+        if fingerprints is not None and position == len(fingerprints) - 2:
+            fingerprints.pop()
+        else:
+            self._fingerprint_prefix = None
+        counts = self._fluent_counts
+        for fluent in step.state.keys():
+            counts[fluent] -= 1
+            if counts[fluent] <= 0:
+                del counts[fluent]
+                self.fluents.discard(fluent)
+        if step.action:
+            positions = self._action_positions[step.action]
+            if positions[-1] == position:
+                positions.pop()
+            else:
+                positions.remove(position)
+            if not positions:
+                del self._action_positions[step.action]
+                self.actions.discard(step.action)
+
+    def __shift_positions(self, start: int, offset: int):
+        """Shifts the indexed positions of the steps at or after `start`."""
+        for positions in self._action_positions.values():
+            for i in range(bisect_left(positions, start), len(positions)):
+                positions[i] += offset
+
+    def _reinit_index(self):
+        """Reinitializes the fluent and action indices of this trace, taking all
+        current steps into account.
+        """
+        self._cost_prefix = None
+        self._fingerprint_prefix = None
+        self._fluent_counts = Counter()
+        self._action_positions: Dict[Action, List[int]] = {}
         self.fluents = set()
         self.actions = set()
-        for step in self.steps:
-            self.__update_actions_and_fluents(step)
+        for position, step in enumerate(self.steps):
+            self.__index_step(step, position)
+
+    def _positions(self, action: Action) -> List[int]:
+        """Retrieves the (sorted) positions of the steps that use the specified
+        action."""
+        return self._action_positions.get(action, [])
 
     def get_pre_states(self, action: Action):
         """Retrieves the list of states prior to the action in this trace.
@@ -281,11 +492,7 @@ class Trace:
             The set of states prior to the action being performed in this
             trace.
         """
-        prev_states = set()
-        for step in self:
-            if step.action == action:
-                prev_states.add(step.state)
-        return prev_states
+        return {self[i].state for i in self._positions(action)}
 
     def get_post_states(self, action: Action):
         """Retrieves the list of states after the action in this trace.
@@ -297,11 +504,7 @@ class Trace:
         Returns:
             The set of states after the action was performed in this trace.
         """
-        post_states = set()
-        for i, step in enumerate(self):
-            if step.action == action:
-                post_states.add(self[i + 1].state)
-        return post_states
+        return {self[i + 1].state for i in self._positions(action)}
 
     def get_sas_triples(self, action: Action) -> List[SAS]:
         """Retrieves the list of (S,A,S') triples for the action in this trace.
@@ -317,12 +520,41 @@ class Trace:
             A `SAS` object, containing the `pre_state`, `action`, and
             `post_state`.
         """
-        sas_triples = []
-        for i, step in enumerate(self):
-            if step.action == action:
-                triple = SAS(step.state, action, self[i + 1].state)
-                sas_triples.append(triple)
-        return sas_triples
+        return [
+            SAS(self[i].state, action, self[i + 1].state)
+            for i in self._positions(action)
+        ]
+
+    def get_all_sas_triples(self) -> Dict[Action, List[SAS]]:
+        """Retrieves the (S,A,S') triples of every action in this trace, in a
+        single pass over the trace.
+
+        Returns:
+            A mapping of each action to its list of `SAS` triples. A trailing
+            step whose action has no post-state does not produce a triple.
+        """
+        sas_triples = defaultdict(list)
+        prev = None
+        for step in self:
+            if prev is not None and prev.action:
+                sas_triples[prev.action].append(
+                    SAS(prev.state, prev.action, step.state)
+                )
+            prev = step
+        return dict(sas_triples)
+
+    def _step_costs(self) -> Iterable[int]:
+        """Retrieves the cost of the action of each step (0 if there is none)."""
+        return (step.action.cost if step.action else 0 for step in self.steps)
+
+    def _costs_prefix(self) -> List[int]:
+        """Retrieves the prefix sums of the step costs, where the i-th element is
+        the total cost of the first i steps. Built on first use, and kept up to
+        date by the `list` methods of the trace.
+        """
+        if self._cost_prefix is None:
+            self._cost_prefix = list(accumulate(chain([0], self._step_costs())))
+        return self._cost_prefix
 
     def get_total_cost(self):
         """Calculates the total cost of this trace.
@@ -330,11 +562,7 @@ class Trace:
         Returns:
             The total cost of all actions performed in the trace.
         """
-        sum = 0
-        for step in self.steps:
-            if step.action:
-                sum += step.action.cost
-        return sum
+        return self._costs_prefix()[-1]
 
     def get_slice_cost(self, start: int, end: int):
         """Calculates the total cost of a slice of this trace.
@@ -359,11 +587,44 @@ class Trace:
                 "The start boundary must be smaller than the end boundary."
             )
 
-        sum = 0
-        for i in range(start - 1, end):
-            if self[i].action:
-                sum += self[i].action.cost
-        return sum
+        prefix = self._costs_prefix()
+        return prefix[end] - prefix[start - 1]
+
+    def _step_digests(self) -> Iterable[int]:
+        """Retrieves the digest of each step (see `macq.trace.fingerprint`)."""
+        return (step_digest(step) for step in self.steps)
+
+    def _fingerprints(self) -> List[int]:
+        """Retrieves the fingerprints of the prefixes of this trace, where the
+        i-th element is the fingerprint of the first i steps. Built on first use,
+        and kept up to date by the `list` methods of the trace.
+        """
+        if self._fingerprint_prefix is None:
+            self._fingerprint_prefix = list(
+                accumulate(chain([EMPTY], self._step_digests()), extend)
+            )
+        return self._fingerprint_prefix
+
+    def fingerprint(self, length: int = None) -> int:
+        """Computes a stable 64-bit fingerprint of this trace.
+
+        The fingerprint is a rolling hash of the states and actions of the
+        steps (not of their indices), so traces with the same states and
+        actions have the same fingerprint, whatever their storage and the
+        process they were generated in. The fingerprints of all the prefixes of
+        the trace are computed at once and kept up to date as steps are
+        appended, so they are O(1) after the first call.
+
+        Args:
+            length (int):
+                Optional; The number of steps of the prefix to fingerprint.
+                Defaults to the whole trace.
+
+        Returns:
+            The fingerprint, as an integer.
+        """
+        fingerprints = self._fingerprints()
+        return fingerprints[-1 if length is None else length]
 
     def get_steps(self, action: Action):
         """Retrieves all the Steps in the trace that use the specified action.
@@ -376,11 +637,7 @@ class Trace:
             The set of steps that use the specified action.
 
         """
-        steps = set()
-        for step in self:
-            if step.action == action:
-                steps.add(action)
-        return steps
+        return {self[i] for i in self._positions(action)}
 
     def get_usage(self, action: Action):
         """Calculates how often an action was performed in this trace.
@@ -394,7 +651,7 @@ class Trace:
             as the number of occurences of the action divided by the length of
             the trace (number of steps).
         """
-        return len(self.get_steps(action)) / len(self)
+        return len(self._positions(action)) / len(self)
 
     def tokenize(self, Token: Type[Observation], **kwargs):
         """Tokenizes the steps in this trace.
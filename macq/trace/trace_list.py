@@ -1,22 +1,28 @@
+import csv
 from collections.abc import MutableSequence
-from typing import Callable, List, Type, Union
+from typing import Callable, Dict, Iterator, List, Tuple, Type, Union
 from warnings import warn
+import numpy as np
 
 from ..observation import Observation, ObservedTraceList
-from . import Action, Trace
+from . import Action, Fluent, Trace, ColumnarTrace, DeltaTrace, Vocabulary
+from ..utils import InconsistentStateFluents
 
 
 class TraceList(MutableSequence):
     """A sequence of traces.
 
     A `list`-like object, where each element is a `Trace` of the same planning
-    problem.
+    problem. The generator function is not pickled along with the traces.
 
     Attributes:
         traces (List[Trace]):
             The list of `Trace` objects.
         generator (Callable | None):
             The function used to generate the traces.
+        vocabulary (Vocabulary | None):
+            The vocabulary shared by the objects, fluents, and actions of the
+            traces.
     """
 
     class MissingGenerator(Exception):
@@ -31,11 +37,13 @@ class TraceList(MutableSequence):
 
     traces: List[Trace]
     generator: Union[Callable, None]
+    vocabulary: Union[Vocabulary, None]
 
     def __init__(
         self,
         traces: List[Trace] = None,
         generator: Callable = None,
+        vocabulary: Vocabulary = None,
     ):
         """Initializes a TraceList with a list of traces and a generator.
 
@@ -44,9 +52,17 @@ class TraceList(MutableSequence):
                 Optional; The list of `Trace` objects.
             generator (Callable):
                 Optional; The function used to generate the traces.
+            vocabulary (Vocabulary):
+                Optional; The vocabulary shared by the traces.
         """
         self.traces = [] if traces is None else traces
         self.generator = generator
+        self.vocabulary = vocabulary
+
+    def __getstate__(self):
+        # the generator is usually a closure over the planning problem of a
+        # generator, which cannot be pickled
+        return {**self.__dict__, "generator": None}
 
     def __getitem__(self, key: int):
         return self.traces[key]
@@ -88,6 +104,300 @@ class TraceList(MutableSequence):
 
         self.traces.extend([self.generator() for _ in range(num)])
 
+    def deduplicate(self, prefixes: bool = False) -> List[int]:
+        """Removes the duplicate traces, keeping the first occurrence of each.
+
+        Traces are compared by length and `Trace.fingerprint`, i.e. by the
+        states and actions of their steps, so this runs in O(total steps) (and
+        O(number of traces) once the fingerprints are computed).
+
+        Args:
+            prefixes (bool):
+                Optional; Also remove the traces that are a proper prefix of
+                another trace of the list. Defaults to False.
+
+        Returns:
+            The number of occurrences of each remaining trace, in order. A
+            removed prefix is counted as an occurrence of the first trace that
+            extends it.
+
+        Raises:
+            TypeError:
+                The trace list cannot be modified (e.g. a `LazyTraceList`).
+        """
+        counts: Dict[Tuple[int, int], int] = {}
+        kept: List[Tuple[Tuple[int, int], Trace]] = []
+        for trace in self:
+            key = (len(trace), trace.fingerprint())
+            if key in counts:
+                counts[key] += 1
+            else:
+                counts[key] = 1
+                kept.append((key, trace))
+
+        if prefixes:
+            # the first kept trace extending each proper prefix
+            extended: Dict[Tuple[int, int], Tuple[int, int]] = {}
+            for key, trace in kept:
+                fingerprints = trace._fingerprints()
+                for n in range(len(trace)):
+                    extended.setdefault((n, fingerprints[n]), key)
+            remaining = []
+            for key, trace in kept:
+                if key not in extended:
+                    remaining.append((key, trace))
+                    continue
+                longer = extended[key]
+                while longer in extended:
+                    longer = extended[longer]
+                counts[longer] += counts[key]
+            kept = remaining
+
+        self[:] = [trace for _, trace in kept]
+        return [counts[key] for key, _ in kept]
+
+    def to_columnar(self):
+        """Converts the traces to columnar storage, sharing this trace list's
+        vocabulary (a new one is created if the trace list has none).
+
+        Returns:
+            A new `TraceList` of `ColumnarTrace`s.
+        """
+        vocabulary = self.vocabulary if self.vocabulary is not None else Vocabulary()
+        return TraceList(
+            [ColumnarTrace.from_trace(trace, vocabulary) for trace in self],
+            generator=self.generator,
+            vocabulary=vocabulary,
+        )
+
+    def to_delta(self, checkpoint_interval: int = 64):
+        """Converts the traces to delta-encoded storage.
+
+        Args:
+            checkpoint_interval (int):
+                Optional; The number of steps between two full checkpoint
+                states. Defaults to 64.
+
+        Returns:
+            A new `TraceList` of `DeltaTrace`s.
+        """
+        return TraceList(
+            [DeltaTrace.from_trace(trace, checkpoint_interval) for trace in self],
+            generator=self.generator,
+            vocabulary=self.vocabulary,
+        )
+
+    def to_arrow(self):
+        """Converts the traces to an Apache Arrow table, with one row per step
+        and one boolean column per fluent. Requires pyarrow.
+
+        See `macq.trace.arrow.trace_list_to_arrow` for the layout of the table.
+
+        Returns:
+            A `pyarrow.Table`.
+        """
+        # Prevents circular importing
+        from .arrow import trace_list_to_arrow
+
+        return trace_list_to_arrow(self)
+
+    def to_parquet(self, path: str, **kwargs):
+        """Writes the traces to a Parquet file. Requires pyarrow.
+
+        Args:
+            path (str):
+                The path of the Parquet file.
+            **kwargs (keyword arguments):
+                Keyword arguments to pass to `pyarrow.parquet.write_table`.
+        """
+        from .arrow import to_parquet
+
+        to_parquet(self.to_arrow(), path, **kwargs)
+
+    @staticmethod
+    def from_arrow(table):
+        """Loads traces from an Arrow table written by `to_arrow`.
+
+        Args:
+            table (pyarrow.Table):
+                The table to load.
+
+        Returns:
+            A `TraceList` of `ColumnarTrace`s sharing a new vocabulary.
+        """
+        from .arrow import trace_list_from_arrow
+
+        return trace_list_from_arrow(table)
+
+    @staticmethod
+    def from_parquet(path: str):
+        """Loads traces from a Parquet file written by `to_parquet`.
+
+        Args:
+            path (str):
+                The path of the Parquet file.
+
+        Returns:
+            A `TraceList` of `ColumnarTrace`s sharing a new vocabulary.
+        """
+        from .arrow import read_parquet, trace_list_from_arrow
+
+        return trace_list_from_arrow(read_parquet(path))
+
+    def to_csv(
+        self, fname: str, act_col: str = "actions", plan_id_col: str = "plan_id"
+    ):
+        """Writes the traces to a csv trace file, readable by
+        `macq.generate.csv.load`.
+
+        Each step is written as a row holding the position of its trace (the
+        plan ID), its action (empty if none), and the value (0 or 1) of each
+        fluent. Traces are converted to columnar storage and written one at a
+        time. Fluents and actions are written as their name followed by the
+        details of their objects, e.g. "on object a object b".
+
+        Args:
+            fname (str):
+                The name of the trace file to write.
+            act_col (str):
+                Optional; The name of the action column. Defaults to "actions".
+            plan_id_col (str):
+                Optional; The name of the plan ID column. Defaults to "plan_id".
+
+        Raises:
+            InconsistentStateFluents:
+                The states of the traces do not all range over the same fluents.
+        """
+
+        def label(name, objects):
+            return " ".join([name] + [o.details() for o in objects])
+
+        vocabulary = self.vocabulary if self.vocabulary is not None else Vocabulary()
+        with open(fname, "w", newline="") as f:
+            writer = csv.writer(f)
+            columns = None
+            for plan_id, trace in enumerate(self):
+                steps = ColumnarTrace.from_trace(trace, vocabulary).steps
+                if not len(steps):
+                    continue
+                fluent_ids = steps.fluent_ids.tolist()
+                if columns is None:
+                    # the fluents of the first trace make up the header
+                    columns = {fluent_id: j for j, fluent_id in enumerate(fluent_ids)}
+                    writer.writerow(
+                        [plan_id_col, act_col]
+                        + [label(f.name, f.objects) for f in steps.columns]
+                    )
+                if len(fluent_ids) != len(columns) or not all(
+                    i in columns for i in fluent_ids
+                ):
+                    raise InconsistentStateFluents(steps[0].state)
+                values = np.empty((len(steps), len(columns)), dtype="<U1")
+                values[:, [columns[i] for i in fluent_ids]] = np.where(
+                    steps.states, "1", "0"
+                )
+                action_ids = steps.action_ids.tolist()
+                labels = {-1: ""}
+                for i in set(action_ids) - labels.keys():
+                    action = vocabulary.actions[i]
+                    labels[i] = label(action.name, action.obj_params)
+                writer.writerows(
+                    [plan_id, labels[action_id], *row]
+                    for action_id, row in zip(action_ids, values.tolist())
+                )
+            if columns is None:
+                writer.writerow([plan_id_col, act_col])
+
+    def to_transition_arrays(
+        self,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Vocabulary]:
+        """Exports the (S,A,S') transitions of the traces as arrays.
+
+        Each state is encoded as fluent IDs once, whether it is a pre-state, a
+        post-state, or both, and the matrices are filled with one indexed
+        assignment per trace, without building `SAS` objects. The state
+        matrices of `ColumnarTrace`s are used as is.
+
+        Returns:
+            A `(pre, action_ids, post, vocabulary)` tuple. `pre` and `post` are
+            uint8 (transitions x fluents) matrices of the pre- and post-states,
+            whose column j is the value (0 or 1) of the fluent of ID j in
+            `vocabulary`; fluents that are not part of a state are 0.
+            `action_ids` is the int32 vector of the vocabulary ID of the action
+            of each transition. Transitions are in the order of the traces and
+            steps. The vocabulary is this trace list's, if it has one.
+        """
+        vocabulary = self.vocabulary if self.vocabulary is not None else Vocabulary()
+        fluent_ids: Dict[Fluent, int] = {}
+
+        def fluent_id(fluent: Fluent) -> int:
+            i = fluent_ids.get(fluent)
+            if i is None:
+                i = vocabulary.fluent_id(vocabulary.intern_fluent(fluent))
+                fluent_ids[fluent] = i
+            return i
+
+        def action_id(action: Action) -> int:
+            return vocabulary.action_id(vocabulary.intern_action(action))
+
+        # (rows, columns, values) of the pre- and post-states, and action IDs
+        pre_cells, post_cells, actions = [], [], []
+        num = 0
+        for trace in self:
+            if isinstance(trace, ColumnarTrace):
+                steps = trace.steps
+                columns, trace_actions = steps.fluent_ids, steps.action_ids
+                if trace.vocabulary is not vocabulary:
+                    columns = np.array(
+                        [fluent_id(f) for f in steps.columns], dtype=np.int64
+                    )
+                    action_map = np.array(
+                        [action_id(a) for a in trace.vocabulary.actions] + [-1],
+                        dtype=np.int64,
+                    )
+                    trace_actions = action_map[trace_actions]
+                # steps with an action and a post-state
+                positions = np.flatnonzero(trace_actions[:-1] >= 0)
+                rows = np.repeat(np.arange(num, num + len(positions)), len(columns))
+                cols = np.tile(columns, len(positions))
+                states = steps.states
+                pre_cells.append((rows, cols, states[positions].ravel()))
+                post_cells.append((rows, cols, states[positions + 1].ravel()))
+                actions.append(trace_actions[positions])
+                num += len(positions)
+                continue
+
+            steps = list(trace)
+            encoded = []
+            keys, ids = None, None
+            for step in steps:
+                # consecutive states usually range over the same fluents
+                state_keys = list(step.state.keys())
+                if state_keys != keys:
+                    keys = state_keys
+                    ids = np.fromiter(map(fluent_id, keys), dtype=np.int64)
+                encoded.append((ids, np.fromiter(step.state.values(), dtype=bool)))
+            positions = [i for i in range(len(steps) - 1) if steps[i].action]
+            for cells, offset in ((pre_cells, 0), (post_cells, 1)):
+                states = [encoded[i + offset] for i in positions]
+                sizes = [len(ids) for ids, _ in states]
+                rows = np.repeat(np.arange(num, num + len(positions)), sizes)
+                cols = np.concatenate([ids for ids, _ in states] + [[]])
+                values = np.concatenate([v for _, v in states] + [[]])
+                cells.append((rows, cols.astype(np.int64), values))
+            actions.append(
+                np.array([action_id(steps[i].action) for i in positions], np.int64)
+            )
+            num += len(positions)
+
+        pre = np.zeros((num, len(vocabulary.fluents)), dtype=np.uint8)
+        post = np.zeros_like(pre)
+        for matrix, cells in ((pre, pre_cells), (post, post_cells)):
+            for rows, cols, values in cells:
+                matrix[rows, cols] = values
+        action_ids = np.concatenate(actions + [[]]).astype(np.int32)
+        return pre, action_ids, post, vocabulary
+
     def get_usage(self, action: Action):
         """Calculates how often an action was performed in each of the traces.
 
@@ -105,6 +415,20 @@ class TraceList(MutableSequence):
             usages.append(trace.get_usage(action))
         return usages
 
+    def get_costs(self) -> np.ndarray:
+        """Calculates the total cost of each of the traces.
+
+        Returns:
+            An integer array of the total cost of each trace, in order. Useful
+            to sort or filter the traces, e.g. with `np.argsort` or
+            `np.flatnonzero(costs <= budget)`.
+        """
+        return np.fromiter(
+            (trace.get_total_cost() for trace in self),
+            dtype=np.int64,
+            count=len(self),
+        )
+
     def get_fluents(self):
         """Retrieves a set of all fluents used in child traces.
 
@@ -112,15 +436,17 @@ class TraceList(MutableSequence):
             A set of all fluents used in child traces.
         """
         fluents = set()
-        for trace in self.traces:
+        for trace in self:
             for step in trace:
-                fluents.update(step.state.fluents)
+                fluents.update(step.state.keys())
         return fluents
 
     def tokenize(
         self,
         Token: Type[Observation],
         ObsLists: Type[ObservedTraceList] = ObservedTraceList,
+        workers: int = None,
+        seed: int = None,
         **kwargs,
     ):
         """Tokenizes the steps in this trace.
@@ -131,10 +457,52 @@ class TraceList(MutableSequence):
                 for the steps.
             ObsLists (Type[ObservationLists]):
                 The type of `ObservationLists` to be used. Defaults to the base `ObservationLists`.
+            workers (int):
+                Optional; The number of processes to shard the traces across.
+                Only supported by the base `ObservedTraceList`. Defaults to None
+                (tokenize in this process).
+            seed (int):
+                Optional; The seed of the random tokens (e.g.
+                `PartialObservation`). With a seed, the tokens are the same
+                whatever the number of workers. Only supported by the base
+                `ObservedTraceList`. Defaults to None.
         """
+        if workers is not None:
+            kwargs["workers"] = workers
+        if seed is not None:
+            kwargs["seed"] = seed
         return ObsLists(self, Token, **kwargs)
 
-    def print(self, view="details", filter_func=lambda _: True, wrap=None):
+    def iter_tokens(
+        self, Token: Type[Observation], **kwargs
+    ) -> Iterator[List[Observation]]:
+        """Tokenizes the traces one at a time, as they are iterated over.
+
+        Unlike `tokenize`, the tokens of previous traces are not kept, so
+        streaming a `LazyTraceList` through this method uses constant memory.
+
+        Args:
+            Token (Observation):
+                A subclass of `Observation`, defining the method of tokenization
+                for the steps.
+            **kwargs (keyword arguments):
+                Keyword arguments to pass into the Token function as parameters.
+
+        Returns:
+            An iterator over the list of observation tokens of each trace.
+        """
+        for trace in self:
+            yield trace.tokenize(Token, **kwargs)
+
+    def print(
+        self,
+        view="details",
+        filter_func=lambda _: True,
+        wrap=None,
+        start: int = 0,
+        stop: int = None,
+        page_size: int = None,
+    ):
         """Pretty prints the trace list in the specified view.
 
         Arguments:
@@ -144,6 +512,15 @@ class TraceList(MutableSequence):
                 color grid, mapping fluents in a step to either red or green
                 corresponding to the truth value. "actions" prints the actions
                 in the traces.
+            start (int):
+                Optional; The position of the first step of each trace to print.
+                Defaults to 0.
+            stop (int):
+                Optional; The position after the last step of each trace to
+                print. Defaults to the end of each trace.
+            page_size (int):
+                Optional; The number of steps to print at a time. Defaults to
+                None (all the steps at once).
         """
         views = ["details", "color", "actions"]
         if view not in views:
@@ -151,4 +528,4 @@ class TraceList(MutableSequence):
             view = "details"
 
         for trace in self:
-            trace.print(view, filter_func, wrap)
+            trace.print(view, filter_func, wrap, start, stop, page_size)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+import json
+import mmap
+import struct
+import zlib
+from collections.abc import Sequence
+from typing import Iterable
+import numpy as np
+from . import Trace, ColumnarTrace, TraceList, Vocabulary
+from ..utils import InvalidTraceStore
+
+
+class TraceStore(Sequence):
+    """A read-only, memory-mapped binary store of traces.
+
+    A `list`-like object of `ColumnarTrace`s, backed by a file written with
+    `TraceStore.write`. The file is memory-mapped, and the i-th trace is only
+    read (and decompressed) when `store[i]` is accessed, so stores larger than
+    memory can be opened instantly and read in any order.
+
+    The file is laid out as:
+        - the magic bytes,
+        - one block per trace: its number of steps and of fluents, the
+          vocabulary IDs of its fluents, the vocabulary ID of each step's action
+          (-1 for none), the index of each step, and its states packed as one
+          bit-row per step. Blocks may be zlib-compressed.
+        - a JSON header holding the vocabulary (as the tables of
+          `Vocabulary._state`),
+        - the offset of each block,
+        - a footer locating the header.
+
+    Attributes:
+        path (str):
+            The path of the store.
+        vocabulary (Vocabulary):
+            The vocabulary indexing the fluents and actions of the traces.
+        compressed (bool):
+            Whether the trace blocks are compressed.
+    """
+
+    MAGIC = b"MACQTRC\x01"
+    # header offset, header length, number of traces, magic
+    FOOTER = struct.Struct("<QQQ8s")
+    BLOCK_HEADER = struct.Struct("<II")
+
+    def __init__(self, path: str):
+        """Opens a trace store.
+
+        Args:
+            path (str):
+                The path of the store.
+
+        Raises:
+            InvalidTraceStore:
+                The file is not a valid trace store.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mmap)
+        if size < len(self.MAGIC) + self.FOOTER.size or (
+            self._mmap[: len(self.MAGIC)] != self.MAGIC
+        ):
+            self.close()
+            raise InvalidTraceStore(path)
+        header_offset, header_len, num_traces, magic = self.FOOTER.unpack_from(
+            self._mmap, size - self.FOOTER.size
+        )
+        if magic != self.MAGIC:
+            self.close()
+            raise InvalidTraceStore(path)
+        header = json.loads(self._mmap[header_offset : header_offset + header_len])
+        self.compressed = header["compressed"]
+        self.vocabulary = Vocabulary._from_state(header["vocabulary"])
+        self._offsets = np.frombuffer(
+            self._mmap,
+            dtype="<u8",
+            count=num_traces + 1,
+            offset=header_offset + header_len,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Closes the memory map of the store. Traces already read remain
+        valid."""
+        self._offsets = None
+        self._mmap.close()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("trace index out of range")
+        start, end = int(self._offsets[key]), int(self._offsets[key + 1])
+        if self.compressed:
+            return self._read_block(zlib.decompress(self._mmap[start:end]), 0)
+        return self._read_block(self._mmap, start)
+
+    def _read_block(self, buffer, offset: int) -> ColumnarTrace:
+        num_steps, num_fluents = self.BLOCK_HEADER.unpack_from(buffer, offset)
+        offset += self.BLOCK_HEADER.size
+        fluent_ids = np.frombuffer(buffer, "<u4", num_fluents, offset)
+        offset += fluent_ids.nbytes
+        action_ids = np.frombuffer(buffer, "<i4", num_steps, offset)
+        offset += action_ids.nbytes
+        indices = np.frombuffer(buffer, "<i8", num_steps, offset)
+        offset += indices.nbytes
+        row_bytes = (num_fluents + 7) // 8
+        packed = np.frombuffer(buffer, np.uint8, num_steps * row_bytes, offset)
+        states = np.unpackbits(
+            packed.reshape(num_steps, row_bytes),
+            axis=1,
+            count=num_fluents,
+            bitorder="little",
+        ).astype(bool)
+        return ColumnarTrace.from_arrays(
+            self.vocabulary,
+            fluent_ids.astype(np.int64),
+            states,
+            action_ids.astype(np.int64),
+            indices.copy(),
+        )
+
+    def to_trace_list(self) -> TraceList:
+        """Reads every trace of the store.
+
+        Returns:
+            A `TraceList` of the `ColumnarTrace`s in the store.
+        """
+        return TraceList(list(self), vocabulary=self.vocabulary)
+
+    @classmethod
+    def _write_block(cls, trace: ColumnarTrace) -> bytes:
+        steps = trace.steps
+        packed = np.packbits(steps.states, axis=1, bitorder="little")
+        return b"".join(
+            [
+                cls.BLOCK_HEADER.pack(len(steps), len(steps.fluent_ids)),
+                steps.fluent_ids.astype("<u4").tobytes(),
+                steps.action_ids.astype("<i4").tobytes(),
+                steps.indices.astype("<i8").tobytes(),
+                packed.tobytes(),
+            ]
+        )
+
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        traces: Iterable[Trace],
+        vocabulary: Vocabulary = None,
+        compress: bool = False,
+    ):
+        """Writes traces to a trace store.
+
+        Traces are written one at a time, so a `LazyTraceList` can be written
+        without holding all its traces in memory. All the states of a trace must
+        range over the same fluents.
+
+        Args:
+            path (str):
+                The path of the store to write.
+            traces (Iterable[Trace]):
+                The traces to write.
+            vocabulary (Vocabulary):
+                Optional; The vocabulary to index the fluents and actions of the
+                traces with. Defaults to the vocabulary of `traces` if it is a
+                `TraceList` with one, or a new vocabulary.
+            compress (bool):
+                Optional; Whether to zlib-compress each trace block. Defaults to
+                False.
+
+        Raises:
+            InconsistentStateFluents:
+                The states of a trace do not range over the same fluents.
+        """
+        if vocabulary is None:
+            vocabulary = getattr(traces, "vocabulary", None)
+        if vocabulary is None:
+            vocabulary = Vocabulary()
+        with open(path, "wb") as f:
+            f.write(cls.MAGIC)
+            offsets = [f.tell()]
+            for trace in traces:
+                block = cls._write_block(ColumnarTrace.from_trace(trace, vocabulary))
+                f.write(zlib.compress(block) if compress else block)
+                offsets.append(f.tell())
+            # the vocabulary is written last, once every trace has been interned
+            header = json.dumps(
+                {"compressed": compress, "vocabulary": vocabulary._state()}
+            ).encode()
+            header_offset = f.tell()
+            f.write(header)
+            f.write(np.array(offsets, dtype="<u8").tobytes())
+            f.write(
+                cls.FOOTER.pack(header_offset, len(header), len(offsets) - 1, cls.MAGIC)
+            )
@@ -0,0 +1,366 @@
+import pickle
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+from .fluent import PlanningObject, Fluent
+from .action import Action
+
+# The vocabularies shared with the processes of a pool, by ID. Shared
+# vocabularies, and the fluents and actions interned in them, are pickled by
+# reference instead of by value (see `Vocabulary.shared`).
+_shared: Dict[str, "Vocabulary"] = {}
+
+# (ID, state) of a shared vocabulary, used to install it in another process
+SharedHandle = Tuple[str, tuple]
+
+
+def _shared_vocabulary(shared_id: str) -> "Vocabulary":
+    try:
+        return _shared[shared_id]
+    except KeyError:
+        raise pickle.UnpicklingError(
+            f"Vocabulary {shared_id} is not shared with this process."
+        ) from None
+
+
+def _shared_entry(shared_id: str, kind: str, entry_id: int):
+    return getattr(_shared_vocabulary(shared_id), kind)[entry_id]
+
+
+def shared_reference(entry, kind: str):
+    """Retrieves the arguments of `_shared_entry` referencing an interned fluent
+    or action (`kind` is "fluents" or "actions"), or None if the entry is not
+    part of a shared vocabulary."""
+    for shared_id, vocabulary in _shared.items():
+        entry_id = getattr(vocabulary, f"_{kind[:-1]}_ids").get(entry)
+        if (
+            entry_id is not None
+            and getattr(vocabulary, kind)[entry_id] is entry
+            and entry_id < vocabulary._shared_sizes[kind == "actions"]
+        ):
+            return shared_id, kind, entry_id
+    return None
+
+
+def install_shared(handle: Optional[SharedHandle]):
+    """Installs a shared vocabulary in this process, so it can be unpickled by
+    reference. Meant to be the initializer of a process pool, with the handle
+    yielded by `Vocabulary.shared`. Does nothing if the handle is None, or if
+    the vocabulary is already installed (e.g. in a forked process).
+    """
+    if handle is None or handle[0] in _shared:
+        return
+    shared_id, state = handle
+    vocabulary = Vocabulary._from_state(state)
+    vocabulary._shared_id = shared_id
+    vocabulary._shared_sizes = vocabulary._sizes()
+    _shared[shared_id] = vocabulary
+
+
+class Vocabulary:
+    """A shared vocabulary of planning objects, fluents, and actions.
+
+    Interns `PlanningObject`, `Fluent`, and `Action` instances, so each distinct
+    object, fluent, or action is represented by a single instance. Every
+    interned instance is given a dense integer ID (its position in the
+    corresponding list) and a precomputed hash, making hashing and equality
+    checks O(1). Interned instances are shared, and must not be mutated.
+
+    A vocabulary is pickled as compact tables of names and IDs. Within
+    `shared`, it is instead pickled by reference, along with the fluents and
+    actions interned in it, so process pools only send it once per process.
+
+    Attributes:
+        objects (List[PlanningObject]):
+            The interned planning objects, indexed by ID.
+        fluents (List[Fluent]):
+            The interned fluents, indexed by ID.
+        actions (List[Action]):
+            The interned actions, indexed by ID.
+    """
+
+    def __init__(self):
+        """Initializes an empty Vocabulary."""
+        self.objects: List[PlanningObject] = []
+        self.fluents: List[Fluent] = []
+        self.actions: List[Action] = []
+        # fluents and actions are indexed both by their interned instance and by
+        # a (name, objects) key, so lookups never have to build a new instance
+        self._object_ids: Dict[Hashable, int] = {}
+        self._fluent_ids: Dict[Hashable, int] = {}
+        self._action_ids: Dict[Hashable, int] = {}
+        self._shared_id: Optional[str] = None
+        self._shared_sizes: Tuple[int, int] = (0, 0)
+
+    def __len__(self):
+        return len(self.fluents)
+
+    def __contains__(self, item):
+        if isinstance(item, Fluent):
+            return item in self._fluent_ids
+        if isinstance(item, Action):
+            return item in self._action_ids
+        if isinstance(item, PlanningObject):
+            return (item.obj_type, item.name) in self._object_ids
+        return False
+
+    def _sizes(self) -> Tuple[int, int]:
+        return len(self.fluents), len(self.actions)
+
+    def _state(self) -> tuple:
+        """Retrieves the content of this vocabulary as tables of names and IDs."""
+        object_ids = {id(o): i for i, o in enumerate(self.objects)}
+        fluent_ids = self._fluent_ids
+
+        def ids(fluents):
+            return None if fluents is None else [fluent_ids[f] for f in fluents]
+
+        return (
+            [(o.obj_type, o.name) for o in self.objects],
+            [(f.name, [object_ids[id(o)] for o in f.objects]) for f in self.fluents],
+            [
+                (
+                    a.name,
+                    [object_ids[id(o)] for o in a.obj_params],
+                    a.cost,
+                    ids(a.precond),
+                    ids(a.add),
+                    ids(a.delete),
+                )
+                for a in self.actions
+            ],
+        )
+
+    @classmethod
+    def _from_state(cls, state: tuple) -> "Vocabulary":
+        """Rebuilds a vocabulary from the tables of `_state`, with the same IDs."""
+        objects, fluents, actions = state
+        vocabulary = cls()
+        for obj_type, name in objects:
+            vocabulary.object(obj_type, name)
+        objs = vocabulary.objects
+        for name, object_ids in fluents:
+            vocabulary.fluent(name, [objs[i] for i in object_ids])
+        interned = vocabulary.fluents
+
+        def fluent_set(fluent_ids):
+            return None if fluent_ids is None else {interned[i] for i in fluent_ids}
+
+        for name, object_ids, cost, precond, add, delete in actions:
+            vocabulary.action(
+                name,
+                [objs[i] for i in object_ids],
+                cost,
+                fluent_set(precond),
+                fluent_set(add),
+                fluent_set(delete),
+            )
+        return vocabulary
+
+    def __reduce__(self):
+        if self._shared_id is not None and self._sizes() == self._shared_sizes:
+            return _shared_vocabulary, (self._shared_id,)
+        return Vocabulary._from_state, (self._state(),)
+
+    @contextmanager
+    def shared(self) -> Iterator[SharedHandle]:
+        """Shares this vocabulary with the processes of a pool.
+
+        Within this context, the vocabulary and the fluents and actions interned
+        in it are pickled as references (IDs), which processes resolve to their
+        own copy of the vocabulary. The copy is installed once per process, by
+        passing `install_shared` and the yielded handle as the initializer of
+        the pool. Entries interned after the vocabulary is shared are pickled
+        by value, as is the vocabulary itself once it has grown.
+
+        Example:
+            with vocabulary.shared() as handle, ProcessPoolExecutor(
+                initializer=install_shared, initargs=(handle,)
+            ) as pool:
+                ...
+
+        Yields:
+            The handle to install the vocabulary with.
+        """
+        if self._shared_id is not None:
+            # already shared, e.g. by an enclosing pool
+            yield self._shared_id, self._state()
+            return
+        shared_id = uuid4().hex
+        handle = (shared_id, self._state())
+        self._shared_id, self._shared_sizes = shared_id, self._sizes()
+        _shared[shared_id] = self
+        try:
+            yield handle
+        finally:
+            del _shared[shared_id]
+            self._shared_id = None
+
+    @staticmethod
+    def _fluent_key(name: str, objects: List[PlanningObject]):
+        return (name, tuple((o.obj_type, o.name) for o in objects))
+
+    def object(self, obj_type: str, name: str) -> PlanningObject:
+        """Retrieves the interned planning object with the given type and name,
+        interning a new one if necessary.
+
+        Args:
+            obj_type (str):
+                The type of the object.
+            name (str):
+                The name of the object.
+
+        Returns:
+            The interned `PlanningObject`.
+        """
+        key = (obj_type, name)
+        obj_id = self._object_ids.get(key)
+        if obj_id is None:
+            obj_id = len(self.objects)
+            self.objects.append(PlanningObject(obj_type, name))
+            self._object_ids[key] = obj_id
+        return self.objects[obj_id]
+
+    def intern_object(self, obj: PlanningObject) -> PlanningObject:
+        """Interns a planning object.
+
+        Args:
+            obj (PlanningObject):
+                The object to intern.
+
+        Returns:
+            The interned `PlanningObject` equal to `obj`.
+        """
+        return self.object(obj.obj_type, obj.name)
+
+    def fluent(self, name: str, objects: List[PlanningObject]) -> Fluent:
+        """Retrieves the interned fluent with the given name and objects,
+        interning a new one if necessary.
+
+        Args:
+            name (str):
+                The name of the fluent.
+            objects (List[PlanningObject]):
+                The objects the fluent applies to.
+
+        Returns:
+            The interned `Fluent`.
+        """
+        key = self._fluent_key(name, objects)
+        fluent_id = self._fluent_ids.get(key)
+        if fluent_id is None:
+            fluent = Fluent(name, [self.intern_object(o) for o in objects])
+            fluent._hash = hash(str(fluent))
+            fluent_id = len(self.fluents)
+            self.fluents.append(fluent)
+            self._fluent_ids[key] = fluent_id
+            self._fluent_ids[fluent] = fluent_id
+        return self.fluents[fluent_id]
+
+    def intern_fluent(self, fluent: Fluent) -> Fluent:
+        """Interns a fluent.
+
+        Args:
+            fluent (Fluent):
+                The fluent to intern.
+
+        Returns:
+            The interned `Fluent` equal to `fluent`.
+        """
+        return self.fluent(fluent.name, fluent.objects)
+
+    def _intern_fluent_set(self, fluents: Optional[Set[Fluent]]):
+        if fluents is None:
+            return None
+        return {self.intern_fluent(f) for f in fluents}
+
+    def action(
+        self,
+        name: str,
+        obj_params: List[PlanningObject],
+        cost: int = 0,
+        precond: Optional[Set[Fluent]] = None,
+        add: Optional[Set[Fluent]] = None,
+        delete: Optional[Set[Fluent]] = None,
+    ) -> Action:
+        """Retrieves the interned action with the given name and parameters,
+        interning a new one if necessary. The cost, preconditions, and effects
+        are only used when the action is first interned.
+
+        Args:
+            name (str):
+                The name of the action.
+            obj_params (List[PlanningObject]):
+                The objects the action acts on.
+            cost (int):
+                Optional; The cost to perform the action. Defaults to 0.
+            precond (Set[Fluent]):
+                Optional; The set of Fluents that make up the precondition.
+            add (Set[Fluent]):
+                Optional; The set of Fluents that make up the add effects.
+            delete (Set[Fluent]):
+                Optional; The set of Fluents that make up the delete effects.
+
+        Returns:
+            The interned `Action`.
+        """
+        key = self._fluent_key(name, obj_params)
+        action_id = self._action_ids.get(key)
+        if action_id is None:
+            action = Action(
+                name,
+                [self.intern_object(o) for o in obj_params],
+                cost,
+                precond=self._intern_fluent_set(precond),
+                add=self._intern_fluent_set(add),
+                delete=self._intern_fluent_set(delete),
+            )
+            action._hash = hash(action.details())
+            action_id = len(self.actions)
+            self.actions.append(action)
+            self._action_ids[key] = action_id
+            self._action_ids[action] = action_id
+        return self.actions[action_id]
+
+    def intern_action(self, action: Action) -> Action:
+        """Interns an action.
+
+        Args:
+            action (Action):
+                The action to intern.
+
+        Returns:
+            The interned `Action` equal to `action`.
+        """
+        return self.action(
+            action.name,
+            action.obj_params,
+            action.cost,
+            precond=action.precond,
+            add=action.add,
+            delete=action.delete,
+        )
+
+    def object_id(self, obj: PlanningObject) -> int:
+        """Retrieves the ID of an interned planning object.
+
+        Raises:
+            KeyError: The object is not part of this vocabulary.
+        """
+        return self._object_ids[(obj.obj_type, obj.name)]
+
+    def fluent_id(self, fluent: Fluent) -> int:
+        """Retrieves the ID of an interned fluent.
+
+        Raises:
+            KeyError: The fluent is not part of this vocabulary.
+        """
+        return self._fluent_ids[fluent]
+
+    def action_id(self, action: Action) -> int:
+        """Retrieves the ID of an interned action.
+
+        Raises:
+            KeyError: The action is not part of this vocabulary.
+        """
+        return self._action_ids[action]
@@ -1,14 +1,28 @@
-from .timer import set_timer_throw_exc, basic_timer, TraceSearchTimeOut, InvalidTime
+from .timer import (
+    Deadline,
+    set_timer_throw_exc,
+    basic_timer,
+    TraceSearchTimeOut,
+    InvalidTime,
+)
 from .complex_encoder import ComplexEncoder
 from .common_errors import PercentError
-from .trace_errors import InvalidPlanLength, InvalidNumberOfTraces
+from .trace_errors import (
+    InvalidPlanLength,
+    InvalidNumberOfTraces,
+    InconsistentStateFluents,
+    InvalidTraceStore,
+    InvalidTraceTable,
+)
 from .trace_utils import set_num_traces, set_plan_length
 from .tokenization_errors import TokenizationError
 from .progress import progress
+from .slice_view import SliceView
 
 # from .tokenization_utils import extract_fluent_subset
 
 __all__ = [
+    "Deadline",
     "set_timer_throw_exc",
     "basic_timer",
     "TraceSearchTimeOut",
@@ -19,6 +33,10 @@ __all__ = [
     "set_plan_length",
     "InvalidPlanLength",
     "InvalidNumberOfTraces",
+    "InconsistentStateFluents",
+    "InvalidTraceStore",
+    "InvalidTraceTable",
     "TokenizationError",
     "progress",
+    "SliceView",
 ]
@@ -0,0 +1,174 @@
+import struct
+import zlib
+from html import escape
+from typing import List, Sequence, Tuple
+import numpy as np
+from rich.table import Table
+from rich.text import Span, Text
+
+# The values of a state matrix. Unknown values are hidden (or missing) fluents
+# of partial observations.
+TRUE, FALSE, UNKNOWN = 1, 0, -1
+
+# The RGB colours of unknown, false, and true values (indexed by value + 1)
+PALETTE = np.array([[190, 190, 190], [200, 30, 30], [30, 160, 30]], dtype=np.uint8)
+
+
+def order_rows(values: np.ndarray) -> np.ndarray:
+    """Orders the rows of a state matrix with the varying fluents first, then the
+    static ones (those with the same value in every step)."""
+    if values.shape[1] == 0:
+        return np.arange(len(values))
+    static = (values == values[:, :1]).all(axis=1)
+    return np.argsort(static, kind="stable")
+
+
+def _runs(row: np.ndarray) -> List[Tuple[int, int, int]]:
+    """Splits a row of values into (value, start, end) runs of equal values."""
+    if len(row) == 0:
+        return []
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(row)) + 1, [len(row)]))
+    starts, ends = bounds[:-1], bounds[1:]
+    return list(zip(row[starts].tolist(), starts.tolist(), ends.tolist()))
+
+
+def colorgrid(
+    labels: Sequence[str],
+    values: np.ndarray,
+    wrap: bool = True,
+    offset: int = 0,
+    title: str = "Trace",
+) -> Table:
+    """Builds a rich color grid of a (fluents x steps) state matrix.
+
+    Each row is rendered as one style per run of equal values rather than one
+    per step, which keeps the markup small for long traces.
+
+    Args:
+        labels (Sequence[str]):
+            The label of each row.
+        values (np.ndarray):
+            The (fluents x steps) state matrix of TRUE, FALSE, and UNKNOWN
+            values.
+        wrap (bool):
+            Optional; Whether to wrap the rows. Defaults to True.
+        offset (int):
+            Optional; The position of the first step in the trace, used to
+            place the step ruler. Defaults to 0.
+        title (str):
+            Optional; The title of the grid. Defaults to "Trace".
+
+    Returns:
+        The color grid, as a rich `Table`.
+    """
+    styles = {TRUE: "green", FALSE: "red", UNKNOWN: "grey50"}
+    grid = Table(title=title, box=None, show_edge=False, pad_edge=False, expand=False)
+    grid.add_column("Fluent", justify="right")
+    grid.add_column(
+        header=Text("Step", justify="center"), overflow="fold", no_wrap=(not wrap)
+    )
+    num_steps = values.shape[1]
+    grid.add_row(
+        "",
+        "".join(
+            "|" if (offset + i + 1) % 5 == 0 else " " for i in range(num_steps)
+        ),
+    )
+    cells = "■" * num_steps
+    for label, row in zip(labels, values):
+        text = Text(cells)
+        text.spans = [
+            Span(start, end, styles[value]) for value, start, end in _runs(row)
+        ]
+        grid.add_row(label, text)
+    return grid
+
+
+def to_text(labels: Sequence[str], values: np.ndarray) -> str:
+    """Renders a state matrix as plain text, one line per fluent, with "#" for
+    true, "." for false, and "?" for unknown values."""
+    num_steps = values.shape[1]
+    if num_steps:
+        chars = np.array(["?", ".", "#"])[values + 1]
+        # view each row of characters as a single string
+        rows = np.ascontiguousarray(chars).view(f"<U{num_steps}").ravel().tolist()
+    else:
+        rows = [""] * len(values)
+    width = max((len(label) for label in labels), default=0)
+    lines = [f"{label:>{width}} {row}" for label, row in zip(labels, rows)]
+    return "\n".join(lines) + "\n"
+
+
+def to_html(labels: Sequence[str], values: np.ndarray, title: str = "Trace") -> str:
+    """Renders a state matrix as a standalone HTML table, merging the cells of
+    each run of equal values."""
+    classes = {TRUE: "t", FALSE: "f", UNKNOWN: "u"}
+    rows = []
+    for label, row in zip(labels, values):
+        cells = "".join(
+            f'<td class="{classes[value]}" colspan="{end - start}"></td>'
+            for value, start, end in _runs(row)
+        )
+        rows.append(f"<tr><th>{escape(label)}</th>{cells}</tr>")
+    style = (
+        "table{border-collapse:collapse}th{text-align:right;font:12px monospace;"
+        "padding-right:6px;white-space:nowrap}td{height:12px;min-width:4px;padding:0}"
+        ".t{background:#1ea01e}.f{background:#c81e1e}.u{background:#bebebe}"
+    )
+    return (
+        f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{escape(title)}"
+        f"</title><style>{style}</style></head><body><table>\n"
+        + "\n".join(rows)
+        + "\n</table></body></html>\n"
+    )
+
+
+def to_png(values: np.ndarray, scale: int = None) -> bytes:
+    """Renders a state matrix as a PNG heat map, with one `scale` x `scale`
+    square per (fluent, step) value. By default, the scale is the largest (up
+    to 8) that keeps the image within 4096 pixels, and at least 1."""
+    if scale is None:
+        scale = max(1, min(8, 4096 // max(values.shape, default=1)))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    pixels = PALETTE[values + 1]
+    pixels = np.repeat(np.repeat(pixels, scale, axis=0), scale, axis=1)
+    height, width = pixels.shape[:2]
+    # each scanline starts with its filter type (0: none)
+    scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = pixels.reshape(height, width * 3)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(scanlines.tobytes()))
+        + chunk(b"IEND", b"")
+    )
+
+
+def export(path: str, labels: Sequence[str], values: np.ndarray, scale: int = None):
+    """Exports a state matrix to a plain text (.txt), HTML (.html), or PNG (.png)
+    heat map, depending on the extension of `path`.
+
+    Raises:
+        ValueError:
+            The extension of `path` is not supported.
+    """
+    if path.endswith(".png"):
+        with open(path, "wb") as f:
+            f.write(to_png(values, scale))
+        return
+    if path.endswith(".html") or path.endswith(".htm"):
+        content = to_html(labels, values)
+    elif path.endswith(".txt"):
+        content = to_text(labels, values)
+    else:
+        raise ValueError(f"Unsupported heat map format: {path}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
@@ -0,0 +1,81 @@
+from collections.abc import Sequence
+from typing import Union
+
+
+class SliceView(Sequence):
+    """A read-only view over a slice of a sequence.
+
+    A `list`-like object over the elements of its parent sequence at the
+    positions of a slice. Creating a view does not copy any element: elements
+    are retrieved from the parent when they are accessed, so modifications of
+    the parent elements are visible through the view. The positions covered
+    by the view are resolved against the length of the parent when the view is
+    created, exactly like list slicing, and are not updated afterwards: once
+    elements are inserted into or removed from the parent, the view covers the
+    elements now at those positions (or raises an `IndexError` if the parent
+    became shorter). Use `copy` to keep the elements of a slice across such
+    modifications. Slicing a view returns a view over the same parent, and
+    concatenating a view with a sequence returns a `list`.
+
+    Attributes:
+        parent (Sequence):
+            The sequence the view is over.
+        positions (range):
+            The positions of the parent covered by the view.
+    """
+
+    __slots__ = ("parent", "positions")
+
+    def __init__(self, parent: Sequence, key: Union[slice, range]):
+        """Initializes a view over a slice of a sequence.
+
+        Args:
+            parent (Sequence):
+                The sequence to view.
+            key (slice | range):
+                The slice of the parent to view, or the range of positions it
+                resolves to.
+        """
+        if isinstance(key, slice):
+            key = range(*key.indices(len(parent)))
+        self.parent = parent
+        self.positions = key
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return type(self)(self.parent, self.positions[key])
+        return self.parent[self.positions[key]]
+
+    def __iter__(self):
+        parent = self.parent
+        for i in self.positions:
+            yield parent[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (SliceView, list, tuple)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        if isinstance(other, (SliceView, list, tuple)):
+            return list(self) + list(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, (list, tuple)):
+            return list(other) + list(self)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def copy(self) -> list:
+        """Copies the viewed elements into a new `list`."""
+        return list(self)
@@ -1,7 +1,42 @@
 from multiprocessing.pool import ThreadPool
+from time import monotonic
 from typing import Union
 
 
+class Deadline:
+    """A time budget, checked cooperatively by the loops it is passed to.
+
+    Unlike the timers below, which wait on a separate thread, a deadline does not
+    interrupt anything: long-running loops check it between units of work and
+    stop by themselves once it has passed.
+
+    Attributes:
+        seconds (float):
+            The length of the budget, in seconds.
+        end (float):
+            The `time.monotonic` time at which the budget runs out.
+    """
+
+    def __init__(self, seconds: Union[float, int]):
+        """Starts a time budget.
+
+        Args:
+            seconds (Union[float, int]):
+                The length of the budget, in seconds.
+        """
+        self.seconds = seconds
+        self.end = monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Returns the number of seconds left before the deadline (0 if it
+        has passed)."""
+        return max(0.0, self.end - monotonic())
+
+    def expired(self) -> bool:
+        """Checks whether the deadline has passed."""
+        return monotonic() >= self.end
+
+
 def set_timer_throw_exc(
     num_seconds: Union[float, int],
     exception: Exception,
@@ -20,3 +20,39 @@ class InvalidNumberOfTraces(Exception):
         message="The provided number of traces is invalid.",
     ):
         super().__init__(message)
+
+
+class InconsistentStateFluents(Exception):
+    """
+    Raised when a step is added to a trace storage that requires all of its states to
+    range over the same fluents (e.g. a columnar or delta-encoded trace), and the step's
+    state does not.
+    """
+
+    def __init__(self, state, message=None):
+        if message is None:
+            message = f"The state {state} does not range over the fluents of this trace."
+        super().__init__(message)
+
+
+class InvalidTraceStore(Exception):
+    """
+    Raised when the user attempts to open a file that is not a valid trace store.
+    """
+
+    def __init__(self, path, message=None):
+        if message is None:
+            message = f"{path} is not a valid trace store."
+        super().__init__(message)
+
+
+class InvalidTraceTable(Exception):
+    """
+    Raised when the user attempts to load traces or observations from an Arrow table
+    (or Parquet file) that was not written by macq, or holds the wrong kind of data.
+    """
+
+    def __init__(self, message=None):
+        if message is None:
+            message = "The table is not a valid macq trace table."
+        super().__init__(message)
@@ -26,6 +26,8 @@ DEV_DEPENDENCIES = [
     "pre-commit",
 ]
 
+ARROW_DEPENDENCIES = ["pyarrow"]
+
 CLASSIFIERS = [
     "Intended Audience :: Science/Research",
     "Topic :: Scientific/Engineering",
@@ -60,5 +62,5 @@ setup(
     classifiers=CLASSIFIERS,
     python_requires=">=3.7",
     install_requires=DEPENDENCIES,
-    extras_require={"dev": DEV_DEPENDENCIES},
+    extras_require={"dev": DEV_DEPENDENCIES, "arrow": ARROW_DEPENDENCIES},
 )
@@ -17,6 +17,20 @@ def test_fd_random_samples():
     assert len(sampler.traces) == 3
 
 
+def test_fd_random_walk_workers():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    def fingerprints(**kwargs):
+        traces = FDRandomWalkSampling(
+            dom=dom, prob=prob, num_traces=4, seed=3, **kwargs
+        ).traces
+        return [trace.fingerprint() for trace in traces]
+
+    # the traces only depend on the seed
+    assert fingerprints() == fingerprints(num_workers=1) == fingerprints(num_workers=2)
+
 
 if __name__ == "__main__":
     # exit out to the base macq folder so we can get to /tests
@@ -0,0 +1,45 @@
+import random
+from pathlib import Path
+from tarski.search.operations import progress
+from macq.generate.pddl import Generator
+
+
+def test_operator_index():
+    base = Path(__file__).parent.parent.parent
+    for dom, prob in [
+        ("blocks_domain", "blocks_problem"),
+        ("playlist_domain_modified", "playlist_problem_modified"),
+    ]:
+        generator = Generator(
+            dom=str((base / f"pddl_testing_files/{dom}.pddl").resolve()),
+            prob=str((base / f"pddl_testing_files/{prob}.pddl").resolve()),
+        )
+        index = generator.operator_index
+        assert index is not None
+        assert len(index) == len(generator.instance.operators)
+
+        # the applicable operators match tarski's along a random walk
+        random.seed(0)
+        state = generator.problem.init
+        applicable = index.applicable(generator.tarski_state_to_bits(state))
+        for _ in range(50):
+            expected = list(generator.instance.applicable(state))
+            assert applicable.operators() == expected
+            assert applicable.state == generator.tarski_state_to_bits(state)
+            assert all(
+                index.is_applicable(applicable.state, i) for i in applicable.ids()
+            )
+            if not expected:
+                break
+            i = random.choice(applicable.ids())
+            applicable.apply(i)
+            state = progress(state, index.operators[i])
+
+        # walks restart from the initial state after a dead end
+        init = generator.tarski_state_to_bits(generator.problem.init)
+        for seed in range(5):
+            states, operators = index.random_walk(init, 10, random.Random(seed))
+            assert states[0] == init and len(states) == 10
+            for state, i, successor in zip(states, operators, states[1:]):
+                assert index.is_applicable(state, i)
+                assert index.successor(state, i) == successor
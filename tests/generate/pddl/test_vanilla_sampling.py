@@ -1,9 +1,12 @@
+import random
+import threading
 import pytest
 from pathlib import Path
 from macq.generate.pddl import VanillaSampling
 from macq.generate.pddl.generator import InvalidGoalFluent
 from macq.utils import InvalidNumberOfTraces, InvalidPlanLength
-from macq.trace import Fluent, PlanningObject, TraceList
+from macq.generate import Plan
+from macq.trace import Fluent, PlanningObject, Trace, TraceList, ColumnarTrace
 from macq.utils import TraceSearchTimeOut, InvalidTime
 
 
@@ -39,6 +42,118 @@ def test_invalid_vanilla_sampling():
         VanillaSampling(dom=dom, prob=prob, plan_len=10, num_traces=1, max_time=0)
 
 
+def test_vanilla_sampling_bitset_progression():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    vanilla = VanillaSampling(dom=dom, prob=prob, plan_len=8)
+    generate = vanilla.generate_single_trace_setup(num_seconds=10)
+
+    # progressing bitsets gives the same traces as progressing tarski models
+    random.seed(1)
+    native = [generate() for _ in range(3)]
+    index, vanilla.operator_index = vanilla.operator_index, None
+    random.seed(1)
+    tarski = [generate() for _ in range(3)]
+    assert [t.fingerprint() for t in native] == [t.fingerprint() for t in tarski]
+
+    vanilla.operator_index = index
+    vanilla.trace_type = ColumnarTrace
+    random.seed(1)
+    columnar = [generate() for _ in range(3)]
+    assert all(isinstance(trace, ColumnarTrace) for trace in columnar)
+    assert [t.fingerprint() for t in columnar] == [t.fingerprint() for t in native]
+
+    # and the same traces from plans
+    vanilla.trace_type = Trace
+    applicable = index.applicable(vanilla.tarski_state_to_bits(vanilla.problem.init))
+    operators = []
+    for _ in range(5):
+        i = applicable.ids()[-1]
+        operators.append(index.operators[i])
+        applicable.apply(i)
+    plan = Plan(operators)
+    native = vanilla.generate_single_trace_from_plan(plan)
+    vanilla.operator_index = None
+    assert native.fingerprint() == (
+        vanilla.generate_single_trace_from_plan(plan).fingerprint()
+    )
+    assert len(native) == 6
+
+
+def test_vanilla_sampling_conversion_caches():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    vanilla = VanillaSampling(dom=dom, prob=prob, plan_len=5, num_traces=2)
+
+    operator = vanilla.instance.operators[0]
+    assert vanilla.tarski_act_to_macq(operator) is vanilla.tarski_act_to_macq(operator)
+
+    # revisited states are equal, but can be modified independently
+    first = vanilla.tarski_state_to_macq(vanilla.problem.init)
+    second = vanilla.tarski_state_to_macq(vanilla.problem.init)
+    assert first == second and first is not second
+    fluent = next(iter(first))
+    first[fluent] = not first[fluent]
+    assert vanilla.tarski_state_to_macq(vanilla.problem.init) == second != first
+
+
+def test_vanilla_sampling_workers():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    def fingerprints(**kwargs):
+        traces = VanillaSampling(
+            dom=dom, prob=prob, plan_len=6, num_traces=8, seed=3, **kwargs
+        ).traces
+        return [trace.fingerprint() for trace in traces]
+
+    # the traces only depend on the seed
+    serial = fingerprints(num_workers=1)
+    assert fingerprints() == serial
+    assert fingerprints(num_workers=3) == serial
+    assert fingerprints(num_workers=2, trace_type=ColumnarTrace) == serial
+    assert fingerprints(num_workers=2, unique=True) == list(dict.fromkeys(serial))
+
+    # later calls continue from the traces drawn, whatever the number of workers
+    def more_fingerprints(num_workers):
+        vanilla = VanillaSampling(
+            dom=dom,
+            prob=prob,
+            plan_len=6,
+            num_traces=2,
+            seed=3,
+            num_workers=num_workers,
+        )
+        traces = vanilla.generate_traces()
+        traces.generate_more(2)
+        return [trace.fingerprint() for trace in traces]
+
+    assert more_fingerprints(None) == more_fingerprints(3) == serial[2:6]
+
+    with pytest.raises(ValueError):
+        VanillaSampling(dom=dom, prob=prob, num_traces=1, num_workers=0)
+    with pytest.raises(ValueError):
+        VanillaSampling(dom=dom, prob=prob, num_traces=1, num_workers=2, lazy=True)
+
+
+def test_vanilla_sampling_deadline():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/playlist_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/playlist_problem.pddl").resolve())
+    vanilla = VanillaSampling(dom=dom, prob=prob, plan_len=10)
+
+    # the search stops by itself, without leaving a thread running
+    threads = threading.active_count()
+    for index in [vanilla.operator_index, None]:
+        vanilla.operator_index = index
+        with pytest.raises(TraceSearchTimeOut):
+            vanilla.generate_single_trace_setup(num_seconds=0.5)()
+        assert threading.active_count() == threads
+
+
 if __name__ == "__main__":
     # exit out to the base macq folder so we can get to /tests
     base = Path(__file__).parent.parent.parent
@@ -8,3 +8,19 @@ def test_observation():
         o.matches({"test": "test"})
 
     assert o.serialize()
+
+
+def test_observation_serialize():
+    from json import loads
+    from tests.utils.generators import generate_test_trace
+
+    trace = generate_test_trace(2)
+    step = trace[0]
+    for token in [IdentityObservation(step), NoisyObservation(step)]:
+        assert not hasattr(token, "__dict__")
+        data = loads(token.serialize())
+        assert data["index"] == step.index
+        assert data["state"]["fluents"] == {
+            str(f): v for f, v in step.state.items()
+        }
+        assert data["action"]["name"] == step.action.name
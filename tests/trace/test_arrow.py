@@ -0,0 +1,67 @@
+import pytest
+from macq.trace import TraceList
+from macq.observation import (
+    AtomicPartialObservation,
+    IdentityObservation,
+    ObservedTraceList,
+    PartialObservation,
+)
+from macq.utils import InvalidTraceTable
+from tests.utils.test_traces import blocks_world
+from tests.trace.test_trace_store import assert_same_traces
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_trace_list_arrow(tmp_path):
+    traces = blocks_world(3)
+    table = traces.to_arrow()
+    assert table.num_rows == sum(len(trace) for trace in traces)
+    assert table.column("trace_id").to_pylist()[0] == 0
+    assert_same_traces(traces, TraceList.from_arrow(table))
+
+    path = str(tmp_path / "traces.parquet")
+    traces.to_parquet(path)
+    loaded = TraceList.from_parquet(path)
+    assert_same_traces(traces, loaded)
+    assert [t.get_total_cost() for t in loaded] == [
+        t.get_total_cost() for t in traces
+    ]
+
+    with pytest.raises(InvalidTraceTable):
+        ObservedTraceList.from_arrow(table)
+    with pytest.raises(InvalidTraceTable):
+        TraceList.from_arrow(pa.table({"index": [1]}))
+
+
+def assert_same_tokens(observations, loaded):
+    assert loaded.type is observations.type
+    assert len(loaded) == len(observations)
+    for obs_trace, loaded_trace in zip(observations, loaded):
+        assert len(loaded_trace) == len(obs_trace)
+        for token, loaded_token in zip(obs_trace, loaded_trace):
+            assert loaded_token.index == token.index
+            assert type(loaded_token.state) is type(token.state)
+            if token.state is not None:
+                assert dict(loaded_token.state.items()) == dict(token.state.items())
+            assert loaded_token.action == token.action
+
+
+@pytest.mark.parametrize(
+    "Token, kwargs",
+    [
+        (IdentityObservation, {}),
+        (PartialObservation, {"percent_missing": 0.5}),
+        (AtomicPartialObservation, {"percent_missing": 0.5}),
+    ],
+)
+def test_observations_arrow(tmp_path, Token, kwargs):
+    observations = blocks_world(2).tokenize(Token, **kwargs)
+    table = observations.to_arrow()
+    if Token is not IdentityObservation:
+        assert table.column(table.column_names[-1]).null_count
+    assert_same_tokens(observations, ObservedTraceList.from_arrow(table))
+
+    path = str(tmp_path / "observations.parquet")
+    observations.to_parquet(path)
+    assert_same_tokens(observations, ObservedTraceList.from_parquet(path))
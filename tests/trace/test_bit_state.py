@@ -0,0 +1,68 @@
+import pytest
+from macq.trace import BitState, State, Vocabulary
+from macq.observation import IdentityObservation, NoisyObservation
+from macq.extract import Extract, modes
+from tests.utils.generators import generate_test_fluents
+from tests.utils.test_traces import blocks_world
+
+
+def test_bit_state():
+    vocabulary = Vocabulary()
+    fluents = generate_test_fluents(3)
+    values = {fluents[0]: True, fluents[1]: False, fluents[2]: True}
+    state = BitState(vocabulary, values)
+
+    assert len(vocabulary) == 3
+    assert state == State(values)
+    assert state.fluents == values
+    assert dict(state.items()) == values
+    assert state.keys() == fluents
+    assert state.values() == [True, False, True]
+    assert state.true_fluents() == [fluents[0], fluents[2]]
+    assert state.holds(fluents[0].name)
+    assert str(state) == str(State(values))
+
+    clone = state.clone()
+    assert clone == state and hash(clone) == hash(state)
+    clone[fluents[0]] = False
+    assert clone != state
+    assert state[fluents[0]]
+    # the cached hash follows modifications
+    clone[fluents[0]] = True
+    assert hash(clone) == hash(state)
+    # states over another vocabulary are only equal with the same fluent IDs
+    other = Vocabulary()
+    assert BitState(other, values) == state
+    other = Vocabulary()
+    assert BitState(other, dict(reversed(list(values.items())))) != state
+
+    del clone[fluents[1]]
+    assert len(clone) == 2
+    assert not clone.has_key(fluents[1])
+    with pytest.raises(KeyError):
+        clone[fluents[1]]
+    with pytest.raises(ValueError):
+        clone[fluents[0]] = None
+
+    clone.clear()
+    assert len(clone) == 0
+    clone.update(values)
+    assert clone == state
+
+    assert state.clone(atomic=True) == State({str(f): v for f, v in values.items()})
+
+
+def test_bit_state_generation():
+    traces = blocks_world(3)
+    bit_traces = blocks_world(3, state_type=BitState)
+
+    for trace, bit_trace in zip(traces, bit_traces):
+        for step, bit_step in zip(trace, bit_trace):
+            assert isinstance(bit_step.state, BitState)
+            assert bit_step.state == step.state
+            assert bit_step.action == step.action
+
+    model = Extract(traces.tokenize(IdentityObservation), modes.OBSERVER)
+    bit_model = Extract(bit_traces.tokenize(IdentityObservation), modes.OBSERVER)
+    assert bit_model == model
+    assert bit_traces.tokenize(NoisyObservation, percent_noisy=0.5)
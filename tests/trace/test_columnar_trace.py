@@ -0,0 +1,135 @@
+import pytest
+import numpy as np
+from macq.trace import BitState, ColumnarTrace, RowState, State, Step, TraceList
+from macq.utils import InconsistentStateFluents
+from macq.observation import IdentityObservation
+from macq.extract import Extract, modes
+from tests.utils.generators import generate_test_trace
+from tests.utils.test_traces import blocks_world
+
+
+def as_items(states):
+    return {frozenset(state.items()) for state in states}
+
+
+def test_columnar_trace():
+    traces = blocks_world(5)
+    columnar = traces.to_columnar()
+    assert isinstance(columnar, TraceList)
+    assert columnar.vocabulary is traces.vocabulary
+
+    for trace, col in zip(traces, columnar):
+        assert isinstance(col, ColumnarTrace)
+        assert len(col) == len(trace)
+        assert col.fluents == trace.fluents
+        assert col.actions == trace.actions
+        assert col._states.shape == (len(trace), len(trace.fluents))
+        for step, col_step in zip(trace, col):
+            assert isinstance(col_step.state, RowState)
+            assert col_step.state == step.state
+            assert step.state == col_step.state
+            assert col_step.action == step.action
+            assert col_step.index == step.index
+
+        assert col.get_static_fluents() == trace.get_static_fluents()
+        assert col.get_total_cost() == trace.get_total_cost()
+        assert col.get_slice_cost(2, 4) == trace.get_slice_cost(2, 4)
+        for action in trace.actions:
+            assert as_items(col.get_pre_states(action)) == as_items(
+                trace.get_pre_states(action)
+            )
+            assert as_items(col.get_post_states(action)) == as_items(
+                trace.get_post_states(action)
+            )
+            assert col.get_usage(action) == trace.get_usage(action)
+            assert len(col.get_steps(action)) == len(trace.get_steps(action))
+            assert len(col.get_sas_triples(action)) == len(
+                trace.get_sas_triples(action)
+            )
+        assert col.colorgrid()
+
+    model = Extract(traces.tokenize(IdentityObservation), modes.OBSERVER)
+    col_model = Extract(columnar.tokenize(IdentityObservation), modes.OBSERVER)
+    assert col_model == model
+
+
+def test_columnar_trace_views():
+    trace = blocks_world(1)[0]
+    col = ColumnarTrace(trace)
+    state = col[0].state
+    fluent = next(iter(state))
+
+    clone = state.clone()
+    assert isinstance(clone, BitState)
+    assert clone == state and hash(clone) == hash(state)
+
+    value = state[fluent]
+    state[fluent] = not value
+    assert col[0].state[fluent] != value
+    assert clone[fluent] == value
+    with pytest.raises(TypeError):
+        del state[fluent]
+
+    arrays = ColumnarTrace.from_arrays(
+        col.vocabulary,
+        col.steps.fluent_ids,
+        col._states,
+        col._action_ids,
+        col.steps.indices,
+    )
+    assert arrays == col
+    assert np.shares_memory(arrays._states, col._states)
+
+
+def test_columnar_trace_list_methods():
+    trace = blocks_world(1)[0]
+    col = ColumnarTrace(trace)
+    n = len(col)
+
+    last = col.pop()
+    assert len(col) == n - 1
+    assert last.state == trace[-1].state
+    col.append(last)
+    assert col[-1].state == trace[-1].state
+
+    first = col[0]
+    assert first in col
+    assert col.index(first) == 0
+    col.insert(0, trace[1])
+    assert col.index(trace[1]) == 0
+    col.remove(trace[1])
+    assert len(col) == n
+
+    # slices are modified like a list-backed trace
+    steps = list(trace)
+
+    def same_steps(col, steps):
+        assert len(col) == len(steps)
+        for col_step, step in zip(col, steps):
+            assert col_step.state == step.state and col_step.index == step.index
+
+    col[1:3] = [trace[4]]
+    steps[1:3] = [trace[4]]
+    same_steps(col, steps)
+    col[::2] = steps[::2][::-1]
+    steps[::2] = steps[::2][::-1]
+    same_steps(col, steps)
+    del col[1:3]
+    del steps[1:3]
+    same_steps(col, steps)
+    assert col.actions == {s.action for s in steps if s.action}
+    with pytest.raises(ValueError):
+        col[::2] = []
+
+    col.reverse()
+    assert col[0].state == steps[-1].state
+    col.clear()
+    assert len(col) == 0 and not col.fluents
+
+    with pytest.raises(InconsistentStateFluents):
+        ColumnarTrace(generate_test_trace(3))
+    # unknown values are not coerced to false
+    state = State(dict(trace[0].state.items()))
+    state[next(iter(state))] = None
+    with pytest.raises(InconsistentStateFluents):
+        ColumnarTrace([Step(state, None, 1)])
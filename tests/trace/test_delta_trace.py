@@ -0,0 +1,97 @@
+import pytest
+from macq.trace import BitState, DeltaTrace
+from macq.observation import IdentityObservation
+from macq.extract import Extract, modes
+from macq.utils import InconsistentStateFluents
+from tests.utils.generators import generate_test_trace
+from tests.utils.test_traces import blocks_world
+
+
+def test_delta_trace():
+    traces = blocks_world(5)
+    delta = traces.to_delta(checkpoint_interval=2)
+
+    for trace, dt in zip(traces, delta):
+        assert isinstance(dt, DeltaTrace)
+        assert len(dt) == len(trace)
+        assert dt.fluents == trace.fluents
+        assert dt.actions == trace.actions
+        # only the changed fluents are stored per step
+        assert all(len(add) + len(delete) < 10 for add, delete in dt.steps.deltas)
+        for i, (step, dt_step) in enumerate(zip(trace, dt)):
+            assert dt_step.state == step.state
+            assert dt[i].state == step.state
+            assert dt_step.action == step.action
+            assert dt_step.index == step.index
+
+        assert dt.get_static_fluents() == trace.get_static_fluents()
+        assert dt.get_total_cost() == trace.get_total_cost()
+        assert dt.get_slice_cost(2, 4) == trace.get_slice_cost(2, 4)
+        for action in trace.actions:
+            assert dt.get_pre_states(action) == trace.get_pre_states(action)
+            assert dt.get_post_states(action) == trace.get_post_states(action)
+            assert dt.get_usage(action) == trace.get_usage(action)
+        assert dt.colorgrid()
+
+    model = Extract(traces.tokenize(IdentityObservation), modes.OBSERVER)
+    delta_model = Extract(delta.tokenize(IdentityObservation), modes.OBSERVER)
+    assert delta_model == model
+
+
+def test_delta_trace_slice_view(monkeypatch):
+    trace = blocks_world(1)[0]
+    dt = DeltaTrace(trace, checkpoint_interval=2)
+    # slices are iterated incrementally, without materializing each step
+    monkeypatch.setattr(type(dt.steps), "state", None)
+    for key in [slice(1, 4), slice(None, None, -2), slice(-3, None), slice(8, 9)]:
+        view = dt[key]
+        expected = trace[key]
+        assert [s.state for s in view] == [s.state for s in expected]
+        assert [s.state for s in view[::-1]] == [s.state for s in expected[::-1]]
+        assert [s.index for s in view + []] == [s.index for s in expected]
+
+
+def test_delta_trace_list_methods():
+    trace = blocks_world(1, state_type=BitState)[0]
+    dt = DeltaTrace(trace, checkpoint_interval=2)
+    n = len(dt)
+
+    last = dt.pop()
+    assert len(dt) == n - 1
+    assert last.state == trace[-1].state
+    dt.append(last)
+    assert dt[-1].state == trace[-1].state
+
+    dt.insert(0, trace[2])
+    assert dt.index(trace[2]) == 0
+    assert dt[1].state == trace[0].state
+    dt.remove(trace[2])
+    assert len(dt) == n
+    assert all(a.state == b.state for a, b in zip(dt, trace))
+
+    # edits only re-encode the steps from the checkpoint before them
+    first = dt.steps.checkpoints[0]
+    dt[-1] = trace[0]
+    dt.insert(n - 1, trace[1])
+    del dt[n - 1]
+    assert dt.steps.checkpoints[0] is first
+    steps = list(trace)
+    steps[-1] = trace[0]
+    assert [s.state for s in dt] == [s.state for s in steps]
+
+    # slices are modified like a list-backed trace
+    dt[1:3] = [trace[4]]
+    steps[1:3] = [trace[4]]
+    dt[::-2] = steps[::-2][::-1]
+    steps[::-2] = steps[::-2][::-1]
+    del dt[2:]
+    del steps[2:]
+    assert [(s.state, s.index) for s in dt] == [(s.state, s.index) for s in steps]
+
+    dt.reverse()
+    assert dt[0].state == steps[-1].state
+    dt.clear()
+    assert len(dt) == 0 and not dt.fluents
+
+    with pytest.raises(InconsistentStateFluents):
+        DeltaTrace(generate_test_trace(3))
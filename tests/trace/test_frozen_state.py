@@ -0,0 +1,60 @@
+import pytest
+from macq.trace import BitState, FrozenState, State, StateTable, Vocabulary
+from macq.observation import IdentityObservation, NoisyObservation
+from tests.utils.generators import generate_test_fluents
+from tests.utils.test_traces import blocks_world
+
+
+def test_frozen_state():
+    vocabulary = Vocabulary()
+    fluents = generate_test_fluents(3)
+    values = {fluents[0]: True, fluents[1]: False, fluents[2]: True}
+    state = FrozenState(vocabulary, values)
+    bit_state = BitState(vocabulary, values)
+
+    assert state == State(values) and state == bit_state
+    assert hash(state) == hash(bit_state) == hash((state.mask, state.bits))
+    assert state.fluents == values
+
+    with pytest.raises(TypeError):
+        state[fluents[0]] = False
+    with pytest.raises(TypeError):
+        del state[fluents[0]]
+    with pytest.raises(TypeError):
+        state.update(values)
+    with pytest.raises(TypeError):
+        state.clear()
+
+    clone = state.clone()
+    assert isinstance(clone, BitState) and not isinstance(clone, FrozenState)
+    clone[fluents[0]] = False
+    assert state[fluents[0]]
+
+
+def test_state_table():
+    vocabulary = Vocabulary()
+    fluents = generate_test_fluents(2)
+    table = StateTable(vocabulary)
+    values = {fluents[0]: True, fluents[1]: False}
+
+    state = table.freeze(State(values))
+    assert table.freeze(BitState(vocabulary, values)) is state
+    assert table.state(state.mask, state.bits) is state
+    assert table.freeze(State({fluents[0]: False, fluents[1]: False})) is not state
+    assert len(table) == 2
+
+
+def test_frozen_state_generation():
+    traces = blocks_world(3)
+    frozen_traces = blocks_world(3, state_type=FrozenState)
+
+    states = {}
+    for trace, frozen_trace in zip(traces, frozen_traces):
+        for step, frozen_step in zip(trace, frozen_trace):
+            assert isinstance(frozen_step.state, FrozenState)
+            assert frozen_step.state == step.state
+            # identical states are a single shared object
+            assert states.setdefault(frozen_step.state, frozen_step.state) is frozen_step.state
+
+    assert frozen_traces.tokenize(IdentityObservation)
+    assert frozen_traces.tokenize(NoisyObservation, percent_noisy=0.5)
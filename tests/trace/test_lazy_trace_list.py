@@ -0,0 +1,76 @@
+import pickle
+import pytest
+from macq.trace import LazyTraceList, TraceList
+from macq.observation import IdentityObservation
+from tests.utils.generators import generate_test_trace
+from tests.utils.test_traces import blocks_world
+
+
+def counting_generator():
+    generated = []
+
+    def generator(i):
+        generated.append(generate_test_trace(3))
+        return generated[-1]
+
+    return generator, generated
+
+
+def test_lazy_trace_list():
+    generator, generated = counting_generator()
+    traces = LazyTraceList(generator, 4)
+    assert not generated
+    assert len(traces) == 4
+
+    # without a cache, every access generates a new trace
+    assert len(list(traces)) == 4 and len(generated) == 4
+    traces[0]
+    assert len(generated) == 5
+    with pytest.raises(IndexError):
+        traces[4]
+    with pytest.raises(TypeError):
+        traces[0] = generate_test_trace(3)
+    with pytest.raises(TypeError):
+        traces.append(generate_test_trace(3))
+
+    traces.generate_more(2)
+    assert len(traces.iter_tokens(IdentityObservation).__next__()) == 3
+    assert len(traces.tokenize(IdentityObservation)) == 6
+
+
+def test_lazy_trace_list_cache():
+    generator, generated = counting_generator()
+    traces = LazyTraceList(generator, 3, cache_size=2)
+    first = traces[0]
+    assert traces[0] is first and traces[-3] is first
+    traces[1], traces[2]
+    # the least recently used trace was evicted
+    assert traces[0] is not first
+    assert len(generated) == 4
+
+    generator, generated = counting_generator()
+    traces = LazyTraceList(generator, 3, cache_size=None)
+    materialized = traces.materialize()
+    assert isinstance(materialized, TraceList)
+    assert materialized.traces == generated
+    assert list(traces) == generated
+
+
+def test_lazy_trace_list_pickle():
+    generator, _ = counting_generator()
+    with pytest.raises(TypeError):
+        pickle.dumps(LazyTraceList(generator, 2))
+
+
+def test_lazy_generation():
+    # lazy traces are sampled from the same per-trace streams as workers
+    traces = blocks_world(3, num_workers=1)
+    lazy = blocks_world(3, lazy=True)
+    assert isinstance(lazy, LazyTraceList)
+    # a position is the same trace every time it is accessed
+    assert lazy[1].fingerprint() == lazy[1].fingerprint()
+    assert lazy.materialize()[1].fingerprint() == lazy[1].fingerprint()
+    for trace, lazy_trace in zip(traces, lazy):
+        assert [(s.state, s.action) for s in lazy_trace] == [
+            (s.state, s.action) for s in trace
+        ]
@@ -0,0 +1,73 @@
+import pickle
+import pytest
+from macq.trace import (
+    BitState,
+    DeltaTrace,
+    SparseState,
+    State,
+    Vocabulary,
+)
+from macq.observation import (
+    AtomicPartialObservation,
+    IdentityObservation,
+    PartialObservation,
+)
+from macq.extract import Extract, modes
+from tests.utils.generators import generate_test_fluents
+from tests.utils.test_traces import blocks_world
+
+
+def test_sparse_state():
+    vocabulary = Vocabulary()
+    fluents = generate_test_fluents(3)
+    values = {fluents[0]: True, fluents[1]: False, fluents[2]: True}
+    state = SparseState(vocabulary, values)
+
+    assert state.true == {0, 2}
+    assert state == State(values) == BitState(vocabulary, values)
+    assert hash(state) == hash(BitState(vocabulary, values))
+    assert dict(state.items()) == values
+    assert state.keys() == fluents
+    assert state.values() == [True, False, True]
+    assert state.true_fluents() == [fluents[0], fluents[2]]
+    assert str(state) == str(State(values))
+    # closed world: fluents that are not part of the state are false
+    assert state[generate_test_fluents(4)[3]] is False
+
+    clone = state.clone()
+    assert isinstance(clone, SparseState) and clone == state
+    clone[fluents[0]] = False
+    assert clone != state and state[fluents[0]]
+    del clone[fluents[2]]
+    assert len(clone) == 2 and not clone.has_key(fluents[2])
+    with pytest.raises(ValueError):
+        clone[fluents[0]] = None
+    clone.clear()
+    assert len(clone) == 0
+    clone.update(values)
+    assert clone == state
+    assert pickle.loads(pickle.dumps(state)) == state
+
+
+def test_sparse_state_generation():
+    traces = blocks_world(3)
+    sparse_traces = blocks_world(3, state_type=SparseState)
+
+    for trace, sparse_trace in zip(traces, sparse_traces):
+        for step, sparse_step in zip(trace, sparse_trace):
+            assert isinstance(sparse_step.state, SparseState)
+            assert sparse_step.state == step.state
+            assert len(sparse_step.state.true) < len(step.state)
+    delta = DeltaTrace.from_trace(sparse_traces[0], 2)
+    assert [s.state for s in delta] == [s.state for s in traces[0]]
+    assert sparse_traces.to_columnar()[0][1].state == traces[0][1].state
+
+    model = Extract(traces.tokenize(IdentityObservation), modes.OBSERVER)
+    sparse_model = Extract(sparse_traces.tokenize(IdentityObservation), modes.OBSERVER)
+    assert sparse_model == model
+    assert sparse_traces.tokenize(PartialObservation, percent_missing=0.5)
+    # the atomic tokens of e.g. SLAF
+    observations = sparse_traces.tokenize(AtomicPartialObservation, percent_missing=0)
+    assert [o.state for o in observations[0]] == [
+        s.state.clone(atomic=True) for s in traces[0]
+    ]
@@ -34,3 +34,23 @@ def test_state():
         assert s1.has_key(f)
     for f in s1:
         assert f in fluents
+
+
+def test_state_copy_on_write():
+    fluents = generate_test_fluents(3)
+    values = {f: True for f in fluents}
+    state = State(values.copy())
+
+    clone = state.clone()
+    assert clone.fluents is state.fluents
+    clone[fluents[0]] = False
+    assert clone.fluents is not state.fluents
+    assert state[fluents[0]] and not clone[fluents[0]]
+
+    # modifying the original does not modify its clones either
+    clone = state.clone()
+    del state[fluents[1]]
+    assert clone.has_key(fluents[1]) and not state.has_key(fluents[1])
+    state.clear()
+    assert len(clone) == 3
+    assert clone == State(values)
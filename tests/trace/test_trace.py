@@ -144,3 +144,184 @@ def test_trace_list_methods():
 
     trace.remove(step)
     assert step not in trace
+
+
+def assert_index_consistent(trace: Trace):
+    # the incrementally maintained index must match one rebuilt from scratch
+    rebuilt = Trace(list(trace.steps))
+    assert trace._action_positions == rebuilt._action_positions
+    assert trace._fluent_counts == rebuilt._fluent_counts
+    assert trace.fluents == rebuilt.fluents
+    assert trace.actions == rebuilt.actions
+
+
+def test_trace_index():
+    trace = generate_test_trace(5)
+    steps = generate_test_steps(3)
+    assert_index_consistent(trace)
+
+    trace.append(steps[0])
+    trace.insert(1, steps[1])
+    trace.insert(-2, steps[2])
+    assert_index_consistent(trace)
+    trace[2] = steps[0]
+    assert_index_consistent(trace)
+    del trace[0]
+    trace.remove(steps[1])
+    trace.pop()
+    assert_index_consistent(trace)
+    trace.extend(steps)
+    trace.reverse()
+    assert_index_consistent(trace)
+
+    for action in trace.actions:
+        assert trace._positions(action) == [
+            i for i, step in enumerate(trace) if step.action == action
+        ]
+    assert trace._positions(steps[0].action) != []
+
+    trace.clear()
+    assert not trace.actions and not trace.fluents
+    assert_index_consistent(trace)
+
+
+def test_trace_get_all_sas_triples():
+    trace = generate_test_trace(5)
+    all_triples = trace.get_all_sas_triples()
+    # the last step has no post-state
+    assert set(all_triples) == {step.action for step in trace.steps[:-1]}
+    for action, triples in all_triples.items():
+        assert triples == trace.get_sas_triples(action)
+
+
+def test_trace_cost_prefix():
+    trace = generate_test_trace(5)
+    steps = generate_test_steps(3)
+    assert trace.get_total_cost() == 10
+
+    def check():
+        costs = [step.action.cost if step.action else 0 for step in trace]
+        assert trace.get_total_cost() == sum(costs)
+        for start in range(1, len(trace) + 1):
+            for end in range(start, len(trace) + 1):
+                assert trace.get_slice_cost(start, end) == sum(costs[start - 1 : end])
+
+    # appending and popping update the prefix sums in place
+    trace.append(steps[2])
+    check()
+    trace.pop()
+    check()
+    # other mutations invalidate them
+    trace.insert(0, steps[2])
+    check()
+    trace[1] = steps[1]
+    check()
+    del trace[0]
+    trace.reverse()
+    check()
+
+
+def test_trace_slice_view():
+    from macq.utils import SliceView
+
+    trace = generate_test_trace(6)
+    steps = list(trace.steps)
+    for key in [slice(1, 4), slice(None, None, -2), slice(-3, None), slice(8, 9)]:
+        view = trace[key]
+        assert isinstance(view, SliceView)
+        assert view == steps[key]
+        assert len(view) == len(steps[key])
+        assert view[1:] == steps[key][1:]
+        assert view.copy() == steps[key]
+    # views are not copies
+    view = trace[2:4]
+    new_step = Step(view[0].state, view[0].action, 99)
+    trace[2] = new_step
+    assert view[0] is new_step
+    # views concatenate into lists
+    assert view + [new_step] == [new_step, steps[3], new_step]
+    assert [new_step] + view == [new_step, new_step, steps[3]]
+    # a view covers its positions, whatever steps are there now
+    stale = generate_test_trace(6)
+    view = stale[2:4]
+    first = stale[1]
+    stale.insert(0, new_step)
+    assert view[0] is first
+    stale.clear()
+    with pytest.raises(IndexError):
+        view[0]
+
+    obs_lists = TraceList([trace]).tokenize(IdentityObservation)
+    for transitions in obs_lists.get_all_transitions().values():
+        for window in transitions:
+            assert isinstance(window, SliceView)
+            assert window.parent is obs_lists[0]
+            positions = window.positions
+            assert window == obs_lists[0][positions.start : positions.stop]
+
+
+def test_trace_heatmap(tmp_path):
+    from io import StringIO
+    from rich.console import Console
+    from macq.observation import PartialObservation
+    from tests.utils.test_traces import blocks_world
+
+    trace = blocks_world(1)[0]
+    columnar = ColumnarTrace.from_trace(trace)
+    fluents = sorted(trace.fluents)
+    values = trace.get_state_matrix(fluents, 1, -1)
+    assert values.shape == (len(fluents), len(trace) - 2)
+    assert values.tolist() == columnar.get_state_matrix(fluents, 1, -1).tolist()
+    assert values[:, 0].tolist() == [int(trace[1].state[f]) for f in fluents]
+
+    console = Console(file=StringIO(), width=120)
+    console.print(trace.colorgrid(start=1, stop=-1))
+    trace.print("color", page_size=2)
+
+    for ext in ["txt", "html", "png"]:
+        path = tmp_path / f"trace.{ext}"
+        trace.export_heatmap(str(path), start=1, stop=-1)
+        assert path.stat().st_size
+    lines = (tmp_path / "trace.txt").read_text().splitlines()
+    assert len(lines) == len(fluents)
+    assert lines[0].endswith("".join(".#"[v] for v in values[0]))
+    assert (tmp_path / "trace.png").read_bytes().startswith(b"\x89PNG")
+    with pytest.raises(ValueError):
+        trace.export_heatmap(str(tmp_path / "trace.bmp"))
+
+    observations = TraceList([trace]).tokenize(PartialObservation, percent_missing=0.5)
+    path = tmp_path / "observations.txt"
+    observations.export_heatmap(str(path))
+    assert "?" in path.read_text()
+    observations.print("color", start=1, stop=4)
+
+
+def test_trace_fingerprint():
+    from tests.utils.test_traces import blocks_world
+
+    trace = blocks_world(1)[0]
+    columnar = ColumnarTrace.from_trace(trace)
+    delta = DeltaTrace.from_trace(trace, 2)
+    # the fingerprint depends on the content of the steps, not their storage
+    assert trace.fingerprint() == columnar.fingerprint() == delta.fingerprint()
+    assert [trace.fingerprint(n) for n in range(len(trace) + 1)] == [
+        columnar.fingerprint(n) for n in range(len(trace) + 1)
+    ]
+    assert len({trace.fingerprint(n) for n in range(len(trace) + 1)}) == len(trace) + 1
+
+    # appending and popping update the prefix fingerprints in place
+    full = trace.fingerprint()
+    last = trace.pop()
+    assert trace.fingerprint() == columnar.fingerprint(len(trace))
+    trace.append(last)
+    assert trace.fingerprint() == full
+    # other mutations invalidate them
+    trace.reverse()
+    assert trace.fingerprint() != full
+    trace.reverse()
+    assert trace.fingerprint() == full
+
+    # the digests of fluents and actions are cached in bounded caches
+    from macq.trace.fingerprint import CACHE_SIZE, fluent_digest
+
+    assert fluent_digest.cache_info().maxsize == CACHE_SIZE
@@ -1,11 +1,13 @@
 from inspect import trace
 from pathlib import Path
 import pytest
-from macq.trace import TraceList, Fluent
+import numpy as np
+from macq.trace import TraceList, Fluent, ColumnarTrace, Vocabulary
 from tests.utils.generators import (
     generate_test_trace_list,
     generate_test_trace,
 )
+from tests.utils.test_traces import blocks_world
 from macq.generate.csv import load
 
 MissingGenerator = TraceList.MissingGenerator
@@ -71,3 +73,160 @@ def test_trace_list_csv_load():
     assert trace_list[2][2].state[Fluent("holding object i", [])] == False
     assert trace_list[2][2].state[Fluent("ontable object g", [])] == False
     assert trace_list[2][2].state[Fluent("ontable object c", [])] == True
+
+
+def test_trace_list_costs():
+    trace_list = generate_test_trace_list(5)
+    costs = trace_list.get_costs()
+    assert costs.tolist() == [trace.get_total_cost() for trace in trace_list]
+    trace_list.sort()
+    assert trace_list.get_costs().tolist() == sorted(costs.tolist())
+
+
+def test_trace_list_csv_round_trip(tmp_path):
+    from macq.generate.csv import iter_load
+
+    def label(name, objects):
+        return " ".join([name] + [o.details() for o in objects])
+
+    def rows(trace):
+        return [
+            (
+                {label(f.name, f.objects): v for f, v in step.state.items()},
+                step.action and label(step.action.name, step.action.obj_params),
+            )
+            for step in trace
+        ]
+
+    def loaded_rows(trace):
+        return [
+            (
+                {f.name: v for f, v in step.state.items()},
+                step.action.name if step.action else None,
+            )
+            for step in trace
+        ]
+
+    trace_list = blocks_world(3)
+    f = str(tmp_path / "traces.csv")
+    trace_list.to_csv(f)
+    expected = [rows(trace) for trace in trace_list]
+
+    loaded = load(f, "actions", "plan_id")
+    assert [loaded_rows(trace) for trace in loaded] == expected
+    # streamed in chunks smaller than the traces
+    streamed = list(iter_load(f, "actions", "plan_id", chunk_size=3))
+    assert [loaded_rows(trace) for trace in streamed] == expected
+    # one interned fluent per column, shared by all the traces
+    assert streamed[0].steps.columns[0] is streamed[-1].steps.columns[0]
+
+
+def test_trace_list_tokenize_workers():
+    from macq.observation import PartialObservation
+
+    def hidden(observations):
+        return [
+            [{f for f, v in token.state.items() if v is None} for token in tokens]
+            for tokens in observations
+        ]
+
+    trace_list = generate_test_trace_list(6)
+    sequential = trace_list.tokenize(PartialObservation, percent_missing=0.5, seed=7)
+    parallel = trace_list.tokenize(
+        PartialObservation, percent_missing=0.5, seed=7, workers=2
+    )
+    assert len(parallel) == len(trace_list)
+    assert [len(t) for t in parallel] == [len(t) for t in trace_list]
+    assert hidden(parallel) == hidden(sequential)
+    assert hidden(
+        trace_list.tokenize(PartialObservation, percent_missing=0.5, seed=8)
+    ) != hidden(sequential)
+
+
+def test_trace_list_deduplicate():
+    trace_list = blocks_world(3, unique=True)
+    first, second, third = trace_list
+    prefix = ColumnarTrace.from_trace(first)
+    prefix.pop()
+    trace_list.extend([ColumnarTrace.from_trace(second), prefix, first])
+
+    assert trace_list.deduplicate() == [2, 2, 1, 1]
+    assert list(trace_list) == [first, second, third, prefix]
+    # the prefix is counted as an occurrence of the trace it starts
+    assert trace_list.deduplicate(prefixes=True) == [2, 1, 1]
+    assert list(trace_list) == [first, second, third]
+
+    unique = blocks_world(3, unique=True)
+    assert len({(len(t), t.fingerprint()) for t in unique}) == len(unique) == 3
+    with pytest.raises(ValueError):
+        blocks_world(3, lazy=True, unique=True)
+
+
+def test_trace_list_pickle():
+    import pickle
+    from macq.observation import PartialObservation
+    from macq.trace import BitState, FrozenState
+
+    def content(traces):
+        return [[(dict(s.state.items()), s.action, s.index) for s in t] for t in traces]
+
+    # generated trace lists hold their (unpicklable) generator
+    trace_list = blocks_world(3)
+    expected = content(trace_list)
+    for traces in [trace_list, trace_list.to_columnar(), trace_list.to_delta(2)]:
+        copy = pickle.loads(pickle.dumps(traces))
+        assert type(copy[0]) is type(traces[0])
+        assert content(copy) == expected
+        assert copy[0].fingerprint() == traces[0].fingerprint()
+        assert copy[0].actions == traces[0].actions
+    columnar = pickle.loads(pickle.dumps(trace_list.to_columnar()))
+    assert columnar[0].vocabulary is columnar[-1].vocabulary
+
+    state = columnar[0][0].state
+    for s in [state, BitState(columnar.vocabulary, dict(state.items()))]:
+        copy = pickle.loads(pickle.dumps(s))
+        assert type(copy) is BitState and copy == s
+    frozen = FrozenState(columnar.vocabulary, dict(state.items()))
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+
+    observations = trace_list.tokenize(PartialObservation, percent_missing=0.5)
+    copy = pickle.loads(pickle.dumps(observations))
+    assert [[o.state for o in t] for t in copy] == [
+        [o.state for o in t] for t in observations
+    ]
+
+
+def test_trace_list_transition_arrays():
+    trace_list = blocks_world(3)
+    trace_list.append(generate_test_trace(2))
+    pre, action_ids, post, vocabulary = trace_list.to_transition_arrays()
+    triples = [
+        sas for trace in trace_list for sas in trace.get_all_sas_triples().values()
+    ]
+    assert len(pre) == len(post) == len(action_ids) == sum(map(len, triples))
+    assert pre.dtype == post.dtype == np.uint8 and action_ids.dtype == np.int32
+    assert pre.shape[1] == len(vocabulary.fluents)
+
+    # transitions are in step order
+    expected = [
+        (step.state, step.action, trace[i + 1].state)
+        for trace in trace_list
+        for i, step in enumerate(trace[:-1])
+        if step.action
+    ]
+    for (s, a, s_), p, action_id, p_ in zip(expected, pre, action_ids, post):
+        assert vocabulary.actions[action_id] == a
+        for f, v in s.items():
+            assert p[vocabulary.fluent_id(vocabulary.intern_fluent(f))] == v
+        for f, v in s_.items():
+            assert p_[vocabulary.fluent_id(vocabulary.intern_fluent(f))] == v
+
+    # columnar traces (of other vocabularies) give the same arrays
+    columnar = TraceList(
+        [ColumnarTrace.from_trace(trace, Vocabulary()) for trace in trace_list[:3]]
+        + [trace_list[3]],
+        vocabulary=vocabulary,
+    )
+    arrays = columnar.to_transition_arrays()
+    for x, y in zip(arrays[:3], (pre, action_ids, post)):
+        assert np.array_equal(x, y)
@@ -0,0 +1,48 @@
+import pytest
+from macq.trace import ColumnarTrace, LazyTraceList, TraceStore
+from macq.utils import InvalidTraceStore
+from tests.utils.test_traces import blocks_world
+
+
+def assert_same_traces(traces, loaded):
+    assert len(loaded) == len(traces)
+    for trace, loaded_trace in zip(traces, loaded):
+        assert isinstance(loaded_trace, ColumnarTrace)
+        assert len(loaded_trace) == len(trace)
+        for step, loaded_step in zip(trace, loaded_trace):
+            assert dict(loaded_step.state.items()) == dict(step.state.items())
+            assert loaded_step.action == step.action
+            assert loaded_step.index == step.index
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_trace_store(tmp_path, compress):
+    traces = blocks_world(3)
+    path = str(tmp_path / "traces.bin")
+    TraceStore.write(path, traces, compress=compress)
+
+    with TraceStore(path) as store:
+        assert store.compressed == compress
+        assert_same_traces(traces, store)
+        # random access, and traces remain valid after the store is closed
+        last = store[-1]
+        assert_same_traces(traces[1:], store[1:])
+        assert store.vocabulary.actions == traces.vocabulary.actions
+    assert_same_traces(traces[-1:], [last])
+    assert last.get_total_cost() == traces[-1].get_total_cost()
+
+
+def test_trace_store_lazy(tmp_path):
+    traces = blocks_world(2)
+    lazy = LazyTraceList(traces.__getitem__, 2, vocabulary=traces.vocabulary)
+    path = str(tmp_path / "traces.bin")
+    TraceStore.write(path, lazy, compress=True)
+    with TraceStore(path) as store:
+        assert_same_traces(traces, store.to_trace_list())
+
+
+def test_invalid_trace_store(tmp_path):
+    path = tmp_path / "invalid.bin"
+    path.write_bytes(b"not a trace store" * 10)
+    with pytest.raises(InvalidTraceStore):
+        TraceStore(str(path))
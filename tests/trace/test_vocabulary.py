@@ -0,0 +1,60 @@
+from macq.trace import Vocabulary, Fluent, Action, PlanningObject
+
+
+def test_vocabulary():
+    vocabulary = Vocabulary()
+    a = vocabulary.object("block", "a")
+    b = vocabulary.object("block", "b")
+    assert vocabulary.object("block", "a") is a
+    assert vocabulary.object_id(b) == 1
+
+    on = vocabulary.fluent("on", [a, b])
+    assert vocabulary.fluent("on", [PlanningObject("block", "a"), b]) is on
+    assert vocabulary.fluent("on", [b, a]) is not on
+    assert vocabulary.fluent_id(on) == 0
+    assert vocabulary.fluents[0] is on
+
+    # interned fluents stay interchangeable with equal, uninterned ones
+    fresh = Fluent("on", [PlanningObject("block", "a"), PlanningObject("block", "b")])
+    assert fresh == on
+    assert hash(fresh) == hash(on)
+    assert vocabulary.intern_fluent(fresh) is on
+    assert fresh in vocabulary
+    assert {on: True}[fresh]
+
+    stack = vocabulary.action("stack", [a, b], 1, add={fresh})
+    assert vocabulary.intern_action(Action("stack", [a, b])) is stack
+    assert vocabulary.action_id(stack) == 0
+    assert on in stack.add
+    assert stack.clone() == stack
+    assert hash(stack.clone()) == hash(Action("stack", [a, b]))
+
+
+def test_vocabulary_pickle():
+    import pickle
+
+    vocabulary = Vocabulary()
+    a = vocabulary.object("block", "a")
+    b = vocabulary.object("block", "b")
+    on = vocabulary.fluent("on", [a, b])
+    clear = vocabulary.fluent("clear", [a])
+    stack = vocabulary.action("stack", [a, b], 2, precond={clear}, add={on})
+
+    copy = pickle.loads(pickle.dumps(vocabulary))
+    assert copy is not vocabulary
+    assert copy.fluents == vocabulary.fluents
+    assert [copy.fluent_id(on), copy.fluent_id(clear)] == [0, 1]
+    copied = copy.actions[0]
+    assert copied == stack and copied.cost == 2
+    assert next(iter(copied.add)) is copy.fluents[0]
+
+    with vocabulary.shared():
+        # shared vocabularies and their entries are pickled by reference
+        assert pickle.loads(pickle.dumps(vocabulary)) is vocabulary
+        assert pickle.loads(pickle.dumps([on, stack])) == [on, stack]
+        assert pickle.loads(pickle.dumps(on)) is on
+        # entries interned once shared are not
+        holding = vocabulary.fluent("holding", [b])
+        assert pickle.loads(pickle.dumps(holding)) is not holding
+        assert pickle.loads(pickle.dumps(vocabulary)) is not vocabulary
+    assert pickle.loads(pickle.dumps(on)) is not on
@@ -0,0 +1,66 @@
+"""Reports the memory used per step and per observation token on the bundled
+blocks and playlist problems.
+
+Run from the repository root with `python -m tests.utils.memory_benchmark`.
+Memory is measured with `tracemalloc`: the memory per step is the memory
+allocated to load the generated steps from a pickle, less the memory of the
+vocabulary they share, and the memory per token is the memory allocated to
+tokenize the traces with `IdentityObservation`.
+"""
+import gc
+import pickle
+import tracemalloc
+from pathlib import Path
+from macq.generate.pddl import VanillaSampling
+from macq.observation import IdentityObservation
+
+# (domain, problem, plan length) -- longer playlist walks tend to dead-end
+PROBLEMS = {
+    "blocks": ("blocks_domain.pddl", "blocks_problem.pddl", 10),
+    "playlist": ("playlist_domain.pddl", "playlist_problem.pddl", 5),
+}
+
+
+def allocated(func) -> int:
+    """Measures the memory allocated by `func` that is still in use when it
+    returns (the result is kept alive during the measurement)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def benchmark(problem: str, num_traces: int = 10, **kwargs):
+    base = Path(__file__).parent.parent / "pddl_testing_files"
+    dom, prob, plan_len = PROBLEMS[problem]
+    dom, prob = (str((base / f).resolve()) for f in (dom, prob))
+    traces = VanillaSampling(
+        dom=dom, prob=prob, plan_len=plan_len, num_traces=num_traces, seed=42, **kwargs
+    ).traces
+    num_steps = sum(len(trace) for trace in traces)
+
+    steps = [trace.steps for trace in traces]
+    shared = pickle.dumps(traces.vocabulary)
+    both = pickle.dumps((traces.vocabulary, steps))
+    step_size = allocated(lambda: pickle.loads(both)) - allocated(
+        lambda: pickle.loads(shared)
+    )
+    token_size = allocated(lambda: traces.tokenize(IdentityObservation))
+    return step_size / num_steps, token_size / num_steps
+
+
+def main():
+    print(f"{'problem':<10}{'bytes/step':>12}{'bytes/token':>13}")
+    for problem in PROBLEMS:
+        per_step, per_token = benchmark(problem)
+        print(f"{problem:<10}{per_step:>12.0f}{per_token:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()